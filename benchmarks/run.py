@@ -0,0 +1,242 @@
+"""
+Offline benchmark suite for the hot paths.
+
+    python -m benchmarks.run                      # 10 min album, compare to benchmarks/baseline.json
+    python -m benchmarks.run --sizes 10m,1h,3h --out results.json
+    python -m benchmarks.run --update-baseline    # accept the current numbers
+    python -m benchmarks.run --no-compare         # just measure (no baseline needed)
+    python -m benchmarks.run --startup-only       # CLI cold-start budget check only
+
+Synthetic inputs are generated once into --workdir and reused. No network
+access is needed; ffmpeg/ffprobe must be on PATH for the audio cases.
+Timings only compare on the machine that recorded them, so the baseline is
+not committed: record one with --update-baseline first. Comparing without a
+baseline fails rather than passing silently.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks import synth
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+DEFAULT_BASELINE = HERE / "baseline.json"
+CODECS = ["flac", "mp3", "alac", "wav", "copy"]
+# cold `import smart_splitter.cli` (python -X importtime, cumulative) must stay under this
+STARTUP_BUDGET_SEC = 0.15
+# modules that only the commands needing them may import
+LAZY_MODULES = ["yt_dlp", "numpy", "mutagen", "sqlite3"]
+
+
+def timeit(fn: Callable[[], object], *, repeat: int = 1) -> float:
+    """Best wall time of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def text_cases(results: Dict[str, float], workdir: Path) -> None:
+    from smart_splitter.core import normalize_track_ends
+    from smart_splitter.parsers import parse_timestamps, extract_from_comments, extract_from_transcript
+
+    desc = synth.description(5000)
+    coms = synth.comments(20000)
+    vtt_path = workdir / "captions.vtt"
+    if not vtt_path.exists():
+        vtt_path.write_text(synth.vtt(50000), encoding="utf-8")
+    parsed = parse_timestamps(desc)
+
+    results["parse_timestamps/5k_lines"] = timeit(lambda: parse_timestamps(desc), repeat=5)
+    results["extract_from_comments/20k"] = timeit(lambda: extract_from_comments(coms), repeat=3)
+    results["extract_from_transcript/50k_cues"] = timeit(lambda: extract_from_transcript(vtt_path=str(vtt_path)), repeat=3)
+    results["normalize_track_ends/5k"] = timeit(
+        lambda: normalize_track_ends(parsed, total_duration=10 ** 6), repeat=5)
+
+
+def _import_seconds(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, from -X importtime."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, check=True, cwd=ROOT).stderr
+    for line in reversed(err.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"no importtime line for {module}")
+
+
+def eager_modules() -> str:
+    """Comma-separated LAZY_MODULES that a fresh `import smart_splitter.cli, smart_splitter.core` loads."""
+    probe = ("import sys, smart_splitter.cli, smart_splitter.core; "
+             f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    return subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                          cwd=ROOT).stdout.strip()
+
+
+def startup_cases(results: Dict[str, float]) -> List[str]:
+    """CLI cold-start timings; returns budget violations (slow import, eagerly loaded heavy modules)."""
+    results["startup/import_cli"] = min(_import_seconds("smart_splitter.cli") for _ in range(5))
+    results["startup/import_core"] = min(_import_seconds("smart_splitter.core") for _ in range(5))
+    results["startup/cli_help"] = timeit(lambda: subprocess.run(
+        [sys.executable, "-m", "smart_splitter.cli", "--help"], capture_output=True, check=True), repeat=3)
+
+    problems = []
+    if results["startup/import_cli"] > STARTUP_BUDGET_SEC:
+        problems.append(f"import smart_splitter.cli took {results['startup/import_cli']:.3f}s "
+                        f"(budget {STARTUP_BUDGET_SEC:.3f}s)")
+    eager = eager_modules()
+    if eager:
+        problems.append(f"imported at startup: {eager}")
+    return problems
+
+
+def audio_cases(results: Dict[str, float], workdir: Path, size: str) -> None:
+    from smart_splitter.audio.ffmpeg import cut_segments, snap_to_packets
+    from smart_splitter.audio.peaks import peaks_path
+    from smart_splitter.audio.tags import apply_tags
+    from smart_splitter.parsers import silence
+    from smart_splitter.tracks import Track, Tracklist
+
+    wav = workdir / f"album-{size}.wav"
+    layout = synth.write_album(wav, synth.SIZES[size])
+    tracks = Tracklist(Track(int(t["start"]) * 1000, int(t["end"]) * 1000, t["title"]) for t in layout)
+
+    def cold_silence():
+        silence._ENERGY.clear()
+        peaks_path(str(wav)).unlink(missing_ok=True)
+        return silence.suggest_cuts_from_silence(str(wav))
+
+    results[f"suggest_cuts_from_silence/{size}/cold"] = timeit(cold_silence)
+    results[f"suggest_cuts_from_silence/{size}/rethreshold"] = timeit(
+        lambda: silence.suggest_cuts_from_silence(str(wav), noise_db="-40dB", min_silence=0.5), repeat=5)
+    found = len(silence.suggest_cuts_from_silence(str(wav)))
+    if found != len(layout) - 1:
+        print(f"  ! silence found {found} cuts, expected {len(layout) - 1}")
+
+    from smart_splitter.audio import fingerprint
+    fingerprint.fingerprint_path(str(wav)).unlink(missing_ok=True)
+    results[f"build_fingerprint/{size}"] = timeit(lambda: fingerprint.build_fingerprint(str(wav)))
+    fp = fingerprint.load_fingerprint(str(wav))
+    results[f"suggest_cuts_from_novelty/{size}"] = timeit(lambda: fingerprint.suggest_cuts_from_novelty(fp), repeat=3)
+    # the album's steady tones give too few distinct keys to match on; a chord mix has plenty
+    mix = workdir / f"mix-{size}.wav"
+    synth.write_mix(mix, synth.SIZES[size])
+    mix_fp = fingerprint.load_fingerprint(str(mix))
+    found = fingerprint.match_fingerprint(mix_fp, mix_fp)
+    if not found or found["offset_ms"] != 0:
+        raise RuntimeError(f"match_fingerprint/{size}: the mix does not match itself at offset 0 ({found})")
+    results[f"match_fingerprint/{size}"] = timeit(lambda: fingerprint.match_fingerprint(mix_fp, mix_fp), repeat=5)
+
+    for codec in CODECS:
+        outdir = workdir / f"out-{size}-{codec}"
+        shutil.rmtree(outdir, ignore_errors=True)
+        src, cut = str(wav), tracks
+        if codec == "copy":
+            src = str(synth.encode_aac(wav))
+            cut, _ = snap_to_packets(src, tracks)
+        results[f"cut_segments/{size}/{codec}"] = timeit(lambda: cut_segments(
+            src=src, tracks=cut, outdir=str(outdir), filename_template="{index:02d} - {title}.{ext}",
+            codec=codec, jobs=1))
+
+    outdir = workdir / f"out-{size}-flac-single"
+    shutil.rmtree(outdir, ignore_errors=True)
+    results[f"cut_segments/{size}/flac/single-pass"] = timeit(lambda: cut_segments(
+        src=str(wav), tracks=tracks, outdir=str(outdir), filename_template="{index:02d} - {title}.{ext}",
+        codec="flac", mode="single-pass"))
+
+    files = sorted(str(f) for f in (workdir / f"out-{size}-flac").glob("*.flac"))
+    meta = {"album": "Bench", "album_artist": "Synth", "year": 2000, "genre": "Noise"}
+    results[f"apply_tags/{size}/write"] = timeit(lambda: apply_tags(files, {**meta, "comment": str(time.time())}))
+    results[f"apply_tags/{size}/unchanged"] = timeit(lambda: apply_tags(files, {**meta, "comment": "fixed"}) and None)
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], *, threshold: float, min_seconds: float) -> List[str]:
+    """Names of cases slower than baseline by more than `threshold` (relative) and `min_seconds` (absolute)."""
+    slower = []
+    for name, cur in sorted(current.items()):
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {'new':<9} {name:<48} {'-':>9}  → {cur:9.4f}s (not in the baseline)")
+            continue
+        flag = cur > base * (1 + threshold) and cur - base > min_seconds
+        print(f"  {'REGRESSED' if flag else 'ok':<9} {name:<48} {base:9.4f}s → {cur:9.4f}s ({(cur / base - 1) * 100 if base else 0:+.0f}%)")
+        if flag:
+            slower.append(name)
+    return slower
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="10m", help="comma list of " + ", ".join(synth.SIZES))
+    ap.add_argument("--workdir", type=Path, default=Path(".bench"))
+    ap.add_argument("--out", type=Path, help="write results JSON here")
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--no-compare", action="store_true", help="only measure; do not require or compare a baseline")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    ap.add_argument("--min-seconds", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    ap.add_argument("--skip-audio", action="store_true", help="text parsers only (no ffmpeg needed)")
+    ap.add_argument("--startup-only", action="store_true", help="only the CLI cold-start cases and budget")
+    args = ap.parse_args(argv)
+
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    results: Dict[str, float] = {}
+    print("startup …")
+    startup = startup_cases(results)
+    for problem in startup:
+        print(f"  ! {problem}")
+    if args.startup_only:
+        for name, secs in sorted(results.items()):
+            print(f"  {name:<48} {secs:9.4f}s")
+        return 1 if startup else 0
+    print("text parsers …")
+    text_cases(results, args.workdir)
+    if not args.skip_audio:
+        for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+            print(f"audio {size} …")
+            audio_cases(results, args.workdir, size)
+
+    ffmpeg = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.split("\n")[0] \
+        if shutil.which("ffmpeg") else None
+    report = {
+        "meta": {"python": sys.version.split()[0], "platform": platform.platform(), "ffmpeg": ffmpeg,
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    for name, secs in sorted(results.items()):
+        print(f"  {name:<48} {secs:9.4f}s")
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"baseline written to {args.baseline}")
+        return 1 if startup else 0
+    if args.no_compare:
+        return 1 if startup else 0
+    if not args.baseline.exists():
+        print(f"! no baseline at {args.baseline}: nothing to compare against, so no regression can be caught.\n"
+              f"  Record one on this machine with --update-baseline (or pass --no-compare to only measure).")
+        return 2
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+    print(f"compared with {args.baseline}:")
+    slower = compare(results, baseline, threshold=args.threshold, min_seconds=args.min_seconds)
+    if slower:
+        print(f"{len(slower)} regression(s): {', '.join(slower)}")
+    if startup:
+        print(f"startup over budget: {'; '.join(startup)}")
+    return 1 if slower or startup else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+"""Deterministic synthetic inputs for the benchmarks: albums, mixes, descriptions, comments and VTT files."""
+from __future__ import annotations
+import random
+import subprocess
+import wave
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+SAMPLE_RATE = 22050
+SIZES = {"10m": 600, "1h": 3600, "3h": 10800}
+
+
+def _hms(seconds: float) -> str:
+    s = int(seconds)
+    return f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}"
+
+
+def album_layout(total_seconds: int, *, seed: int = 0) -> List[Dict]:
+    """Track spans (seconds) for an album of `total_seconds`: 2-6 min tracks, 1-4 s silences between them."""
+    rng = random.Random(seed)
+    t, tracks = 0.0, []
+    while t < total_seconds - 30:
+        length = min(rng.uniform(120, 360), total_seconds - t)
+        tracks.append({"start": t, "end": t + length, "title": f"Synthetic Track {len(tracks) + 1}"})
+        t += length + rng.uniform(1.0, 4.0)
+    return tracks
+
+
+def write_album(path: Path, total_seconds: int, *, seed: int = 0) -> List[Dict]:
+    """
+    Write a mono 16-bit WAV of tone/noise tracks separated by silence, one
+    second at a time so memory stays flat even for the 3-hour album.
+    Returns the layout used.
+    """
+    layout = album_layout(total_seconds, seed=seed)
+    if path.exists():
+        return layout
+    rng = np.random.default_rng(seed)
+    tmp = path.with_suffix(".tmp.wav")
+    with wave.open(str(tmp), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        n = np.arange(SAMPLE_RATE)
+        for sec in range(total_seconds):
+            t = sec + n / SAMPLE_RATE
+            block = np.zeros(SAMPLE_RATE, dtype=np.float32)
+            for i, tr in enumerate(layout):
+                inside = (t >= tr["start"]) & (t < tr["end"])
+                if inside.any():
+                    freq = 220.0 * (1 + i % 7)
+                    block[inside] = 0.3 * np.sin(2 * np.pi * freq * t[inside]) \
+                        + 0.05 * rng.standard_normal(int(inside.sum()))
+            w.writeframes((np.clip(block, -1, 1) * 32767).astype("<i2").tobytes())
+    tmp.replace(path)
+    return layout
+
+
+def write_mix(path: Path, total_seconds: int, *, seed: int = 0) -> None:
+    """
+    Write a mono 16-bit WAV of random three-note chords (0.2-0.6 s each) over
+    noise: unlike the steady tones of write_album, every frame pair gets its
+    own fingerprint key, so matching has something to line up.
+    """
+    if path.exists():
+        return
+    rng = np.random.default_rng(seed)
+    tmp = path.with_suffix(".tmp.wav")
+    with wave.open(str(tmp), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        done = 0
+        while done < total_seconds * SAMPLE_RATE:
+            n = min(int(rng.uniform(0.2, 0.6) * SAMPLE_RATE), total_seconds * SAMPLE_RATE - done)
+            t = np.arange(n) / SAMPLE_RATE
+            block = 0.02 * rng.standard_normal(n)
+            for semitone in rng.choice(48, size=3, replace=False):
+                block += 0.2 * np.sin(2 * np.pi * 110.0 * 2 ** (semitone / 12) * t)
+            w.writeframes((np.clip(block, -1, 1) * 32767).astype("<i2").tobytes())
+            done += n
+    tmp.replace(path)
+
+
+def encode_aac(wav: Path) -> Path:
+    """AAC copy of the album, for the stream-copy benchmark."""
+    out = wav.with_suffix(".m4a")
+    if not out.exists():
+        subprocess.run(["ffmpeg", "-y", "-nostdin", "-v", "error", "-i", str(wav), "-c:a", "aac", "-b:a", "96k", str(out)],
+                       check=True)
+    return out
+
+
+def description(lines: int, *, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    out, t = [], 0
+    for i in range(lines):
+        out.append(f"{_hms(t)} - Artist {rng.randint(1, 99)} – Song Title {i + 1}")
+        if rng.random() < 0.2:
+            out.append("Follow us on every platform! https://example.invalid")
+        t += rng.randint(60, 400)
+    return "\n".join(out)
+
+
+def comments(count: int, *, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        if rng.random() < 0.3:
+            out.append(f"{rng.randint(0, 59)}:{rng.randint(0, 59):02d} this part is amazing")
+        else:
+            out.append(f"great mix, listened {rng.randint(1, 50)} times")
+    return out
+
+
+def vtt(cues: int, *, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    out, t = ["WEBVTT", "Kind: captions", "Language: en", ""], 0.0
+    for i in range(cues):
+        start, end = t, t + rng.uniform(1.0, 4.0)
+        text = f"next up at {_hms(end + 60)} song {i}" if rng.random() < 0.05 else f"[Music] line {i}"
+        out += [f"{_hms(start)}.{int(start % 1 * 1000):03d} --> {_hms(end)}.{int(end % 1 * 1000):03d}", text, ""]
+        t = end + (rng.uniform(5, 15) if rng.random() < 0.02 else rng.uniform(0.0, 0.5))
+    return "\n".join(out)
@@ -0,0 +1,95 @@
+"""
+Cover art candidates from a video source, extracted in one ffmpeg pass.
+
+The selected frames are written as full-size JPEGs and, from the same
+decode, as small grayscale thumbnails piped back raw for scoring: sharpness
+(variance of the Laplacian), exposure and contrast. Even spacing decodes
+keyframes only (`-skip_frame nokey`); scene mode decodes every frame and
+keeps scene changes at least `duration / count` apart.
+"""
+from __future__ import annotations
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from smart_splitter.audio import proc
+from smart_splitter.profiler import traced
+
+THUMB_W, THUMB_H = 320, 180
+# frames darker than this (mean luma, 0..1) are fades/black intros, never a cover
+MIN_BRIGHTNESS = 0.08
+# flat frames (title cards, solid colour) score by contrast up to this std
+FULL_CONTRAST = 0.15
+
+_PTS_TIME = re.compile(r"pts_time:\s*([0-9.]+)")
+
+
+@traced("cover frames")
+def extract_frames(src: str, outdir: str, *, duration: float, count: int = 12,
+                   scene: Optional[float] = None, timeout: Optional[float] = None) -> Dict:
+    """
+    Write up to `count` candidate frames of `src` to `outdir/frame-NNN.jpg`.
+    Returns {"paths", "times", "thumbs"} where `thumbs` is a (n, THUMB_H,
+    THUMB_W) uint8 luma array aligned with `paths`. `duration` (seconds,
+    > 0) sets the spacing; without it every keyframe would qualify and the
+    candidates would all come from the first seconds.
+    """
+    if np is None:
+        raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found in PATH")
+    if not duration or duration <= 0:
+        raise ValueError(f"cannot space cover frames without the video's duration: {src}")
+    count = max(1, count)
+    gap = duration / count
+    if scene is None:
+        # first pick half a gap in, so the fade-in and end card are skipped
+        # keyframes rarely land exactly on the grid; allow them a little early
+        select = f"gte(t\\,{gap / 2:.3f})*(isnan(prev_selected_t)+gte(t-prev_selected_t\\,{gap * 0.9:.3f}))"
+        cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-nostats", "-y", "-skip_frame", "nokey", "-i", src]
+    else:
+        select = f"gt(scene\\,{scene:g})*(isnan(prev_selected_t)+gte(t-prev_selected_t\\,{gap:.3f}))"
+        cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-nostats", "-y", "-i", src]
+    out = Path(outdir)
+    out.mkdir(parents=True, exist_ok=True)
+    graph = (f"[0:v]select='{select}',showinfo,split=2[full][small];"
+             f"[small]scale={THUMB_W}:{THUMB_H}:flags=area,format=gray[thumb]")
+    cmd += ["-an", "-sn", "-filter_complex", graph,
+            "-map", "[full]", "-fps_mode", "vfr", "-frames:v", str(count), "-q:v", "2",
+            str(out / "frame-%03d.jpg"),
+            "-map", "[thumb]", "-fps_mode", "vfr", "-frames:v", str(count), "-f", "rawvideo", "pipe:1"]
+    result = proc.run(cmd, check=True, capture_output=True, timeout=timeout)
+
+    frame_bytes = THUMB_W * THUMB_H
+    n = len(result.stdout) // frame_bytes
+    thumbs = np.frombuffer(result.stdout, dtype=np.uint8, count=n * frame_bytes).reshape(n, THUMB_H, THUMB_W)
+    paths = sorted(out.glob("frame-*.jpg"))
+    n = min(n, len(paths))
+    times = [float(t) for t in _PTS_TIME.findall(result.stderr.decode("utf-8", "replace"))][:n]
+    times += [0.0] * (n - len(times))
+    return {"paths": paths[:n], "times": times, "thumbs": thumbs[:n]}
+
+
+def score_frames(thumbs: "np.ndarray") -> List[Dict[str, float]]:
+    """Sharpness, brightness, contrast and a combined score (higher is better) per frame."""
+    if np is None:
+        raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+    frames = thumbs.astype(np.float32) / 255.0
+    scores = []
+    for f in frames:
+        lap = (f[:-2, 1:-1] + f[2:, 1:-1] + f[1:-1, :-2] + f[1:-1, 2:]) - 4 * f[1:-1, 1:-1]
+        sharpness = float(lap.var()) * 1e4
+        brightness = float(f.mean())
+        contrast = float(f.std())
+        exposure = max(0.0, 1.0 - abs(brightness - 0.45) / 0.55)
+        score = 0.0
+        if brightness >= MIN_BRIGHTNESS:
+            score = float(np.log1p(sharpness)) * exposure * min(1.0, contrast / FULL_CONTRAST)
+        scores.append({"sharpness": sharpness, "brightness": brightness, "contrast": contrast, "score": score})
+    return scores
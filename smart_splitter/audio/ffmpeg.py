@@ -1,64 +1,304 @@
+import bisect
 import json
 import shutil
-import subprocess
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, Collection, List, Dict, Optional
 
+from smart_splitter.audio import proc
+from smart_splitter.io.cache import Cache, file_key
+from smart_splitter.profiler import traced
+from smart_splitter.tracks import Tracklist, ffmpeg_ts
 
-def probe_duration(src: str) -> float:
+# ffprobe reads headers (or packet indexes); anything slower is stuck
+PROBE_TIMEOUT = 300
+
+
+def _probe_stream(src: str, field: str, *, cache: Optional[Cache] = None) -> Optional[str]:
+    """One `stream=<field>` value of the first audio stream, cached per file version."""
+    key = file_key(src) if cache else None
+    if key:
+        hit = cache.get(f"ffprobe-{field}", key)
+        if hit is not None:
+            return hit
     if shutil.which("ffprobe") is None:
         raise RuntimeError("ffprobe not found in PATH (install FFmpeg)")
     cmd = [
         "ffprobe", "-v", "error", "-select_streams", "a:0",
-        "-show_entries", "stream=duration", "-of", "json", src
+        "-show_entries", f"stream={field}", "-of", "json", src
     ]
-    out = subprocess.check_output(cmd)
+    out = proc.check_output(cmd, timeout=PROBE_TIMEOUT)
     data = json.loads(out)
-    dur = data["streams"][0].get("duration")
+    value = data["streams"][0].get(field)
+    if key:
+        cache.set(f"ffprobe-{field}", key, value or "")
+    return value
+
+
+def probe_duration(src: str, *, cache: Optional[Cache] = None) -> float:
+    dur = _probe_stream(src, "duration", cache=cache)
     return float(dur) if dur else 0.0
 
 
-def cut_segments(*, src: str, tracks: List[Dict[str, str]], outdir: str, filename_template: str, codec: str) -> List[str]:
-    if shutil.which("ffmpeg") is None:
-        raise RuntimeError("ffmpeg not found in PATH")
-    out = []
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-    ext = "m4a" if codec == "alac" else ("mp3" if codec == "mp3" else codec)
+def probe_codec(src: str, *, cache: Optional[Cache] = None) -> str:
+    """codec_name of the first audio stream (e.g. "aac", "opus")."""
+    return _probe_stream(src, "codec_name", cache=cache) or ""
+
+
+def probe_sample_rate(src: str, *, cache: Optional[Cache] = None) -> int:
+    rate = _probe_stream(src, "sample_rate", cache=cache)
+    return int(rate) if rate else 44100
+
+
+def probe_container_duration(src: str, *, cache: Optional[Cache] = None) -> float:
+    """`format=duration`: the length of any media file, including video-only ones."""
+    key = file_key(src) if cache else None
+    if key:
+        hit = cache.get("ffprobe-format-duration", key)
+        if hit is not None:
+            return hit
+    if shutil.which("ffprobe") is None:
+        raise RuntimeError("ffprobe not found in PATH (install FFmpeg)")
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", src]
+    value = json.loads(proc.check_output(cmd, timeout=PROBE_TIMEOUT)).get("format", {}).get("duration")
+    duration = float(value) if value not in (None, "N/A") else 0.0
+    if key:
+        cache.set("ffprobe-format-duration", key, duration)
+    return duration
+
+
+def probe_packet_times(src: str) -> List[float]:
+    """Start time (seconds) of every packet of the first audio stream, in order."""
+    if shutil.which("ffprobe") is None:
+        raise RuntimeError("ffprobe not found in PATH (install FFmpeg)")
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "packet=pts_time", "-of", "csv=p=0", src
+    ]
+    out = proc.check_output(cmd, text=True, timeout=PROBE_TIMEOUT)
+    times = []
+    for line in out.splitlines():
+        value = line.strip().rstrip(",")
+        if value and value != "N/A":
+            times.append(float(value))
+    times.sort()
+    return times
+
+
+SPLIT_MODES = ("per-track", "single-pass")
+# per-track encodes seek on the input to this far before the track and decode the rest
+SEEK_PREROLL_MS = 1000
+
+# container used when stream-copying a given source codec (codec: copy)
+COPY_CONTAINERS = {"aac": "m4a", "alac": "m4a", "mp3": "mp3", "flac": "flac", "opus": "opus", "vorbis": "ogg"}
+
+
+def copy_extension(src: str, *, cache: Optional[Cache] = None) -> str:
+    source_codec = probe_codec(src, cache=cache)
+    if source_codec not in COPY_CONTAINERS:
+        raise ValueError(f"codec: copy does not support {source_codec or 'unknown'} audio; pick an encoder instead")
+    return COPY_CONTAINERS[source_codec]
+
+
+def snap_to_packets(src: str, tracks: Tracklist) -> tuple:
+    """
+    Move every start/end to the nearest packet boundary of `src`, so a stream
+    copy cuts exactly there. Returns (snapped tracks, [(start_err, end_err)])
+    with errors in seconds (snapped minus requested; end_err is None when
+    the track runs to the end of the file).
+
+    A snapped time is the first whole millisecond after the packet start:
+    rounding to the nearest ms could land on the previous packet, and every
+    audio packet is longer than 1 ms, so this stays inside the right one.
+    """
+    packets = probe_packet_times(src)
+    snapped, errors = Tracklist(), []
+    for t in tracks:
+        start_ms = _packet_ms(_nearest(packets, t.start))
+        end_ms = end_err = None
+        if t.end_ms is not None:
+            end_ms = _packet_ms(_nearest(packets, t.end))
+            end_err = (end_ms - t.end_ms) / 1000
+        snapped.append(t.replace(start_ms=start_ms, end_ms=end_ms))
+        errors.append(((start_ms - t.start_ms) / 1000, end_err))
+    return snapped, errors
 
+
+def _packet_ms(seconds: float) -> int:
+    return int(seconds * 1000) + 1 if seconds > 0 else 0
+
+
+def _nearest(sorted_times: List[float], t: float) -> float:
+    if not sorted_times:
+        return t
+    i = bisect.bisect_left(sorted_times, t)
+    if i == 0:
+        return sorted_times[0]
+    if i == len(sorted_times):
+        return sorted_times[-1]
+    before, after = sorted_times[i - 1], sorted_times[i]
+    return before if t - before <= after - t else after
+
+
+def output_paths(*, tracks: Tracklist, outdir: str, filename_template: str, codec: str,
+                 ext: Optional[str] = None) -> List[str]:
+    """
+    Destination file for every track, in track order (what cut_segments
+    writes). For codec "copy" pass `ext` (see copy_extension).
+    """
+    ext = ext or ("m4a" if codec == "alac" else ("mp3" if codec == "mp3" else codec))
+    out = []
     for idx, t in enumerate(tracks, start=1):
-        start = t["start"]
-        end = t.get("end")
-        title = t.get("title", f"Track {idx}")
+        title = t.title or f"Track {idx}"
         filename = filename_template.format(index=idx, title=_sanitize(title), ext=ext)
         dest = str(Path(outdir) / filename)
-
-        args = ["ffmpeg", "-y", "-i", src, "-ss", start]
-        if end:
-            args += ["-to", end]
-        if codec == "flac":
-            args += ["-c:a", "flac"]
-        elif codec == "mp3":
-            args += ["-c:a", "libmp3lame", "-b:a", "320k"]
-        elif codec == "alac":
-            # Apple Lossless in an .m4a container
-            args += ["-c:a", "alac"]
-        else:  # wav
-            args += ["-c:a", "pcm_s16le"]
-
-        # Ensure proper extension and append destination
+        # Ensure proper extension
         if codec == "alac" and Path(dest).suffix.lower() != ".m4a":
             dest = str(Path(dest).with_suffix(".m4a"))
+        out.append(dest)
+    return out
 
-        # Quality-of-life for Apple players; safe no-op elsewhere
-        if codec == "alac":
-            args += ["-movflags", "+faststart"]
 
-        # Append destination file path (REQUIRED)
-        args += [dest]
+@traced()
+def cut_segments(*, src: str, tracks: Tracklist, outdir: str, filename_template: str, codec: str,
+                 jobs: int = 1, mode: str = "per-track", only: Optional[Collection[int]] = None,
+                 on_done: Optional[Callable[[int, str], None]] = None, ext: Optional[str] = None,
+                 filters: Optional[Dict[int, str]] = None, timeout: Optional[float] = None) -> List[str]:
+    """
+    Cut `tracks` out of `src`.
 
-        subprocess.run(args, check=True)
-        out.append(dest)
-    return out
+    mode="per-track" spawns one ffmpeg per track (up to `jobs` at a time).
+    mode="single-pass" decodes the source once and writes every track from
+    that single ffmpeg process, one output per track. Per-track commands
+    seek on the input to SEEK_PREROLL_MS before the track and trim the rest
+    on the output, so each decodes its track plus that pre-roll rather than
+    the whole source up to it; single-pass trims each output instead. Both
+    cut at the same samples.
+
+    `only` restricts encoding to those 1-based track indices (numbering and
+    file names still follow the full list). `on_done(index, dest)` is called
+    as soon as each file is complete. The full list of destinations is
+    returned either way.
+
+    codec="copy" stream-copies the source audio into its own container (no
+    re-encode). Per-track copies seek on the input, so only the needed
+    packets are read; use snap_to_packets first for frame-exact edges.
+
+    `filters` maps a track index to an -af filter chain (e.g. loudness gain)
+    applied inside that track's encode. `timeout` bounds each ffmpeg run
+    (seconds); an overrun stops it and raises subprocess.TimeoutExpired.
+    """
+    fmt = {"codec": codec, "outdir": outdir, "filename_template": filename_template, "ext": ext, "only": only}
+    done = (lambda _, idx, dest: on_done(idx, dest)) if on_done else None
+    return cut_formats(src=src, tracks=tracks, formats=[fmt], jobs=jobs, mode=mode, on_done=done,
+                       filters=filters, timeout=timeout)[0]
+
+
+@traced()
+def cut_formats(*, src: str, tracks: Tracklist, formats: List[Dict], jobs: int = 1,
+                mode: str = "per-track", on_done: Optional[Callable[[int, int, str], None]] = None,
+                filters: Optional[Dict[int, str]] = None, timeout: Optional[float] = None) -> List[List[str]]:
+    """
+    Like cut_segments, for several output formats from the same decode: each
+    ffmpeg command reads its segment once and writes one output per format
+    (per-track), or every track in every format (single-pass).
+
+    Each entry of `formats` has "codec", "outdir", "filename_template" and
+    optionally "ext" and "only" (track indices to write in that format).
+    `on_done(format_index, index, dest)` fires per finished file. Returns
+    the destinations per format, in the order of `formats`.
+    """
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found in PATH")
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"unknown split mode: {mode} (expected one of {', '.join(SPLIT_MODES)})")
+    jobs = max(1, int(jobs or 1))
+    copy = any(f["codec"] == "copy" for f in formats)
+    if copy and len(formats) > 1:
+        raise ValueError("codec: copy does not decode; cut it separately from the encoded formats")
+    if copy and filters:
+        raise ValueError("audio filters (e.g. normalize) need re-encoding and cannot be used with codec: copy")
+
+    dests = []
+    for f in formats:
+        Path(f["outdir"]).mkdir(parents=True, exist_ok=True)
+        ext = f.get("ext") or (copy_extension(src) if f["codec"] == "copy" else None)
+        dests.append(output_paths(tracks=tracks, outdir=str(f["outdir"]), filename_template=f["filename_template"],
+                                  codec=f["codec"], ext=ext))
+
+    segments = []  # (seek, [(format index, index, dest, output args)])
+    for idx, t in enumerate(tracks, start=1):
+        start = ffmpeg_ts(t.start_ms)
+        end = ffmpeg_ts(t.end_ms) if t.end_ms is not None else None
+        seek = []
+        outputs = []
+        for fi, f in enumerate(formats):
+            if f.get("only") is not None and idx not in f["only"]:
+                continue
+            dest = dests[fi][idx - 1]
+            if mode == "per-track":
+                # seek on the input to just before the track, so only the segment is decoded
+                # rather than everything up to it; the pre-roll warms the decoder (AAC/MP3/Opus
+                # frames depend on the previous ones) and is trimmed off on the output side
+                pre_ms = min(t.start_ms, SEEK_PREROLL_MS)
+                seek = ["-ss", ffmpeg_ts(t.start_ms - pre_ms)] if t.start_ms > pre_ms else []
+                args = ["-ss", ffmpeg_ts(pre_ms)] if pre_ms else []
+                if end:
+                    args += ["-t", ffmpeg_ts(t.end_ms - t.start_ms)]
+            else:
+                # one decode for every output; each trims its own span
+                args = ["-ss", start] + (["-to", end] if end else [])
+            if filters and filters.get(idx):
+                args += ["-af", filters[idx]]
+            if f["codec"] == "copy":
+                if mode == "per-track":
+                    seek = ["-ss", start]
+                    # snapped times sit up to 1 ms past their packet start: stop just over 1 ms
+                    # short so the packet that starts the next track is not included
+                    args = ["-t", f"{(t.end_ms - t.start_ms) / 1000 - 0.001001:.6f}"] if end else []
+                args += ["-map", "0:a:0", "-c:a", "copy"]
+                if Path(dest).suffix == ".m4a":
+                    args += ["-movflags", "+faststart"]
+            else:
+                args += _codec_args(f["codec"])
+            outputs.append((fi, idx, dest, args + [dest]))
+        if outputs:
+            segments.append((seek, outputs))
+
+    if not segments:
+        return dests
+    if mode == "single-pass":
+        # one demux/decode feeding every output; each output trims its own span
+        outputs = [o for _, outs in segments for o in outs]
+        commands = [["ffmpeg", "-y", "-nostdin", "-i", src] + [a for *_, args in outputs for a in args]]
+        finished = [[(fi, idx, dest) for fi, idx, dest, _ in outputs]]
+    else:
+        # interleaved progress from several encoders is unreadable
+        quiet = ["-v", "error"] if jobs > 1 else []
+        commands = [["ffmpeg", "-y", "-nostdin"] + quiet + seek + ["-i", src] + [a for *_, args in outs for a in args]
+                    for seek, outs in segments]
+        finished = [[(fi, idx, dest) for fi, idx, dest, _ in outs] for _, outs in segments]
+
+    def _done(i: int) -> None:
+        if on_done:
+            for fi, idx, dest in finished[i]:
+                on_done(fi, idx, dest)
+
+    # the first failure cancels queued commands and stops the encoders in flight
+    proc.run_many(commands, jobs=jobs, timeout=timeout, on_done=_done)
+    return dests
+
+
+def _codec_args(codec: str) -> List[str]:
+    """Encoder options (after any -ss/-to/-af) for one output of `codec`."""
+    if codec == "flac":
+        return ["-c:a", "flac"]
+    if codec == "mp3":
+        return ["-c:a", "libmp3lame", "-b:a", "320k"]
+    if codec == "alac":
+        # Apple Lossless in an .m4a container; faststart is a quality-of-life
+        # tweak for Apple players and a safe no-op elsewhere
+        return ["-c:a", "alac", "-movflags", "+faststart"]
+    return ["-c:a", "pcm_s16le"]  # wav
 
 
 def _sanitize(name: str) -> str:
@@ -68,5 +308,5 @@ def _sanitize(name: str) -> str:
 def grab_snapshot(src: str, *, at: str, out: str):
     if shutil.which("ffmpeg") is None:
         raise RuntimeError("ffmpeg not found in PATH")
-    cmd = ["ffmpeg", "-y", "-ss", at, "-i", src, "-frames:v", "1", out]
-    subprocess.run(cmd, check=True)
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-ss", at, "-i", src, "-frames:v", "1", "-update", "1", out]
+    proc.run(cmd, check=True)
@@ -0,0 +1,316 @@
+"""
+Spectral fingerprint of the source, stored beside it as `<source>.fprint`,
+for albums no text source covers and silence detection cannot split
+(gapless albums, DJ mixes, live sets).
+
+One decode at FP_RATE, cut into FRAME-sample frames (256 ms, no overlap).
+Each frame keeps DIMS float16 features: 12 chroma bins, BANDS log band
+energies, onset strength (positive spectral flux) and loudness. Two uses:
+
+- boundaries: novelty peaks along the diagonal of the self-similarity
+  matrix (a checkerboard kernel), computed block by block so memory is set
+  by the block and kernel size, not by the length of the audio
+- matching: every pair of consecutive frames gets a 32-bit key (chroma and
+  band-shape bits), stored sorted with its frame number. A re-upload of a
+  known album is found by looking its keys up in another project's index
+  and voting for one time offset.
+
+Layout (little-endian): a fixed header, features (frames, DIMS) float16,
+keys (n,) uint32 sorted, positions (n,) uint32. A 3-hour source needs
+about 2.5 MB.
+"""
+from __future__ import annotations
+import os
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from smart_splitter.audio.pcm import iter_pcm
+from smart_splitter.profiler import traced
+from smart_splitter.tracks import Track, Tracklist
+
+FP_RATE = 16000
+FRAME = 4096            # samples per frame and FFT size (256 ms)
+CHROMA_LOW, CHROMA_HIGH = 110.0, 5000.0
+BANDS = 10
+BAND_LOW, BAND_HIGH = 60.0, 7600.0
+ONSET = 12 + BANDS      # feature columns: chroma, bands, onset, loudness
+LOUDNESS = ONSET + 1
+DIMS = LOUDNESS + 1
+_FLOOR_DB = -120.0
+
+# novelty: ~1 s rows (ROW_FRAMES frames averaged), a kernel looking KERNEL_SEC
+# back and ahead, and BLOCK_ROWS rows of the similarity matrix at a time
+ROW_FRAMES = 4
+KERNEL_SEC = 24.0
+BLOCK_ROWS = 1024
+MIN_GAP_SEC = 30.0
+# a cut is a novelty peak this many standard deviations above the median
+THRESHOLD = 2.5
+
+# matching: frames quieter than this get no key; keys found more than
+# MAX_FANOUT times in the other index say nothing about the offset
+QUIET_DB = -50.0
+MAX_FANOUT = 32
+MIN_VOTES = 25
+# share of the shorter index's keys that must agree on one offset
+MIN_MATCH = 0.1
+
+_MAGIC = b"SSFP"
+_VERSION = 1
+# magic, version, dims, sample_rate, frame, frames, keys, source size, source mtime_ns
+_HEADER = struct.Struct("<4sHHIIIIQq")
+
+
+def fingerprint_path(src: str) -> Path:
+    return Path(src).with_name(Path(src).name + ".fprint")
+
+
+def _spectral_maps() -> Tuple["np.ndarray", "np.ndarray"]:
+    """(bins, 12) pitch-class and (bins, BANDS) band membership of the rfft bins."""
+    freqs = np.fft.rfftfreq(FRAME, 1.0 / FP_RATE)
+    chroma = np.zeros((freqs.size, 12), dtype=np.float32)
+    tonal = np.flatnonzero((freqs >= CHROMA_LOW) & (freqs <= CHROMA_HIGH))
+    # pitch class with C = 0 (A4 = 440 Hz is class 9)
+    classes = (np.round(12 * np.log2(freqs[tonal] / 440.0)).astype(int) + 9) % 12
+    chroma[tonal, classes] = 1.0
+    bands = np.zeros((freqs.size, BANDS), dtype=np.float32)
+    edges = np.geomspace(BAND_LOW, BAND_HIGH, BANDS + 1)
+    which = np.searchsorted(edges, freqs, side="right") - 1
+    inside = (which >= 0) & (which < BANDS)
+    bands[np.flatnonzero(inside), which[inside]] = 1.0
+    return chroma, bands
+
+
+def _frame_features(frames: "np.ndarray", window: "np.ndarray", maps, prev_bands) -> Tuple["np.ndarray", "np.ndarray"]:
+    chroma_map, band_map = maps
+    spec = np.square(np.abs(np.fft.rfft(frames * window, axis=1))).astype(np.float32)
+    chroma = spec @ chroma_map
+    chroma /= chroma.sum(axis=1, keepdims=True) + 1e-12
+    with np.errstate(divide="ignore"):
+        bands = np.maximum(10.0 * np.log10(spec @ band_map), _FLOOR_DB)
+        loud = np.maximum(10.0 * np.log10(np.mean(np.square(frames), axis=1)), _FLOOR_DB)
+    prev = bands[:1] if prev_bands is None else prev_bands
+    onset = np.maximum(0.0, np.diff(np.concatenate((prev, bands)), axis=0)).mean(axis=1)
+    return np.column_stack((chroma, bands, onset, loud)).astype(np.float16), bands[-1:]
+
+
+def _keys(features: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Sorted (keys, positions): chroma-above-mean and band-slope bits of frames i and i+1."""
+    f = features.astype(np.float32)
+    if len(f) < 2:
+        return np.zeros(0, "<u4"), np.zeros(0, "<u4")
+    chroma, bands = f[:, :12], f[:, 12:ONSET]
+    codes = (chroma > chroma.mean(axis=1, keepdims=True)).astype(np.uint32) @ (1 << np.arange(12, dtype=np.uint32))
+    codes |= (bands[:, 0:8:2] > bands[:, 1:9:2]).astype(np.uint32) @ (1 << np.arange(12, 16, dtype=np.uint32))
+    loud = f[:, LOUDNESS] > QUIET_DB
+    pair = loud[:-1] & loud[1:]
+    keys = ((codes[:-1] << 16) | codes[1:])[pair]
+    positions = np.flatnonzero(pair)
+    order = np.argsort(keys, kind="stable")
+    return keys[order].astype("<u4"), positions[order].astype("<u4")
+
+
+@traced("build fingerprint")
+def build_fingerprint(src: str, out: Optional[str] = None, *, stop: Optional[threading.Event] = None) -> Path:
+    """
+    Decode `src` once and write its fingerprint index to `out` (default:
+    beside the source). Frames are analysed chunk by chunk; only the
+    features (about 50 bytes per 256 ms) are kept. `stop` cancels the
+    decode (see iter_pcm); nothing is written then.
+    """
+    if np is None:
+        raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+    st = Path(src).stat()
+    window = np.hanning(FRAME).astype(np.float32)
+    maps = _spectral_maps()
+    feats, prev = [], None
+    carry = np.zeros(0, dtype=np.float32)
+    for pcm in iter_pcm(src, sample_rate=FP_RATE, chunk_samples=FRAME * 64, stop=stop):
+        if carry.size:
+            pcm = np.concatenate((carry, pcm))
+        whole = pcm.size - pcm.size % FRAME
+        if whole:
+            f, prev = _frame_features(pcm[:whole].reshape(-1, FRAME), window, maps, prev)
+            feats.append(f)
+        carry = pcm[whole:]
+    if carry.size:
+        last = np.concatenate((carry, np.zeros(FRAME - carry.size, np.float32)))
+        feats.append(_frame_features(last[None], window, maps, prev)[0])
+    features = np.concatenate(feats) if feats else np.zeros((0, DIMS), np.float16)
+    keys, positions = _keys(features)
+
+    dest = Path(out) if out else fingerprint_path(src)
+    # a unique temp file per writer: threads of one process may index the same source at once
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=dest.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, DIMS, FP_RATE, FRAME, len(features), keys.size,
+                                 st.st_size, st.st_mtime_ns))
+            features.astype("<f2").tofile(f)
+            keys.tofile(f)
+            positions.tofile(f)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return dest
+
+
+class Fingerprint:
+    """Memory-mapped reader for a `.fprint` file."""
+
+    def __init__(self, path: str):
+        if np is None:
+            raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+        self.path = Path(path)
+        raw = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if raw.size < _HEADER.size:
+            raise ValueError(f"truncated fingerprint file: {path}")
+        (magic, version, dims, self.sample_rate, self.frame, self.frames, n_keys,
+         self.source_size, self.source_mtime_ns) = _HEADER.unpack(bytes(raw[:_HEADER.size]))
+        if magic != _MAGIC or version != _VERSION or dims != DIMS:
+            raise ValueError(f"not a fingerprint file (or unsupported version): {path}")
+        if raw.size != _HEADER.size + self.frames * DIMS * 2 + n_keys * 8:
+            raise ValueError(f"truncated fingerprint file: {path}")
+        offset = _HEADER.size
+        self.features = np.ndarray((self.frames, DIMS), dtype="<f2", buffer=raw, offset=offset)
+        offset += self.frames * DIMS * 2
+        self.keys = np.ndarray((n_keys,), dtype="<u4", buffer=raw, offset=offset)
+        self.positions = np.ndarray((n_keys,), dtype="<u4", buffer=raw, offset=offset + n_keys * 4)
+
+    @property
+    def frame_sec(self) -> float:
+        return self.frame / self.sample_rate
+
+    @property
+    def duration(self) -> float:
+        return self.frames * self.frame_sec
+
+
+def load_fingerprint(src: str, *, build: bool = True, stop: Optional[threading.Event] = None) -> Optional[Fingerprint]:
+    """
+    The fingerprint index for `src`, or None when it has not been built and
+    `build` is False. An index left from an older version of the source is
+    rebuilt.
+    """
+    path = fingerprint_path(src)
+    st = Path(src).stat()
+    if path.exists():
+        try:
+            fp = Fingerprint(str(path))
+            if (fp.source_size, fp.source_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                return fp
+        except (ValueError, OSError, struct.error):
+            pass
+    if not build:
+        return None
+    return Fingerprint(str(build_fingerprint(src, stop=stop)))
+
+
+def _rows(fp: Fingerprint) -> "np.ndarray":
+    """Features standardised per column, averaged into ROW_FRAMES rows and scaled to unit length."""
+    f = np.asarray(fp.features, dtype=np.float32)
+    f = (f - f.mean(axis=0)) / (f.std(axis=0) + 1e-6)
+    pad = (-len(f)) % ROW_FRAMES
+    if pad:
+        f = np.concatenate((f, np.repeat(f[-1:], pad, axis=0)))
+    rows = f.reshape(-1, ROW_FRAMES, DIMS).mean(axis=1)
+    return rows / (np.linalg.norm(rows, axis=1, keepdims=True) + 1e-6)
+
+
+def _checkerboard(half: int) -> "np.ndarray":
+    """(2*half)^2 kernel: + within past and within future, - across, with a Gaussian taper."""
+    x = (np.arange(2 * half) - half + 0.5) / half
+    taper = np.exp(-2.0 * x * x) * np.sign(x)
+    kernel = np.outer(taper, taper).astype(np.float32)
+    return kernel / np.abs(kernel).sum()
+
+
+def novelty_curve(fp: Fingerprint, *, kernel_sec: float = KERNEL_SEC,
+                  block_rows: int = BLOCK_ROWS) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    (times, novelty) per ~1 s row: how much the audio before each row
+    differs from the audio after it while each side stays self-similar.
+    Only the band of the self-similarity matrix the kernel reaches is
+    computed, `block_rows` rows at a time. Rows within the kernel's reach
+    of either end score 0.
+    """
+    rows = _rows(fp)
+    row_sec = fp.frame_sec * ROW_FRAMES
+    half = max(2, int(round(kernel_sec / row_sec)))
+    kernel = _checkerboard(half)
+    out = np.zeros(len(rows), dtype=np.float32)
+    for i0 in range(half, len(rows) - half, block_rows):
+        i1 = min(i0 + block_rows, len(rows) - half)
+        band = rows[i0 - half:i1 + half]
+        sim = band @ band.T
+        windows = np.lib.stride_tricks.sliding_window_view(sim, (2 * half, 2 * half))
+        k = np.arange(i1 - i0)
+        out[i0:i1] = np.einsum("nij,ij->n", windows[k, k], kernel)
+    return np.arange(len(rows)) * row_sec, out
+
+
+def suggest_cuts_from_novelty(fp: Fingerprint, *, min_gap: float = MIN_GAP_SEC, threshold: float = THRESHOLD,
+                              kernel_sec: float = KERNEL_SEC) -> Tracklist:
+    """
+    Candidate starts at the strongest novelty peaks, at least `min_gap`
+    seconds apart, plus one at 0. Like the silence suggestions these are
+    untitled hints for resolve_tracklist to score.
+    """
+    times, nov = novelty_curve(fp, kernel_sec=kernel_sec)
+    candidates = Tracklist([Track(0, title="Candidate")])
+    if not nov.any():
+        return candidates
+    floor = float(np.median(nov) + threshold * nov.std())
+    kept = []
+    for i in np.argsort(nov)[::-1]:
+        if nov[i] <= floor:
+            break
+        if all(abs(times[i] - times[j]) >= min_gap for j in kept) and times[i] >= min_gap:
+            kept.append(i)
+    for i in sorted(kept):
+        candidates.append(Track(int(round(times[i] * 1000)), title="Candidate"))
+    return candidates
+
+
+def match_fingerprint(query: Fingerprint, ref: Fingerprint, *, min_votes: int = MIN_VOTES,
+                      min_match: float = MIN_MATCH) -> Optional[Dict]:
+    """
+    Whether `query` contains the same recording as `ref`, and where:
+    {"offset_ms", "votes", "ratio"} with ref time = query time + offset_ms,
+    or None. Every query key is looked up in ref's sorted keys and each hit
+    votes for the frame offset between the two; the best offset (with its
+    neighbours, as frames rarely line up exactly) must collect `min_votes`
+    and `min_match` of the shorter index's keys.
+    """
+    if not query.keys.size or not ref.keys.size:
+        return None
+    qk, qp = np.asarray(query.keys), np.asarray(query.positions, dtype=np.int64)
+    rk, rp = np.asarray(ref.keys), np.asarray(ref.positions, dtype=np.int64)
+    lo = np.searchsorted(rk, qk, side="left")
+    n = np.searchsorted(rk, qk, side="right") - lo
+    use = (n > 0) & (n <= MAX_FANOUT)
+    lo, n, qp = lo[use], n[use], qp[use]
+    hits = int(n.sum())
+    if not hits:
+        return None
+    # expand each query key into all of its hits in ref
+    idx = np.repeat(lo, n) + np.arange(hits) - np.repeat(np.cumsum(n) - n, n)
+    offsets = rp[idx] - np.repeat(qp, n) + query.frames
+    counts = np.bincount(offsets, minlength=query.frames + ref.frames + 1)
+    votes = np.convolve(counts, np.ones(3, dtype=counts.dtype), mode="same")
+    best = int(np.argmax(votes))
+    ratio = float(votes[best]) / min(query.keys.size, ref.keys.size)
+    if votes[best] < min_votes or ratio < min_match:
+        return None
+    near = np.arange(max(0, best - 1), min(len(counts), best + 2))
+    frames = float((counts[near] * near).sum() / counts[near].sum()) - query.frames
+    return {"offset_ms": int(round(frames * query.frame_sec * 1000)), "votes": int(votes[best]), "ratio": ratio}
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from smart_splitter.audio import proc
+from smart_splitter.io.cache import Cache, file_key
+from smart_splitter.profiler import traced
+from smart_splitter.tracks import Tracklist, ffmpeg_ts
+
+# EBU R128-style streaming targets (integrated LUFS, true peak dBTP, loudness range LU)
+DEFAULT_TARGET = {"I": -16.0, "TP": -1.5, "LRA": 11.0}
+
+
+def measure_loudness(src: str, *, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                     target: Optional[Dict] = None, cache: Optional[Cache] = None) -> Dict[str, float]:
+    """
+    First loudnorm pass over `src` (or just start..end, input-seeked) and
+    return its measurements: input_i, input_tp, input_lra, input_thresh,
+    target_offset. Results are cached per file version, span and target.
+    """
+    target = {**DEFAULT_TARGET, **(target or {})}
+    key = None
+    if cache:
+        fk = file_key(src)
+        key = fk and json.dumps([fk, start_ms, end_ms, target], sort_keys=True)
+        hit = cache.get("loudness", key) if key else None
+        if hit is not None:
+            return hit
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found in PATH")
+
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner"]
+    if start_ms:
+        cmd += ["-ss", ffmpeg_ts(start_ms)]
+    if end_ms is not None:
+        cmd += ["-to", ffmpeg_ts(end_ms)]
+    cmd += [
+        "-i", src, "-vn",
+        "-af", f"loudnorm=I={target['I']}:TP={target['TP']}:LRA={target['LRA']}:print_format=json",
+        "-f", "null", "-",
+    ]
+    p = proc.run(cmd, check=True, capture_output=True, text=True)
+    err = p.stderr or ""
+    # loudnorm prints its JSON block last on stderr
+    blob = err[err.rfind("{"):err.rfind("}") + 1]
+    try:
+        raw = json.loads(blob)
+    except ValueError:
+        raise RuntimeError(f"could not read loudnorm measurement for {src}") from None
+    measured = {k: float(raw[k]) for k in ("input_i", "input_tp", "input_lra", "input_thresh", "target_offset")}
+    if key:
+        cache.set("loudness", key, measured)
+    return measured
+
+
+@traced()
+def measure_tracks(src: str, tracks: Tracklist, *, indices: List[int], jobs: int = 1,
+                   target: Optional[Dict] = None, cache: Optional[Cache] = None) -> Dict[int, Dict[str, float]]:
+    """Measure the tracks at the given 1-based `indices` concurrently, each from its own span of `src`."""
+    def _one(i: int) -> Dict[str, float]:
+        t = tracks[i - 1]
+        return measure_loudness(src, start_ms=t.start_ms, end_ms=t.end_ms, target=target, cache=cache)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return dict(zip(indices, pool.map(_one, indices)))
+
+
+def loudnorm_filter(measured: Dict[str, float], *, sample_rate: int, target: Optional[Dict] = None) -> str:
+    """Second loudnorm pass (linear gain from the first-pass numbers), resampled back from loudnorm's 192 kHz."""
+    target = {**DEFAULT_TARGET, **(target or {})}
+    return (
+        f"loudnorm=I={target['I']}:TP={target['TP']}:LRA={target['LRA']}"
+        f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+        f":offset={measured['target_offset']}:linear=true,aresample={sample_rate}"
+    )
+
+
+def album_gain_filter(measured: Dict[str, float], *, target: Optional[Dict] = None) -> str:
+    """One static gain for the whole album: reach the integrated target without pushing the true peak over TP."""
+    target = {**DEFAULT_TARGET, **(target or {})}
+    gain = min(target["I"] - measured["input_i"], target["TP"] - measured["input_tp"])
+    return f"volume={gain:.2f}dB"
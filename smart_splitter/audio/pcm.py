@@ -0,0 +1,64 @@
+from __future__ import annotations
+import shutil
+import subprocess
+import threading
+from concurrent.futures import CancelledError
+from typing import Iterator, Optional
+
+from smart_splitter.audio import proc
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+def iter_pcm(src: str, *, sample_rate: int = 16000, chunk_samples: int = 1 << 16,
+             start: Optional[float] = None, duration: Optional[float] = None,
+             stop: Optional[threading.Event] = None) -> Iterator["np.ndarray"]:
+    """
+    Decode `src` once to mono float32 PCM and yield it in chunks of
+    `chunk_samples` (the last chunk may be shorter). Only one chunk is held
+    in memory at a time, whatever the length of the source. Setting `stop`
+    ends the decode at the next chunk with CancelledError.
+    """
+    if np is None:
+        raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found in PATH")
+    cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+    if start is not None:
+        cmd += ["-ss", f"{max(0.0, start):.3f}"]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-i", src, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "pipe:1"]
+
+    child = proc.spawn(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+    buf = bytearray(chunk_samples * 4)
+    view = memoryview(buf)
+    eof = False
+    try:
+        while True:
+            if stop is not None and stop.is_set():
+                raise CancelledError(f"decode of {src} stopped")
+            filled = 0
+            while filled < len(buf):
+                n = child.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            usable = filled - filled % 4
+            if usable:
+                # copy out of the reusable buffer before handing it to the caller
+                yield np.frombuffer(buf, dtype=np.float32, count=usable // 4).copy()
+            if filled < len(buf):
+                eof = True
+                break
+    finally:
+        child.stdout.close()
+        if not eof:
+            # caller stopped early: don't let ffmpeg decode the rest
+            child.terminate()
+        rc = proc.reap(child)
+    if rc > 0:
+        raise subprocess.CalledProcessError(rc, cmd)
@@ -0,0 +1,196 @@
+"""
+Waveform peak pyramid: per-block min / max / RMS of the source at several
+zoom levels, stored beside the audio as `<source>.peaks`.
+
+Layout (little-endian): a fixed header, then one int16 array of shape
+(blocks, 3) per level, finest first. Level 0 blocks are BASE_BLOCK samples
+at PEAKS_RATE (5 ms); every level above merges FACTOR blocks of the one
+below (20 ms, 80 ms, ... ). A 3-hour source needs ~17 MB, and any window
+at any level is a slice of a memory-mapped array.
+"""
+from __future__ import annotations
+import os
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from smart_splitter.audio.pcm import iter_pcm
+from smart_splitter.profiler import traced
+
+PEAKS_RATE = 16000
+BASE_BLOCK = 80        # samples per level-0 block (5 ms)
+FACTOR = 4
+MAX_LEVELS = 8
+FULL_SCALE = 32767
+
+_MAGIC = b"SSPK"
+_VERSION = 1
+# magic, version, levels, sample_rate, base_block, factor, samples, source size, source mtime_ns
+_HEADER = struct.Struct("<4sHHIIIQQq")
+
+
+def peaks_path(src: str) -> Path:
+    return Path(src).with_name(Path(src).name + ".peaks")
+
+
+def _level_sizes(samples: int, levels: int) -> List[int]:
+    sizes = [-(-samples // BASE_BLOCK)]
+    for _ in range(1, levels):
+        sizes.append(-(-sizes[-1] // FACTOR))
+    return sizes
+
+
+def _merge(mins, maxs, ms) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    pad = (-mins.size) % FACTOR
+    if pad:
+        mins = np.concatenate((mins, np.full(pad, mins[-1], mins.dtype)))
+        maxs = np.concatenate((maxs, np.full(pad, maxs[-1], maxs.dtype)))
+        ms = np.concatenate((ms, np.full(pad, ms[-1], ms.dtype)))
+    return (mins.reshape(-1, FACTOR).min(axis=1), maxs.reshape(-1, FACTOR).max(axis=1),
+            ms.reshape(-1, FACTOR).mean(axis=1))
+
+
+def _quantize(values: "np.ndarray") -> "np.ndarray":
+    return np.clip(np.round(values * FULL_SCALE), -FULL_SCALE, FULL_SCALE).astype("<i2")
+
+
+@traced("build peaks")
+def build_peaks(src: str, out: Optional[str] = None, *, stop: Optional[threading.Event] = None) -> Path:
+    """
+    Decode `src` once and write its peak pyramid to `out` (default: beside
+    the source). Level 0 is accumulated chunk by chunk; the coarser levels
+    are merged from it, so memory stays at a few bytes per 5 ms of audio.
+    `stop` cancels the decode (see iter_pcm); nothing is written then.
+    """
+    if np is None:
+        raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+    st = Path(src).stat()
+    mins, maxs, ms = [], [], []
+    carry = np.zeros(0, dtype=np.float32)
+    samples = 0
+    for pcm in iter_pcm(src, sample_rate=PEAKS_RATE, chunk_samples=BASE_BLOCK * 4096, stop=stop):
+        samples += pcm.size
+        if carry.size:
+            pcm = np.concatenate((carry, pcm))
+        whole = pcm.size - pcm.size % BASE_BLOCK
+        if whole:
+            blocks = pcm[:whole].reshape(-1, BASE_BLOCK)
+            mins.append(blocks.min(axis=1))
+            maxs.append(blocks.max(axis=1))
+            ms.append(np.mean(np.square(blocks), axis=1))
+        carry = pcm[whole:]
+    if carry.size:
+        mins.append(carry.min()[None])
+        maxs.append(carry.max()[None])
+        ms.append(np.mean(np.square(carry))[None])
+    level = tuple(np.concatenate(a) if a else np.zeros(0, np.float32) for a in (mins, maxs, ms))
+
+    # stop once a level is a single block
+    levels = 0
+    for n in _level_sizes(samples, MAX_LEVELS) if samples else []:
+        levels += 1
+        if n <= 1:
+            break
+    dest = Path(out) if out else peaks_path(src)
+    # a unique temp file per writer: threads of one process may build the same source at once
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=dest.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, levels, PEAKS_RATE, BASE_BLOCK, FACTOR,
+                                 samples, st.st_size, st.st_mtime_ns))
+            for i in range(levels):
+                if i:
+                    level = _merge(*level)
+                lo, hi, power = level
+                np.stack((_quantize(lo), _quantize(hi), _quantize(np.sqrt(power))), axis=1).tofile(f)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return dest
+
+
+class Peaks:
+    """Memory-mapped reader for a `.peaks` file; values are floats in [-1, 1]."""
+
+    def __init__(self, path: str):
+        if np is None:
+            raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+        self.path = Path(path)
+        raw = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if raw.size < _HEADER.size:
+            raise ValueError(f"truncated peaks file: {path}")
+        (magic, version, levels, self.sample_rate, self.base_block, self.factor,
+         self.samples, self.source_size, self.source_mtime_ns) = _HEADER.unpack(bytes(raw[:_HEADER.size]))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"not a peaks file (or unsupported version): {path}")
+        sizes = _level_sizes(self.samples, levels)[:levels]
+        if raw.size != _HEADER.size + 6 * sum(sizes):
+            raise ValueError(f"truncated peaks file: {path}")
+        self.levels: List["np.ndarray"] = []
+        offset = _HEADER.size
+        for n in sizes:
+            self.levels.append(np.ndarray((n, 3), dtype="<i2", buffer=raw, offset=offset))
+            offset += n * 6
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+    def block_sec(self, level: int) -> float:
+        return self.base_block * self.factor ** level / self.sample_rate
+
+    def level_for(self, seconds_per_block: float) -> int:
+        """Coarsest level whose blocks are no longer than `seconds_per_block`."""
+        level = 0
+        while level + 1 < len(self.levels) and self.block_sec(level + 1) <= seconds_per_block + 1e-9:
+            level += 1
+        return level
+
+    def window(self, start: float, end: float, *, width: Optional[int] = None,
+               level: Optional[int] = None) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        (times, mins, maxs, rms) for the blocks covering [start, end). Pass
+        `width` (pixels/points wanted) to pick the zoom level automatically,
+        or an explicit `level`. `times` are block start times in seconds.
+        """
+        if level is None:
+            level = self.level_for((end - start) / width) if width else 0
+        block = self.block_sec(level)
+        data = self.levels[level]
+        i0 = max(0, int(start // block))
+        i1 = min(len(data), int(-(-end // block)))
+        rows = np.asarray(data[i0:i1], dtype=np.float32) / FULL_SCALE
+        times = (np.arange(i0, max(i0, i1)) * block).astype(np.float64)
+        return times, rows[:, 0], rows[:, 1], rows[:, 2]
+
+    def rms(self, level: int) -> "np.ndarray":
+        """RMS (linear, 0..1) of every block at `level`."""
+        return np.asarray(self.levels[level][:, 2], dtype=np.float32) / FULL_SCALE
+
+
+def load_peaks(src: str, *, build: bool = True, stop: Optional[threading.Event] = None) -> Optional[Peaks]:
+    """
+    The peak pyramid for `src`, or None when it has not been built and
+    `build` is False. A file left from an older version of the source is
+    rebuilt.
+    """
+    path = peaks_path(src)
+    st = Path(src).stat()
+    if path.exists():
+        try:
+            peaks = Peaks(str(path))
+            if (peaks.source_size, peaks.source_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                return peaks
+        except (ValueError, OSError, struct.error):
+            pass
+    if not build:
+        return None
+    return Peaks(str(build_peaks(src, stop=stop)))
@@ -0,0 +1,338 @@
+"""
+Execution layer for external tools (ffmpeg, ffprobe).
+
+Jobs are coroutines on asyncio: each has an optional timeout, counts
+against a global concurrency limit, can be cancelled (the child is
+terminated, then killed), and can report ffmpeg `-progress` updates.
+Async callers await `run_async` / `run_many_async` directly; synchronous
+code uses the `run` / `run_many` / `check_output` wrappers, which execute
+the same coroutines on one shared background event loop.
+
+`spawn` / `reap` remain for children whose stdout is consumed as a stream
+(e.g. decoded PCM); they are tracked for cleanup just the same.
+"""
+from __future__ import annotations
+import asyncio
+import atexit
+import os
+import signal
+import subprocess
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from smart_splitter import profiler
+
+# seconds a cancelled child gets to exit after SIGTERM before SIGKILL
+TERMINATE_GRACE = 3.0
+# how often /proc is sampled for a child's CPU/RSS/IO while profiling
+_SAMPLE_EVERY = 0.05
+
+# global cap on concurrent tool processes; at least 4 so explicit --jobs still overlap on small machines
+_limit = int(os.environ.get("SMART_SPLITTER_MAX_PROCS") or max(4, os.cpu_count() or 1))
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_children: Dict[int, float] = {}  # pid -> start time, for cancel_all
+_children_lock = threading.Lock()
+_runner_lock = threading.Lock()
+_runner: Optional[asyncio.AbstractEventLoop] = None
+_runner_thread: Optional[threading.Thread] = None
+
+
+def set_limit(n: int) -> None:
+    """Maximum number of tool processes running at once (per event loop)."""
+    global _limit
+    _limit = max(1, int(n))
+    _semaphores.clear()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(_limit)
+    return sem
+
+
+def _track(pid: int) -> None:
+    with _children_lock:
+        _children[pid] = time.monotonic()
+
+
+def _untrack(pid: int) -> None:
+    with _children_lock:
+        _children.pop(pid, None)
+
+
+def cancel_all(sig: int = signal.SIGTERM) -> None:
+    """Signal every child still running (used on Ctrl-C and at exit)."""
+    with _children_lock:
+        pids = list(_children)
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+atexit.register(cancel_all)
+
+
+def install_interrupt_handler() -> None:
+    """
+    Make Ctrl-C stop every running tool before the usual KeyboardInterrupt,
+    so worker threads blocked on a child unwind and nothing is orphaned.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def _handler(signum, frame):
+        cancel_all()
+        signal.default_int_handler(signum, frame)
+
+    signal.signal(signal.SIGINT, _handler)
+
+
+# -------------------- async API --------------------
+
+def _with_progress(args: List[str]) -> List[str]:
+    if Path(args[0]).name.startswith("ffmpeg") and "-progress" not in args:
+        return [args[0], "-progress", "pipe:1", "-nostats"] + list(args[1:])
+    return list(args)
+
+
+async def _read_progress(stream, on_progress: Callable[[Dict[str, str]], None]) -> None:
+    block: Dict[str, str] = {}
+    async for raw in stream:
+        key, _, value = raw.decode("utf-8", "replace").strip().partition("=")
+        if not key:
+            continue
+        block[key] = value
+        if key == "progress":
+            if block.get("out_time_us", "N/A").lstrip("-").isdigit():
+                block["out_time"] = str(int(block["out_time_us"]) / 1e6)
+            on_progress(block)
+            block = {}
+
+
+def _proc_sample(pid: int) -> Dict[str, float]:
+    sample: Dict[str, float] = {}
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        sample["cpu_s"] = (int(stat[11]) + int(stat[12])) / ticks
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                sample["max_rss_kb"] = int(line.split()[1])
+        for line in Path(f"/proc/{pid}/io").read_text().splitlines():
+            k, _, v = line.partition(":")
+            if k in ("rchar", "wchar"):
+                sample["read_bytes" if k == "rchar" else "write_bytes"] = int(v)
+    except (OSError, ValueError, IndexError):
+        pass
+    return sample
+
+
+async def _sample_until_exit(pid: int, into: Dict[str, float]) -> None:
+    while True:
+        into.update(_proc_sample(pid))
+        await asyncio.sleep(_SAMPLE_EVERY)
+
+
+async def _stop(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+        await asyncio.wait_for(proc.wait(), TERMINATE_GRACE)
+    except ProcessLookupError:
+        pass
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
+async def run_async(args: List[str], *, check: bool = True, capture_output: bool = False, text: bool = False,
+                    timeout: Optional[float] = None,
+                    on_progress: Optional[Callable[[Dict[str, str]], None]] = None) -> subprocess.CompletedProcess:
+    """
+    Run one tool invocation. With `on_progress`, ffmpeg gets `-progress
+    pipe:1` and the callback receives each key/value block as it arrives;
+    it runs on the event loop, so it must only record and never block.
+    A timeout raises subprocess.TimeoutExpired; cancelling the task stops
+    the child. Either way the child is terminated, then killed.
+    """
+    if on_progress:
+        args = _with_progress(args)
+    async with _semaphore():
+        prof = profiler.active()
+        start = prof.now() if prof else 0.0
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE if (capture_output or on_progress) else None,
+            stderr=subprocess.PIPE if capture_output else None,
+        )
+        _track(proc.pid)
+        usage: Dict[str, float] = {}
+        sampler = asyncio.ensure_future(_sample_until_exit(proc.pid, usage)) if prof else None
+        try:
+            if on_progress:
+                readers = [_read_progress(proc.stdout, on_progress)]
+                if capture_output:
+                    readers.append(proc.stderr.read())
+                work = asyncio.gather(*readers, proc.wait())
+                results = await asyncio.wait_for(work, timeout)
+                out, err = None, (results[1] if capture_output else None)
+            else:
+                out, err = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            await _stop(proc)
+            raise subprocess.TimeoutExpired(args, timeout) from None
+        except BaseException:
+            await _stop(proc)
+            raise
+        finally:
+            _untrack(proc.pid)
+            if sampler:
+                sampler.cancel()
+        rc = proc.returncode
+        if prof:
+            prof.add(Path(args[0]).name, "process", start, prof.now(),
+                     {"argv": [str(a) for a in args], "returncode": rc, **usage}, pid=proc.pid)
+
+    if text:
+        out = out.decode("utf-8", "replace") if out is not None else None
+        err = err.decode("utf-8", "replace") if err is not None else None
+    if check and rc != 0:
+        raise subprocess.CalledProcessError(rc, args, output=out, stderr=err)
+    return subprocess.CompletedProcess(args, rc, stdout=out, stderr=err)
+
+
+async def run_many_async(commands: List[List[str]], *, jobs: int = 1, timeout: Optional[float] = None,
+                         on_done: Optional[Callable[[int], None]] = None) -> None:
+    """
+    Run `commands` with at most `jobs` at a time (and within the global
+    limit), in order of submission, calling `on_done(i)` as each succeeds.
+    The callback runs in a worker thread, off the event loop, so it may
+    block and make synchronous proc calls (probe, tag). The first failure
+    cancels the rest, stopping the children in flight, and is re-raised.
+    """
+    local = asyncio.Semaphore(max(1, jobs))
+
+    async def _one(i: int, args: List[str]) -> None:
+        async with local:
+            await run_async(args, timeout=timeout)
+        if on_done:
+            await asyncio.get_running_loop().run_in_executor(None, on_done, i)
+
+    tasks = [asyncio.ensure_future(_one(i, args)) for i, args in enumerate(commands)]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for t in tasks:
+            if t in done and not t.cancelled() and t.exception():
+                raise t.exception()
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# -------------------- synchronous wrappers --------------------
+
+def _loop() -> asyncio.AbstractEventLoop:
+    global _runner, _runner_thread
+    with _runner_lock:
+        if _runner is None:
+            _runner = asyncio.new_event_loop()
+            _runner_thread = threading.Thread(target=_runner.run_forever, name="proc-runner", daemon=True)
+            _runner_thread.start()
+        return _runner
+
+
+def _wait(coro):
+    if threading.current_thread() is _runner_thread:
+        raise RuntimeError("synchronous proc calls cannot be made from the runner loop; await the *_async API")
+    fut = asyncio.run_coroutine_threadsafe(coro, _loop())
+    try:
+        return fut.result()
+    except BaseException:
+        if not fut.done():
+            # interrupted while waiting (e.g. Ctrl-C): cancel the job so its child is stopped
+            fut.cancel()
+            try:
+                fut.result(TERMINATE_GRACE + 1)
+            except BaseException:
+                pass
+        raise
+
+
+def run(args: List[str], *, check: bool = True, capture_output: bool = False, text: bool = False,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[Dict[str, str]], None]] = None) -> subprocess.CompletedProcess:
+    """subprocess.run-style wrapper over run_async."""
+    return _wait(run_async(args, check=check, capture_output=capture_output, text=text,
+                           timeout=timeout, on_progress=on_progress))
+
+
+def run_many(commands: List[List[str]], *, jobs: int = 1, timeout: Optional[float] = None,
+             on_done: Optional[Callable[[int], None]] = None) -> None:
+    _wait(run_many_async(commands, jobs=jobs, timeout=timeout, on_done=on_done))
+
+
+def check_output(args: List[str], *, text: bool = False, timeout: Optional[float] = None):
+    return run(args, check=True, capture_output=True, text=text, timeout=timeout).stdout
+
+
+# -------------------- streamed children --------------------
+
+def spawn(args: List[str], **kwargs) -> subprocess.Popen:
+    """Start a child whose pipes the caller reads directly; pair with `reap`."""
+    proc = subprocess.Popen(args, **kwargs)
+    proc._profile_start = profiler.active() and profiler.active().now()
+    _track(proc.pid)
+    return proc
+
+
+def reap(proc: subprocess.Popen) -> int:
+    """
+    Wait for `proc` and return its exit code. While profiling, the child's
+    CPU time and peak RSS (wait4 rusage) and its I/O byte counts
+    (/proc/<pid>/io, read before the zombie is reaped) are recorded.
+    """
+    try:
+        return _reap(proc)
+    finally:
+        _untrack(proc.pid)
+
+
+def _reap(proc: subprocess.Popen) -> int:
+    prof = profiler.active()
+    start = getattr(proc, "_profile_start", None)
+    if prof is None or start is None or proc.returncode is not None or not hasattr(os, "wait4"):
+        return proc.wait()
+    io = {}
+    try:
+        os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+        for line in Path(f"/proc/{proc.pid}/io").read_text().splitlines():
+            k, _, v = line.partition(":")
+            if k in ("read_bytes", "write_bytes", "rchar", "wchar"):
+                io[k] = int(v)
+    except (OSError, AttributeError):
+        pass
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        return proc.wait()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    args = proc.args if isinstance(proc.args, list) else [str(proc.args)]
+    prof.add(Path(args[0]).name, "process", start, prof.now(), {
+        "argv": [str(a) for a in args],
+        "returncode": proc.returncode,
+        "cpu_s": usage.ru_utime + usage.ru_stime,
+        "max_rss_kb": usage.ru_maxrss,
+        "read_bytes": io.get("rchar", io.get("read_bytes", 0)),
+        "write_bytes": io.get("wchar", io.get("write_bytes", 0)),
+    }, pid=proc.pid)
+    return proc.returncode
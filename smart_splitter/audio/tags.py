@@ -1,58 +1,206 @@
-from typing import List, Dict, Optional
+from __future__ import annotations
+import base64
+import hashlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Dict, Optional
 
 from mutagen.flac import FLAC, Picture
-from mutagen.mp3 import EasyMP3
-
-
-def apply_tags(files: List[str], album_meta: Dict, *, cover: Optional[str] = None) -> None:
-    album = album_meta.get("album")
-    album_artist = album_meta.get("album_artist") or album_meta.get("artist")
-    year = str(album_meta.get("year")) if album_meta.get("year") else None
-    genre = album_meta.get("genre")
-    comment = album_meta.get("comment")
-
-    cover_bytes = None
-    cover_mime = None
-    if cover and Path(cover).exists():
-        cover_bytes = Path(cover).read_bytes()
-        suffix = Path(cover).suffix.lower()
-        cover_mime = "image/png" if suffix == ".png" else "image/jpeg"
-
-    for idx, f in enumerate(files, start=1):
-        p = Path(f)
-        if p.suffix.lower() == ".flac":
-            audio = FLAC(f)
-            if album:
-                audio["album"] = album
-            if album_artist:
-                audio["albumartist"] = album_artist
-            audio["tracknumber"] = str(idx)
-            if year:
-                audio["date"] = year
-            if genre:
-                audio["genre"] = genre
-            if comment:
-                audio["comment"] = comment
-            if cover_bytes:
-                pic = Picture()
-                pic.type = 3
-                pic.mime = cover_mime or "image/jpeg"
-                pic.desc = "Cover"
-                pic.data = cover_bytes
-                audio.clear_pictures()
-                audio.add_picture(pic)
-            audio.save()
-        elif p.suffix.lower() == ".mp3":
-            audio = EasyMP3(f)
-            if album:
-                audio["album"] = album
-            if album_artist:
-                audio["albumartist"] = album_artist
-            audio["tracknumber"] = str(idx)
-            if year:
-                audio["date"] = year
-            if genre:
-                audio["genre"] = genre
-            # EasyMP3 doesn't embed pictures; would need ID3 APIC via mutagen.id3 if desired
-            audio.save()
\ No newline at end of file
+from mutagen.id3 import ID3, ID3NoHeaderError, APIC, COMM, TALB, TCON, TDRC, TPE2, TRCK
+from mutagen.mp4 import MP4, MP4Cover
+from mutagen.oggopus import OggOpus
+from mutagen.oggvorbis import OggVorbis
+
+from smart_splitter.audio import proc
+from smart_splitter.io.cache import file_key
+from smart_splitter.profiler import traced
+
+
+class Artwork:
+    """Cover image bytes prepared once and shared by every file in a tagging run."""
+    __slots__ = ("data", "mime")
+
+    def __init__(self, data: bytes, mime: str):
+        self.data = data
+        self.mime = mime
+
+    def flac_picture(self) -> Picture:
+        pic = Picture()
+        pic.type = 3
+        pic.mime = self.mime
+        pic.desc = "Cover"
+        pic.data = self.data
+        return pic
+
+
+def load_artwork(cover: Optional[str], *, max_size: Optional[int] = None,
+                 cache_dir: Optional[Path] = None) -> Optional[Artwork]:
+    """
+    Read the cover once. With `max_size`, images larger than that many pixels
+    on a side are downscaled to a JPEG with ffmpeg; the scaled copy is kept
+    in `cache_dir` per cover file version and size, so it is made only once.
+    """
+    if not cover or not Path(cover).exists():
+        return None
+    path = Path(cover)
+    if max_size and shutil.which("ffmpeg") is not None:
+        key = hashlib.sha1(f"{file_key(path)}|{max_size}".encode("utf-8")).hexdigest()
+        scaled = (Path(cache_dir) if cache_dir else path.parent) / f"cover-{key}.jpg"
+        if not scaled.exists():
+            scaled.parent.mkdir(parents=True, exist_ok=True)
+            tmp = scaled.with_suffix(".tmp.jpg")
+            cmd = [
+                "ffmpeg", "-y", "-nostdin", "-v", "error", "-i", str(path),
+                "-vf", f"scale='min(iw,{max_size})':'min(ih,{max_size})':force_original_aspect_ratio=decrease",
+                "-frames:v", "1", "-q:v", "2", str(tmp),
+            ]
+            proc.run(cmd, check=True)
+            tmp.replace(scaled)
+        return Artwork(scaled.read_bytes(), "image/jpeg")
+    mime = "image/png" if path.suffix.lower() == ".png" else "image/jpeg"
+    return Artwork(path.read_bytes(), mime)
+
+
+@traced()
+def apply_tags(files: List[str], album_meta: Dict, *, cover: Optional[str] = None,
+               track_numbers: Optional[List[int]] = None, jobs: int = 4,
+               max_cover_size: Optional[int] = None, cache_dir: Optional[Path] = None) -> int:
+    """
+    Write album tags (and cover) to `files`; track numbers default to list
+    position. FLAC, MP3 (ID3 incl. APIC), MP4/M4A (ALAC/AAC) and Ogg
+    Opus/Vorbis are supported. Files run on a pool of `jobs` threads and
+    are only rewritten when their tags differ. Returns the number of files
+    actually written.
+    """
+    fields = {
+        "album": album_meta.get("album"),
+        "album_artist": album_meta.get("album_artist") or album_meta.get("artist"),
+        "year": str(album_meta.get("year")) if album_meta.get("year") else None,
+        "genre": album_meta.get("genre"),
+        "comment": album_meta.get("comment"),
+    }
+    art = load_artwork(cover, max_size=max_cover_size, cache_dir=cache_dir)
+    numbers = list(track_numbers or range(1, len(files) + 1))
+
+    def _one(args) -> bool:
+        idx, f = args
+        return _tag_file(f, idx, fields, art)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return sum(pool.map(_one, zip(numbers, files)))
+
+
+def _tag_file(f: str, idx: int, fields: Dict, art: Optional[Artwork]) -> bool:
+    suffix = Path(f).suffix.lower()
+    if suffix == ".flac":
+        return _tag_flac(FLAC(f), idx, fields, art)
+    if suffix == ".mp3":
+        return _tag_mp3(f, idx, fields, art)
+    if suffix in (".m4a", ".mp4", ".aac"):
+        return _tag_mp4(MP4(f), idx, fields, art)
+    if suffix == ".opus":
+        return _tag_ogg(OggOpus(f), idx, fields, art)
+    if suffix == ".ogg":
+        return _tag_ogg(OggVorbis(f), idx, fields, art)
+    return False
+
+
+def _vorbis_fields(idx: int, fields: Dict) -> Dict[str, str]:
+    names = {"album": "album", "album_artist": "albumartist", "year": "date", "genre": "genre", "comment": "comment"}
+    wanted = {names[k]: v for k, v in fields.items() if v}
+    wanted["tracknumber"] = str(idx)
+    return wanted
+
+
+def _update_vorbis(audio, wanted: Dict[str, str]) -> bool:
+    changed = False
+    for k, v in wanted.items():
+        if audio.get(k) != [v]:
+            audio[k] = v
+            changed = True
+    return changed
+
+
+def _tag_flac(audio: FLAC, idx: int, fields: Dict, art: Optional[Artwork]) -> bool:
+    changed = _update_vorbis(audio, _vorbis_fields(idx, fields))
+    if art and [p.data for p in audio.pictures] != [art.data]:
+        audio.clear_pictures()
+        audio.add_picture(art.flac_picture())
+        changed = True
+    if changed:
+        audio.save()
+    return changed
+
+
+def _tag_ogg(audio, idx: int, fields: Dict, art: Optional[Artwork]) -> bool:
+    changed = _update_vorbis(audio, _vorbis_fields(idx, fields))
+    if art:
+        block = base64.b64encode(art.flac_picture().write()).decode("ascii")
+        if audio.get("metadata_block_picture") != [block]:
+            audio["metadata_block_picture"] = [block]
+            changed = True
+    if changed:
+        audio.save()
+    return changed
+
+
+def _tag_mp3(f: str, idx: int, fields: Dict, art: Optional[Artwork]) -> bool:
+    try:
+        tags = ID3(f)
+    except ID3NoHeaderError:
+        tags = ID3()
+    frames = {
+        "TALB": fields["album"] and TALB(encoding=3, text=fields["album"]),
+        "TPE2": fields["album_artist"] and TPE2(encoding=3, text=fields["album_artist"]),
+        "TRCK": TRCK(encoding=3, text=str(idx)),
+        "TDRC": fields["year"] and TDRC(encoding=3, text=fields["year"]),
+        "TCON": fields["genre"] and TCON(encoding=3, text=fields["genre"]),
+    }
+    changed = False
+    for key, frame in frames.items():
+        if frame and [str(t) for t in getattr(tags.get(key), "text", [])] != [str(t) for t in frame.text]:
+            tags.setall(key, [frame])
+            changed = True
+    if fields["comment"]:
+        current = [str(c.text[0]) for c in tags.getall("COMM") if c.text]
+        if current != [fields["comment"]]:
+            tags.setall("COMM", [COMM(encoding=3, lang="eng", desc="", text=fields["comment"])])
+            changed = True
+    if art:
+        current = [a.data for a in tags.getall("APIC")]
+        if current != [art.data]:
+            tags.setall("APIC", [APIC(encoding=3, mime=art.mime, type=3, desc="Cover", data=art.data)])
+            changed = True
+    if changed:
+        tags.save(f)
+    return changed
+
+
+def _tag_mp4(audio: MP4, idx: int, fields: Dict, art: Optional[Artwork]) -> bool:
+    if audio.tags is None:
+        audio.add_tags()
+    wanted = {
+        "\xa9alb": fields["album"] and [fields["album"]],
+        "aART": fields["album_artist"] and [fields["album_artist"]],
+        "\xa9day": fields["year"] and [fields["year"]],
+        "\xa9gen": fields["genre"] and [fields["genre"]],
+        "\xa9cmt": fields["comment"] and [fields["comment"]],
+    }
+    changed = False
+    for key, value in wanted.items():
+        if value and audio.tags.get(key) != value:
+            audio.tags[key] = value
+            changed = True
+    current_trkn = audio.tags.get("trkn") or [(0, 0)]
+    if current_trkn[0][0] != idx:
+        audio.tags["trkn"] = [(idx, current_trkn[0][1])]
+        changed = True
+    if art:
+        fmt = MP4Cover.FORMAT_PNG if art.mime == "image/png" else MP4Cover.FORMAT_JPEG
+        if [bytes(c) for c in audio.tags.get("covr", [])] != [art.data]:
+            audio.tags["covr"] = [MP4Cover(art.data, imageformat=fmt)]
+            changed = True
+    if changed:
+        audio.save()
+    return changed
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import glob
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from smart_splitter.core import Project, download_stage, process_stage
+
+
+class BatchResult:
+    def __init__(self, project_file: str):
+        self.project_file = project_file
+        self.slug = Path(project_file).parent.name
+        self.status = "pending"
+        self.stage = ""
+        self.error = ""
+        self.tracks = 0
+        self.io_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+
+def expand_projects(patterns: List[str]) -> List[str]:
+    """Project files from paths, directories (→ dir/project.yml) and glob patterns, de-duplicated in order."""
+    found: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for m in matches:
+            path = Path(m)
+            if path.is_dir():
+                path = path / "project.yml"
+            resolved = str(path.resolve())
+            if resolved not in found:
+                found.append(resolved)
+    return found
+
+
+def run_batch(patterns: List[str], *, io_jobs: int = 4, cpu_jobs: int = 2, jobs: Optional[int] = None,
+              force: bool = False, skip_download: bool = False) -> List[BatchResult]:
+    """
+    Run many projects. Downloads and yt-dlp lookups go through a pool of
+    `io_jobs` workers; as soon as a project's network stage is done, its
+    detection/encoding/tagging is queued on a separate pool of `cpu_jobs`
+    workers, so downloads of later projects overlap with earlier encodes.
+    A failing project is recorded and the batch carries on.
+    """
+    results = [BatchResult(f) for f in expand_projects(patterns)]
+    cpu_futures: Dict[str, Future] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, cpu_jobs), thread_name_prefix="cpu") as cpu_pool, \
+            ThreadPoolExecutor(max_workers=max(1, io_jobs), thread_name_prefix="io") as io_pool:
+
+        def _cpu(r: BatchResult, p: Project) -> None:
+            r.stage = "process"
+            t0 = time.monotonic()
+            try:
+                r.tracks = len(process_stage(p, jobs=jobs)) // len(p.formats)  # files in every format
+                r.status = "ok"
+            except Exception as e:
+                _fail(r, e)
+            finally:
+                r.cpu_seconds = time.monotonic() - t0
+
+        def _io(r: BatchResult) -> None:
+            r.stage = "download"
+            t0 = time.monotonic()
+            try:
+                p = Project(r.project_file)
+                download_stage(p, force=force, skip_download=skip_download)
+            except Exception as e:
+                _fail(r, e)
+                return
+            finally:
+                r.io_seconds = time.monotonic() - t0
+            cpu_futures[r.project_file] = cpu_pool.submit(_cpu, r, p)
+
+        for f in [io_pool.submit(_io, r) for r in results]:
+            f.result()
+        for f in list(cpu_futures.values()):
+            f.result()
+
+    print_summary(results)
+    return results
+
+
+def _fail(r: BatchResult, e: Exception) -> None:
+    r.status = "failed"
+    r.error = f"{type(e).__name__}: {e}".splitlines()[0]
+    print(f"✘ {r.slug} failed during {r.stage}: {r.error}")
+
+
+def print_summary(results: List[BatchResult]) -> None:
+    width = max([len(r.slug) for r in results] + [7])
+    print(f"\n{'project':<{width}}  status  tracks   io(s)  cpu(s)  detail")
+    for r in results:
+        detail = f"{r.stage}: {r.error}" if r.status == "failed" else ""
+        print(f"{r.slug:<{width}}  {r.status:<6}  {r.tracks:>6}  {r.io_seconds:>6.1f}  {r.cpu_seconds:>6.1f}  {detail}")
+    failed = sum(r.status == "failed" for r in results)
+    print(f"\n{len(results) - failed} ok, {failed} failed")
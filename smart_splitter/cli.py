@@ -1,33 +1,167 @@
 import typer
 from pathlib import Path
+from typing import List
 
-from smart_splitter.core import run_pipeline, detect_only, split_only, tag_only
+from smart_splitter.profiler import session
+
+# Commands import what they use when they run (core, yt_dlp, numpy, mutagen,
+# sqlite3 are all deferred), so --help and local-only commands start fast.
 
 app = typer.Typer(help="Smart Album Splitter CLI")
 
+
+@app.callback()
+def main():
+    from smart_splitter.audio import proc
+    # Ctrl-C stops running ffmpeg/ffprobe children instead of leaving them behind
+    proc.install_interrupt_handler()
+
+PROFILE_HELP = "write a Chrome-trace/Perfetto JSON of stage and subprocess timings here"
+
 @app.command()
-def run(project: Path, force: bool = typer.Option(False), skip_download: bool = typer.Option(False)):
+def run(project: Path, force: bool = typer.Option(False), skip_download: bool = typer.Option(False),
+        jobs: int = typer.Option(None, help="parallel encoders (default: output.jobs)"),
+        stream: bool = typer.Option(False, help="encode tracks while the audio is still downloading"),
+        profile: Path = typer.Option(None, help=PROFILE_HELP)):
     """
     Run the full pipeline: download → detect tracklist → split → tag.
     """
-    run_pipeline(str(project), force=force, skip_download=skip_download)
+    from smart_splitter.core import run_pipeline
+    with session(profile):
+        run_pipeline(str(project), force=force, skip_download=skip_download, jobs=jobs, stream=stream)
 
 @app.command()
-def detect(project: Path, emit: str = typer.Option("json", help="json|csv|cue"), out: Path = typer.Option(None)):
+def detect(project: Path, emit: str = typer.Option("json", help="json|csv|cue"), out: Path = typer.Option(None),
+           profile: Path = typer.Option(None, help=PROFILE_HELP)):
     """
     Detect timestamps from YouTube description/comments/transcript and print/export.
     """
-    detect_only(str(project), emit=emit, out=out)
+    from smart_splitter.core import detect_only
+    with session(profile):
+        detect_only(str(project), emit=emit, out=out)
 
 @app.command()
-def split(project: Path):
+def split(project: Path, jobs: int = typer.Option(None, help="parallel encoders (default: output.jobs)"),
+          profile: Path = typer.Option(None, help=PROFILE_HELP)):
     """Split audio using prepared tracklist."""
-    split_only(str(project))
+    from smart_splitter.core import split_only
+    with session(profile):
+        split_only(str(project), jobs=jobs)
+
+@app.command()
+def batch(projects: List[str] = typer.Argument(..., help="project files, directories or globs like 'projects/*/project.yml'"),
+          io_jobs: int = typer.Option(4, help="concurrent downloads / yt-dlp lookups"),
+          cpu_jobs: int = typer.Option(2, help="projects detecting/encoding at once"),
+          jobs: int = typer.Option(None, help="parallel encoders per project (default: output.jobs)"),
+          force: bool = typer.Option(False), skip_download: bool = typer.Option(False),
+          profile: Path = typer.Option(None, help=PROFILE_HELP)):
+    """Run the full pipeline for many projects, overlapping downloads with encodes."""
+    from smart_splitter.batch import run_batch
+    with session(profile):
+        results = run_batch(projects, io_jobs=io_jobs, cpu_jobs=cpu_jobs, jobs=jobs, force=force, skip_download=skip_download)
+    if any(r.status == "failed" for r in results):
+        raise typer.Exit(1)
 
 @app.command()
-def tag(project: Path):
+def tag(project: Path, jobs: int = typer.Option(None, help="files tagged concurrently"),
+        profile: Path = typer.Option(None, help=PROFILE_HELP)):
     """Reapply metadata & cover art."""
-    tag_only(str(project))
+    from smart_splitter.core import tag_only
+    with session(profile):
+        tag_only(str(project), jobs=jobs)
+
+@app.command()
+def cover(project: Path, count: int = typer.Option(12, help="candidate frames, evenly spaced over the video"),
+          scene: float = typer.Option(None, help="pick scene changes scoring above this (0-1) instead of even spacing"),
+          at: str = typer.Option(None, help="take the frame at this timestamp instead of scoring candidates"),
+          keep: bool = typer.Option(False, help="keep the candidate frames in cover-candidates/"),
+          force: bool = typer.Option(False, help="redownload the video"),
+          profile: Path = typer.Option(None, help=PROFILE_HELP)):
+    """Pick cover art from the video: extract candidate frames in one pass and keep the sharpest, best-exposed."""
+    from smart_splitter.core import pick_cover
+    with session(profile):
+        pick_cover(str(project), count=count, scene=scene, at=at, keep=keep, force=force)
+
+@app.command()
+def normalize(project: Path, mode: str = typer.Option("track", help="track|album"),
+              jobs: int = typer.Option(None, help="parallel measurements/encoders (default: output.jobs)"),
+              profile: Path = typer.Option(None, help=PROFILE_HELP)):
+    """Loudness-normalize the split tracks (two-pass loudnorm applied in the encode)."""
+    from smart_splitter.core import normalize_audio
+    with session(profile):
+        normalize_audio(str(project), mode=mode, jobs=jobs)
+
+@app.command()
+def peaks(project: Path, rebuild: bool = typer.Option(False, help="decode again even if the peak file is current"),
+          profile: Path = typer.Option(None, help=PROFILE_HELP)):
+    """Build the multi-resolution waveform peak file used for previews, silence detection and refine."""
+    from smart_splitter.core import waveform_peaks
+    with session(profile):
+        waveform_peaks(str(project), rebuild=rebuild)
+
+@app.command()
+def fingerprint(project: Path, rebuild: bool = typer.Option(False, help="decode again even if the index is current"),
+                library: Path = typer.Option(None, help="directory of projects to match against (default: source.fingerprint.library or the project's parent)"),
+                profile: Path = typer.Option(None, help=PROFILE_HELP)):
+    """Build the spectral fingerprint index and show a matching project's tracklist, or the cuts found in the audio."""
+    from smart_splitter.core import fingerprint_audio
+    with session(profile):
+        fingerprint_audio(str(project), rebuild=rebuild, library=str(library) if library else None)
+
+@app.command()
+def gc(store: Path = typer.Option(None, help="store root (default: $SMART_SPLITTER_STORE)"),
+       grace_hours: float = typer.Option(24.0, help="keep objects added more recently than this"),
+       dry_run: bool = typer.Option(False, help="only report what would be removed")):
+    """Delete shared-store sources that no project links to any more."""
+    from smart_splitter.core import gc_store
+    gc_store(str(store) if store else None, grace_hours=grace_hours, dry_run=dry_run)
+
+def _parse_sets(values: List[str]) -> dict:
+    """`--set output.codec=mp3` → {"output": {"codec": "mp3"}} (values are parsed as YAML)."""
+    import yaml
+    config: dict = {}
+    for item in values:
+        key, sep, raw = item.partition("=")
+        if not sep:
+            raise typer.BadParameter(f"expected key=value, got {item!r}")
+        node = config
+        *parents, leaf = key.strip().split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = yaml.safe_load(raw)
+    return config
+
+@app.command()
+def enqueue(targets: List[str] = typer.Argument(..., help="project files, directories, globs or video URLs"),
+            set_: List[str] = typer.Option([], "--set", help="config override for these jobs, e.g. output.codec=mp3"),
+            jobs: int = typer.Option(None, help="parallel encoders per job (default: output.jobs)"),
+            force: bool = typer.Option(False), skip_download: bool = typer.Option(False),
+            max_attempts: int = typer.Option(3, help="tries before a job is marked failed"),
+            queue: Path = typer.Option(None, help="queue database (default: $SMART_SPLITTER_QUEUE or queue.sqlite3)")):
+    """Add split jobs to the worker queue; URLs get a project created under projects/."""
+    from smart_splitter import worker
+    ids = worker.enqueue(targets, config=_parse_sets(set_), force=force, skip_download=skip_download, jobs=jobs,
+                         max_attempts=max_attempts, queue=str(queue) if queue else None)
+    print(f"✔ queued {len(ids)} job(s): {', '.join(map(str, ids))}")
+
+@app.command(name="worker")
+def worker_cmd(queue: Path = typer.Option(None, help="queue database (default: $SMART_SPLITTER_QUEUE or queue.sqlite3)"),
+               io_jobs: int = typer.Option(2, help="jobs downloading at once"),
+               cpu_jobs: int = typer.Option(2, help="jobs detecting/encoding at once"),
+               jobs: int = typer.Option(None, help="parallel encoders per job (default: output.jobs)"),
+               poll: float = typer.Option(5.0, help="seconds between checks of an empty queue"),
+               once: bool = typer.Option(False, help="exit when the queue is drained")):
+    """Process queued jobs until stopped; interrupted jobs are re-queued and resume after their last finished stage."""
+    from smart_splitter import worker
+    # the worker handles SIGTERM (service stop) like Ctrl-C: children stopped, running jobs released
+    worker.run_worker(str(queue) if queue else None, io_jobs=io_jobs, cpu_jobs=cpu_jobs, jobs=jobs, poll=poll, once=once)
+
+@app.command()
+def status(queue: Path = typer.Option(None, help="queue database (default: $SMART_SPLITTER_QUEUE or queue.sqlite3)"),
+           limit: int = typer.Option(50, help="most recent jobs to list")):
+    """Show queued, running, finished and failed jobs with per-stage timings."""
+    from smart_splitter import worker
+    worker.print_status(str(queue) if queue else None, limit=limit)
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -1,42 +1,75 @@
 from __future__ import annotations
 import json
+import math
+import os
 import shutil
 import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
 from pathlib import Path
 from typing import List, Dict, Optional
 
-import yaml
-
 from smart_splitter.io.export import export_cue
-
-try:
-    from yt_dlp import YoutubeDL
-except Exception:
-    YoutubeDL = None
+from smart_splitter.profiler import traced
+from smart_splitter.io.cache import Cache, file_key
+from smart_splitter.io.store import Store, default_store
+from smart_splitter.io.manifest import Manifest, digest, file_digest
+from smart_splitter.tracks import Track, Tracklist, format_ts
 
 from smart_splitter.parsers.description import extract_from_description
 from smart_splitter.parsers.comments import extract_from_comments
-from smart_splitter.parsers.transcript import extract_from_transcript
-from smart_splitter.parsers.silence import suggest_cuts_from_silence
-from smart_splitter.parsers.description import extract_from_description
+from smart_splitter.parsers.transcript import scan_transcript
+from smart_splitter.parsers.score import GOOD_SCORE, score_tracklist
 from smart_splitter.io.files import ensure_dir, read_yaml, write_json, write_csv
 from smart_splitter.audio.ffmpeg import (
     probe_duration,
-    cut_segments,
+    copy_extension,
+    cut_formats,
+    output_paths,
+    snap_to_packets,
+    probe_sample_rate,
+    probe_container_duration,
     grab_snapshot
 )
-from smart_splitter.audio.tags import apply_tags
+from smart_splitter.audio.loudness import measure_loudness, measure_tracks, loudnorm_filter, album_gain_filter
+
+# yt_dlp, numpy (silence, peaks, refine) and mutagen (tags) are imported in
+# the functions that use them, so local-only commands and --help start fast.
+
+
+def _youtube_dl():
+    """yt_dlp.YoutubeDL, imported on first network use; None if yt-dlp is not installed."""
+    try:
+        from yt_dlp import YoutubeDL
+    except Exception:
+        return None
+    return YoutubeDL
+
 
 class Project:
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, overrides: Optional[Dict] = None):
         self.project_path = Path(project_path).resolve()
         if not self.project_path.exists():
             raise FileNotFoundError(f"Project file not found: {self.project_path}")
         self.cfg = read_yaml(self.project_path)
+        if overrides:
+            # e.g. {"output": {"codec": "mp3"}} from a queued job, merged over project.yml
+            self.cfg = _merge_cfg(self.cfg, overrides)
         self.slug = self.cfg.get("slug") or self.project_path.parent.name
         self.dir = self.project_path.parent
         self.outdir = Path(self.cfg.get("output", {}).get("outdir", f"projects/{self.slug}/output")).resolve()
         ensure_dir(self.outdir)
+        # shared source store: `store:` in project.yml or $SMART_SPLITTER_STORE
+        self.store = default_store(self.cfg.get("store"))
+        cache_cfg = self.cfg.get("cache") or {}
+        self.cache = Cache(
+            self.dir / ".cache",
+            max_bytes=int(float(cache_cfg.get("max_mb", 64)) * 1024 * 1024),
+            enabled=bool(cache_cfg.get("enabled", True)),
+        )
+        # yt-dlp info is refetched after this many seconds; probe results are keyed by size/mtime and never expire
+        self.info_ttl = float(cache_cfg.get("info_ttl_hours", 24 * 7)) * 3600
 
     @property
     def url(self) -> str:
@@ -50,13 +83,132 @@ class Project:
     def fallback_silence(self) -> bool:
         return bool(self.cfg.get("source", {}).get("fallback_silence", True))
 
+    @property
+    def silence_options(self) -> Dict:
+        """`source.silence` overrides for suggest_cuts_from_silence (noise_db, min_silence, min_gap, engine)."""
+        return dict(self.cfg.get("source", {}).get("silence") or {})
+
+    @property
+    def detect_deadline(self) -> float:
+        """`source.deadline`: seconds to wait for tracklist sources before taking the best found so far."""
+        return float(self.cfg.get("source", {}).get("deadline", 60))
+
+    @property
+    def comment_options(self) -> Dict:
+        """`source.comments`: how many comments (and KB of text) to read at most, and yt-dlp's sort (top|new)."""
+        cfg = self.cfg.get("source", {}).get("comments") or {}
+        return {"max_comments": int(cfg.get("max_comments", 500)), "max_kb": int(cfg.get("max_kb", 1024)),
+                "sort": str(cfg.get("sort", "top"))}
+
+    @property
+    def fingerprint_options(self) -> Optional[Dict]:
+        """
+        `source.fingerprint`: true or {library, min_gap, threshold} to cut by
+        the audio itself (see audio.fingerprint); None when off. `library` is
+        the directory of projects to match against (default: this project's
+        siblings).
+        """
+        value = self.cfg.get("source", {}).get("fingerprint")
+        if not value and "fingerprint" not in self.preferred_sources:
+            return None
+        opts = dict(value) if isinstance(value, dict) else {}
+        opts["library"] = Path(opts.get("library") or self.dir.parent).expanduser().resolve()
+        return opts
+
+    @property
+    def refine_window(self) -> Optional[float]:
+        """`source.refine`: true (±3 s) or {window: N} to snap cuts to the quietest point nearby."""
+        value = self.cfg.get("source", {}).get("refine")
+        if not value:
+            return None
+        if isinstance(value, dict):
+            return float(value.get("window", 3.0))
+        return 3.0 if value is True else float(value)
+
+    @property
+    def build_peaks(self) -> bool:
+        """`source.peaks`: build the waveform peak file right after downloading."""
+        return bool(self.cfg.get("source", {}).get("peaks"))
+
     @property
     def codec(self) -> str:
-        return (self.cfg.get("output", {}).get("codec") or "flac").lower()
+        """The first (or only) output codec."""
+        return self.formats[0]["codec"]
+
+    @property
+    def formats(self) -> List[Dict]:
+        """
+        Output formats from `output.codec`: one codec writes to `outdir`;
+        a list writes each codec to its own `outdir/<codec>` folder. List
+        entries may be mappings with `codec` and their own `outdir`
+        (relative to `output.outdir`) and `filename_template`.
+        """
+        codecs = self.cfg.get("output", {}).get("codec") or "flac"
+        if not isinstance(codecs, list):
+            return [{"codec": str(codecs).lower(), "outdir": self.outdir, "filename_template": self.filename_template}]
+        formats = []
+        for entry in codecs:
+            spec = entry if isinstance(entry, dict) else {"codec": entry}
+            codec = str(spec["codec"]).lower()
+            formats.append({
+                "codec": codec,
+                "outdir": (self.outdir / spec.get("outdir", codec)).resolve(),
+                "filename_template": spec.get("filename_template", self.filename_template),
+            })
+        dirs = [f["outdir"] for f in formats]
+        if len(set(dirs)) != len(dirs):
+            raise ValueError("output.codec: every format needs its own outdir")
+        return formats
+
+    @property
+    def jobs(self) -> int:
+        """Parallel encoder count from `output.jobs`; `auto` or 0 means one per CPU."""
+        jobs = self.cfg.get("output", {}).get("jobs", 1)
+        if jobs in (0, "0", "auto"):
+            return os.cpu_count() or 1
+        return max(1, int(jobs or 1))
+
+    @property
+    def job_timeout(self) -> Optional[float]:
+        """`output.timeout`: seconds one ffmpeg encode may run before it is stopped."""
+        timeout = self.cfg.get("output", {}).get("timeout")
+        return float(timeout) if timeout else None
+
+    @property
+    def split_mode(self) -> str:
+        return self.cfg.get("output", {}).get("split_mode", "per-track")
+
+    @property
+    def normalize(self) -> Optional[Dict]:
+        """
+        `output.normalize`: track | album, or a mapping with `mode` and any of
+        the I/TP/LRA targets. Returns {"mode", "target"} or None when off.
+        """
+        value = self.cfg.get("output", {}).get("normalize")
+        if not value:
+            return None
+        cfg = dict(value) if isinstance(value, dict) else {"mode": "track" if value is True else str(value)}
+        mode = str(cfg.get("mode", "track")).lower()
+        if mode == "ebur128":
+            mode = "track"
+        if mode not in ("track", "album"):
+            raise ValueError(f"unknown normalize mode: {mode} (expected track or album)")
+        return {"mode": mode, "target": {k: float(cfg[k]) for k in ("I", "TP", "LRA") if k in cfg}}
 
     @property
     def cover(self) -> Optional[str]:
-        return self.cfg.get("output", {}).get("cover")
+        """`output.cover` (an image file), else the cover.jpg picked by the `cover` command."""
+        cover = self.cfg.get("output", {}).get("cover")
+        if cover and not str(cover).startswith("video:"):
+            return cover
+        picked = self.cover_path()
+        return str(picked) if picked.exists() else None
+
+    @property
+    def cover_max_size(self) -> Optional[int]:
+        """`output.cover_max_size`: downscale embedded art to at most this many pixels per side."""
+        size = self.cfg.get("output", {}).get("cover_max_size")
+        return int(size) if size else None
 
     @property
     def filename_template(self) -> str:
@@ -70,44 +222,68 @@ class Project:
         # Using .m4a as bestaudio default from yt-dlp
         return self.dir / "source.m4a"
 
+    def cover_path(self) -> Path:
+        return self.dir / "cover.jpg"
+
     def tracklist_json_path(self) -> Path:
         return self.dir / "tracklist.json"
 
     def tracklist_csv_path(self) -> Path:
         return self.dir / "tracklist.csv"
 
+    def output_ext(self, codec: Optional[str] = None) -> str:
+        """File extension of the split tracks (for `codec: copy`, the source's own container)."""
+        codec = codec or self.codec
+        if codec == "copy":
+            return copy_extension(str(self.source_audio_path()), cache=self.cache)
+        return "m4a" if codec == "alac" else codec
+
+    def manifest_path(self) -> Path:
+        return self.dir / "manifest.json"
+
 # ------------------ Public functions used by CLI ------------------
 
-def run_pipeline(project_file: str,*, force: bool = False, skip_download: bool = False):
+@traced()
+def run_pipeline(project_file: str,*, force: bool = False, skip_download: bool = False, jobs: Optional[int] = None,
+                 stream: bool = False):
     p = Project(project_file)
+    if stream and not skip_download:
+        stream_pipeline(p, force=force, jobs=jobs)
+        return
+    download_stage(p, force=force, skip_download=skip_download)
+    process_stage(p, jobs=jobs)
 
+@traced()
+def download_stage(p: Project, *, force: bool = False, skip_download: bool = False) -> None:
+    """Network-bound part of a run: fetch the audio and warm the yt-dlp info cache."""
     if not skip_download:
         download_audio_and_info(p, force=force)
+    if p.build_peaks and p.source_audio_path().exists():
+        from smart_splitter.audio.peaks import load_peaks
+        load_peaks(str(p.source_audio_path()))
+    if p.url and not p.cfg.get("tracklist"):
+        _ytdlp_info(p.url, cache=p.cache, ttl=p.info_ttl)
 
+@traced()
+def process_stage(p: Project, *, jobs: Optional[int] = None) -> List[str]:
+    """CPU-bound part of a run: resolve the tracklist, encode and tag. Returns the output files."""
     tracks = resolve_tracklist(p)
-    write_json(p.tracklist_json_path(), tracks)
-    write_csv(p.tracklist_csv_path(), tracks)
-    export_cue(p, tracks)
-
-    out_files = cut_segments(
-        src=str(p.source_audio_path()),
-        tracks=tracks,
-        outdir=str(p.outdir),
-        filename_template=p.filename_template,
-        codec=p.codec,
-    )
+    _write_tracklist(p, tracks)
 
-    apply_tags(out_files, p.metadata, cover=p.cover)
+    manifest = Manifest(p.manifest_path())
+    per_format = _split_tracks(p, tracks, manifest=manifest, jobs=jobs)
+    _tag_tracks(p, per_format, manifest=manifest)
+    return [f for files in per_format for f in files]
 
 def detect_only(project_file: str, *,emit: str = "json", out: Optional[str] = None):
     p = Project(project_file)
     tracks = resolve_tracklist(p)
     if emit == "json":
-        data = json.dumps(tracks, indent=2)
+        data = json.dumps(tracks.to_dicts(), indent=2)
     elif emit == "csv":
         data = "index,title,start,end\n" + "\n".join(
-            f"{i+1},{track['title'].replace(',', '')},{track['start']},{track.get('end','')}"
-            for i, track in enumerate(tracks)
+            f"{i+1},{row['title'].replace(',', '')},{row['start']},{row.get('end','')}"
+            for i, row in enumerate(tracks.to_dicts())
         )
     elif emit == "cue":
         export_cue(p, tracks)
@@ -120,165 +296,851 @@ def detect_only(project_file: str, *,emit: str = "json", out: Optional[str] = No
     else:
         print(data)
 
-def split_only(project_file: str):
+def split_only(project_file: str, *, jobs: Optional[int] = None):
     p = Project(project_file)
     if not p.source_audio_path().exists():
-        raise FileNotFoundError(f"Source audio file not found. Run 'run' or download the audio file")
+        raise FileNotFoundError("Source audio file not found. Run 'run' or download the audio file")
     tracks = __load_tracklist(p)
-    out_files = cut_segments(
-        src=str(p.source_audio_path()),tracks=tracks, outdir=str(p.outdir), filename_template=p.filename_template, codec=p.codec
-    )
+    per_format = _split_tracks(p, tracks, manifest=Manifest(p.manifest_path()), jobs=jobs)
     print("Wrote:")
-    for f in out_files:
+    for f in (f for files in per_format for f in files):
         print(" ·", f)
 
-def tag_only(project_file: str):
+def tag_only(project_file: str, *, jobs: Optional[int] = None):
+    from smart_splitter.audio.tags import apply_tags
     p = Project(project_file)
-    out_files = sorted(Path(p.outdir).glob(f"*.{p.codec if p.codec != 'mp3' else 'mp3'}"))
-    if not out_files:
+    total = written = 0
+    for fmt in p.formats:
+        out_files = sorted(Path(fmt["outdir"]).glob(f"*.{p.output_ext(fmt['codec'])}"))
+        if out_files:
+            written += apply_tags([str(f) for f in out_files], p.metadata, cover=p.cover, **_tag_options(p, jobs))
+            total += len(out_files)
+    if not total:
         print("No files found")
         return
-    apply_tags([str(f) for f in out_files], p.metadata, cover=p.cover)
+    print(f"✔ tagged {written} file(s), {total - written} already up to date")
 
 def snapshot_frame(project_file: str, *, at: str, out: str):
     p = Project(project_file)
-    grab_snapshot(str(p.source_audio_path()), at=at, out=out)
+    grab_snapshot(str(_video_source(p)), at=at, out=out)
 
-def normalize_audio(project_file: str, *, mode: str = "ebur128"):
+@traced()
+def pick_cover(project_file: str, *, count: int = 12, scene: Optional[float] = None, at: Optional[str] = None,
+               keep: bool = False, force: bool = False):
+    """
+    Take K frames of the video in one ffmpeg pass (evenly spaced, or at
+    scene changes), score them, and save the best as the project cover.
+    `at` (or `output.cover: "video:<ts>"`) takes that one frame instead.
+    """
+    from smart_splitter.audio.cover import extract_frames, score_frames
     p = Project(project_file)
-    for audio in sorted(p.outdir.glob("*.flac")) + sorted(p.outdir.glob("*.mp3")):
-        out = audio.with_name(audio.stem + ".norm" + audio.suffix)
-        if mode == "ebur128":
-            cmd = [
-                "ffmpeg", "-y", "-i", str(audio),
-                "-filter:a", "loudnorm=I=-16:TP=-1.5:LRA=11",
-                str(out)
-            ]
-            subprocess.run(cmd, check=True)
+    video = str(_video_source(p, force=force))
+    configured = str(p.cfg.get("output", {}).get("cover") or "")
+    if at is None and configured.startswith("video:"):
+        at = configured[len("video:"):]
+    if at:
+        grab_snapshot(video, at=at, out=str(p.cover_path()))
+        print(f"✔ cover from {at}: {p.cover_path()}")
+        return
+
+    # some containers (live recordings, fragmented MP4/WebM) carry no duration; yt-dlp knows it
+    duration = probe_container_duration(video, cache=p.cache)
+    if duration <= 0 and p.url:
+        duration = _ytdlp_info(p.url, cache=p.cache, ttl=p.info_ttl).get("duration") or 0.0
+    if duration <= 0:
+        raise RuntimeError(f"cannot tell how long {video} is (no container or yt-dlp duration); "
+                           f"pick a frame with --at instead")
+
+    candidates = p.dir / "cover-candidates"
+    shutil.rmtree(candidates, ignore_errors=True)
+    frames = extract_frames(video, str(candidates), duration=duration,
+                            count=count, scene=scene, timeout=p.job_timeout)
+    if not frames["paths"]:
+        raise RuntimeError("no frames extracted from the video (try a lower --scene threshold)")
+    scores = score_frames(frames["thumbs"])
+    best = max(range(len(scores)), key=lambda i: scores[i]["score"])
+    for i, (path, t, s) in enumerate(zip(frames["paths"], frames["times"], scores)):
+        mark = "→" if i == best else "·"
+        print(f" {mark} {path.name} @ {t:7.1f}s  score {s['score']:5.2f}  sharpness {s['sharpness']:8.1f}  "
+              f"brightness {s['brightness']:.2f}")
+    shutil.copyfile(frames["paths"][best], p.cover_path())
+    if not keep:
+        shutil.rmtree(candidates, ignore_errors=True)
+    if p.cfg.get("output", {}).get("cover") and not configured.startswith("video:"):
+        print(f"! output.cover is set to {configured}; remove it to use the picked frame")
+    print(f"✔ cover: {p.cover_path()} (frame at {frames['times'][best]:.1f}s); run 'tag' to embed it")
+
+def waveform_peaks(project_file: str, *, rebuild: bool = False):
+    """Build (or reuse) the source's waveform peak pyramid and list its zoom levels."""
+    from smart_splitter.audio.peaks import Peaks, build_peaks, load_peaks
+    p = Project(project_file)
+    src = str(p.source_audio_path())
+    if not Path(src).exists():
+        raise FileNotFoundError("Source audio file not found. Run 'run' or download the audio file")
+    peaks = Peaks(str(build_peaks(src))) if rebuild else load_peaks(src)
+    print(f"✔ {peaks.path} ({peaks.path.stat().st_size / 1e6:.1f} MB, {peaks.duration:.1f}s)")
+    for level, data in enumerate(peaks.levels):
+        print(f" · level {level}: {peaks.block_sec(level) * 1000:g} ms/block, {len(data)} blocks")
+
+def fingerprint_audio(project_file: str, *, rebuild: bool = False, library: Optional[str] = None):
+    """Build (or reuse) the source's fingerprint index, then report a library match or the novelty cuts."""
+    from smart_splitter.audio.fingerprint import Fingerprint, build_fingerprint, load_fingerprint
+    p = Project(project_file)
+    src = str(p.source_audio_path())
+    if not Path(src).exists():
+        raise FileNotFoundError("Source audio file not found. Run 'run' or download the audio file")
+    fp = Fingerprint(str(build_fingerprint(src))) if rebuild else load_fingerprint(src)
+    print(f"✔ {fp.path} ({fp.path.stat().st_size / 1e6:.1f} MB, {fp.duration:.1f}s, {fp.keys.size} keys)")
+    library = Path(library) if library else (p.fingerprint_options or {}).get("library", p.dir.parent)
+    tracks = _library_match(p, library, total=fp.duration)
+    if not tracks:
+        print(f" · no match under {library}; novelty cuts:")
+        tracks = _fingerprint_tracks(p)
+    for t in tracks:
+        print(f" · {format_ts(t.start_ms)}  {t.title}")
+
+def gc_store(root: Optional[str] = None, *, grace_hours: float = 24.0, dry_run: bool = False):
+    """Remove source objects that no project links to any more."""
+    store = Store(root) if root else default_store()
+    if store is None:
+        raise RuntimeError("no store configured: pass --store or set SMART_SPLITTER_STORE")
+    result = store.gc(grace_hours=grace_hours, dry_run=dry_run)
+    verb = "would free" if dry_run else "freed"
+    print(f"✔ {store.root}: {result['removed']} object(s) unreferenced, {verb} "
+          f"{result['freed_bytes'] / 1e6:.1f} MB; {result['kept']} kept")
+
+def normalize_audio(project_file: str, *, mode: str = "track", jobs: Optional[int] = None):
+    """
+    Re-encode the project's tracks with loudness normalization applied inside
+    the split itself (mode "track" or "album"); files are replaced in place.
+    """
+    p = Project(project_file)
+    if not p.source_audio_path().exists():
+        raise FileNotFoundError("Source audio file not found. Run 'run' or download the audio file")
+    output = p.cfg.setdefault("output", {})
+    current = output.get("normalize")
+    output["normalize"] = {**current, "mode": mode} if isinstance(current, dict) else mode
+    if any(f["codec"] == "copy" for f in p.formats):
+        print(" · codec: copy outputs are left as they are (normalizing needs a re-encode)")
+    tracks = __load_tracklist(p)
+    manifest = Manifest(p.manifest_path())
+    per_format = _split_tracks(p, tracks, manifest=manifest, jobs=jobs)
+    _tag_tracks(p, per_format, manifest=manifest)
+
+
+# -------------------- streaming run --------------------
+
+# Byte progress only approximates time progress (VBR, container overhead),
+# so a track is cut once the download is this far past its end.
+STREAM_MARGIN_SEC = 15.0
+STREAM_MARGIN_FRACTION = 0.02
+# a track cut from the partial file this much shorter than planned is cut again
+STREAM_SHORT_SEC = 0.5
+
+
+class _DownloadProgress:
+    """Thread-safe view of a running yt-dlp download, fed by its progress hooks."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.fraction = 0.0
+        self.partial: Optional[str] = None
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+    def hook(self, d: Dict) -> None:
+        with self.cond:
+            if d.get("status") == "downloading":
+                total = d.get("total_bytes") or d.get("total_bytes_estimate")
+                if d.get("fragment_count"):
+                    frac = (d.get("fragment_index") or 0) / d["fragment_count"]
+                elif total:
+                    frac = (d.get("downloaded_bytes") or 0) / total
+                else:
+                    frac = 0.0
+                self.fraction = max(self.fraction, min(frac, 1.0))
+                self.partial = d.get("tmpfilename") or d.get("filename") or self.partial
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self.cond:
+            self.done, self.error = True, error
+            self.cond.notify_all()
+
+    def wait_until(self, needed: float, duration: float) -> Optional[str]:
+        """Block until the download covers `needed` seconds; returns the partial file, or None once complete."""
+        with self.cond:
+            while not self.done:
+                if self.partial and self.fraction * duration >= needed:
+                    return self.partial
+                self.cond.wait(1.0)
+            return None
+
+    def wait_done(self) -> None:
+        with self.cond:
+            while not self.done:
+                self.cond.wait(1.0)
+
+
+@traced("stream")
+def stream_pipeline(p: Project, *, force: bool = False, jobs: Optional[int] = None) -> List[str]:
+    """
+    Download and split at the same time: resolve the tracklist from text
+    (metadata only), start the download, and encode each track from the
+    partial file as soon as the downloaded bytes cover its end. Falls back
+    to the regular download-then-process run when that is not possible.
+    """
+    reason = None
+    if p.source_audio_path().exists() and not force:
+        reason = "audio already downloaded"
+    elif any(f["codec"] == "copy" for f in p.formats) or p.normalize:
+        reason = "codec: copy and normalize need the complete file"
+    info = {} if reason else _ytdlp_info(p.url, cache=p.cache, ttl=p.info_ttl)
+    duration = float(info.get("duration") or 0)
+    tracks = resolve_tracklist(p, duration_hint=duration) if duration else []
+    if not reason and not tracks:
+        reason = "no text tracklist or duration before download"
+    if reason:
+        print(f"streaming disabled ({reason}) — running download then split")
+        download_stage(p, force=force)
+        return process_stage(p, jobs=jobs)
+
+    _write_tracklist(p, tracks)
+    progress = _DownloadProgress()
+    final = str(p.source_audio_path())
+    t0 = time.monotonic()
+
+    def _download() -> None:
+        try:
+            download_audio_and_info(p, force=force, progress_hooks=[progress.hook])
+            progress.finish()
+        except BaseException as e:
+            progress.finish(e)
+
+    def _encode(i: int) -> None:
+        end = tracks[i - 1].end
+        needed = end if end is not None else duration
+        src = progress.wait_until(needed + STREAM_MARGIN_SEC + duration * STREAM_MARGIN_FRACTION, duration)
+        if progress.error:
+            return
+        options = dict(tracks=tracks, formats=[dict(f, only={i}) for f in p.formats], mode="per-track",
+                       timeout=p.job_timeout)
+        try:
+            dests = cut_formats(src=src or final, **options)
+            # ffmpeg exits 0 when the partial file ends before -to: check the length, not just the status
+            short = src is not None and _short_outputs(dests, tracks, i, duration)
+        except subprocess.CalledProcessError:
+            if src is None:
+                raise
+            short = True  # the partial file was not readable far enough (or was renamed)
+        if short:
+            print(f" · track {i}: the partial download did not cover it; cutting again from the finished file")
+            progress.wait_done()
+            if progress.error:
+                return
+            cut_formats(src=final, **options)
+        with first_lock:
+            if not first_done:
+                first_done.append(time.monotonic() - t0)
+                print(f"✔ first track ready after {first_done[0]:.1f}s")
+
+    first_done: List[float] = []
+    first_lock = threading.Lock()
+    downloader = threading.Thread(target=_download, name="download", daemon=True)
+    downloader.start()
+    with ThreadPoolExecutor(max_workers=jobs or p.jobs) as pool:
+        futures = [pool.submit(_encode, i) for i in range(1, len(tracks) + 1)]
+        downloader.join()
+        if progress.error:
+            for f in futures:
+                f.cancel()
+            raise progress.error
+        for f in futures:
+            f.result()
+
+    manifest = Manifest(p.manifest_path())
+    source = file_digest(final, cache=p.cache)
+    per_format = []
+    for fmt in p.formats:
+        dests = output_paths(tracks=tracks, outdir=str(fmt["outdir"]), filename_template=fmt["filename_template"],
+                             codec=fmt["codec"])
+        for dest, key in zip(dests, _encode_keys(p, tracks, source, fmt["codec"])):
+            manifest.record(dest, "encode", key)
+        per_format.append(dests)
+    _record_streamed(p, manifest, tracks, source)
+    _tag_tracks(p, per_format, manifest=manifest)
+    print(f"✔ {len(tracks)} tracks in {time.monotonic() - t0:.1f}s")
+    return [f for files in per_format for f in files]
 
 
 # -------------------- helpers --------------------
 
-def download_audio_and_info(p: Project, *, force: bool = False):
+def _stream_key(tracks: Tracklist) -> str:
+    """Digest of a tracklist without its last end (a stream closes it at yt-dlp's duration, a run at the file's)."""
+    rows = tracks.to_dicts()
+    if rows:
+        rows[-1] = {k: v for k, v in rows[-1].items() if k != "end"}
+    return digest(rows)
+
+
+def _record_streamed(p: Project, manifest: Manifest, tracks: Tracklist, source: str) -> None:
+    """
+    Note that `tracks` were cut unrefined (there is no audio to refine
+    against while streaming), so later runs keep these boundaries instead of
+    moving every cut and re-encoding every track.
+    """
+    manifest.record(str(p.tracklist_json_path()), "streamed", {"tracks": _stream_key(tracks), "source": source})
+
+
+def _was_streamed(p: Project, tracks: Tracklist) -> bool:
+    """Whether a streamed run already cut `tracks` from the current source (see _record_streamed)."""
+    entry = Manifest(p.manifest_path()).outputs.get(str(p.tracklist_json_path()), {}).get("streamed")
+    return bool(entry) and entry.get("tracks") == _stream_key(tracks) \
+        and entry.get("source") == file_digest(p.source_audio_path(), cache=p.cache)
+
+
+def _short_outputs(dests: List[List[str]], tracks: Tracklist, i: int, duration: float) -> bool:
+    """Whether any format's file for track `i` is missing or shorter than the track (by STREAM_SHORT_SEC)."""
+    t = tracks[i - 1]
+    expected = (t.end_ms if t.end_ms is not None else duration * 1000) - t.start_ms
+    for files in dests:
+        path = files[i - 1]
+        if not Path(path).exists() or probe_duration(path) * 1000 < expected - STREAM_SHORT_SEC * 1000:
+            return True
+    return False
+
+
+def _merge_cfg(base: Dict, overrides: Dict) -> Dict:
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_cfg(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _write_tracklist(p: Project, tracks: Tracklist) -> None:
+    """Write tracklist.json/csv and album.cue, leaving them alone when the tracklist is unchanged."""
+    path = p.tracklist_json_path()
+    rows = tracks.to_dicts()
+    if path.exists() and p.tracklist_csv_path().exists() and (p.dir / "album.cue").exists():
+        try:
+            if json.loads(path.read_text(encoding="utf-8")) == rows:
+                return
+        except ValueError:
+            pass
+    write_json(path, rows)
+    write_csv(p.tracklist_csv_path(), tracks)
+    export_cue(p, tracks)
+
+
+def _encode_settings(p: Project, codec: str) -> Dict:
+    """Everything besides the track itself that changes the encoded bytes (normalize never touches copies)."""
+    return {"codec": codec, "normalize": None if codec == "copy" else p.normalize}
+
+
+@traced("loudness")
+def _loudness_filters(p: Project, tracks: Tracklist, indices, *, jobs: int) -> Dict[int, str]:
+    """Per-track -af gain for the tracks about to be encoded, from cached loudness measurements."""
+    norm = p.normalize
+    if not norm or not indices:
+        return {}
+    src = str(p.source_audio_path())
+    target = norm["target"]
+    if norm["mode"] == "album":
+        measured = measure_loudness(src, target=target, cache=p.cache)
+        if not math.isfinite(measured["input_i"]):
+            return {}
+        gain = album_gain_filter(measured, target=target)
+        print(f"album loudness {measured['input_i']:.1f} LUFS → {gain}")
+        return {i: gain for i in indices}
+    rate = probe_sample_rate(src, cache=p.cache)
+    measured = measure_tracks(src, tracks, indices=sorted(indices), jobs=jobs, target=target, cache=p.cache)
+    return {
+        i: loudnorm_filter(m, sample_rate=rate, target=target)
+        for i, m in measured.items() if math.isfinite(m["input_i"])
+    }
+
+
+def _encode_keys(p: Project, tracks: Tracklist, source: str, codec: str) -> List[Dict]:
+    """Manifest inputs of each track's encode in `codec`."""
+    settings = digest(_encode_settings(p, codec))
+    return [
+        {"track": digest(t.to_dict()), "index": i, "settings": settings, "source": source}
+        for i, t in enumerate(tracks, start=1)
+    ]
+
+
+@traced("split")
+def _split_tracks(p: Project, tracks: Tracklist, *, manifest: Manifest,
+                  jobs: Optional[int] = None) -> List[List[str]]:
+    """
+    Encode only the files whose track entry, encode settings or source audio
+    changed since the last run. All encoded formats come from one decode per
+    segment; `codec: copy` is cut on its own. Returns the files per format.
+    """
+    src = p.source_audio_path()
+    if not src.exists():
+        raise FileNotFoundError("Source audio file not found. Run 'run' or download the audio file")
+    source = file_digest(src, cache=p.cache)
+    formats = []
+    for fmt in p.formats:
+        ext = p.output_ext(fmt["codec"])
+        dests = output_paths(tracks=tracks, outdir=str(fmt["outdir"]), filename_template=fmt["filename_template"],
+                             codec=fmt["codec"], ext=ext)
+        keys = _encode_keys(p, tracks, source, fmt["codec"])
+        stale = {i for i, (dest, key) in enumerate(zip(dests, keys), start=1)
+                 if not manifest.is_current(dest, "encode", key)}
+        formats.append(dict(fmt, ext=ext, dests=dests, keys=keys, only=stale))
+
+    # outputs from an earlier tracklist that this one no longer produces (e.g. renamed titles)
+    current = {d for f in formats for d in f["dests"]}
+    dirs = {f["outdir"] for f in formats}
+    for old in [d for d in manifest.outputs if Path(d).parent in dirs and d not in current]:
+        Path(old).unlink(missing_ok=True)
+        manifest.forget(old)
+
+    todo = sum(len(f["only"]) for f in formats)
+    if not todo:
+        print("✔ all tracks up to date — nothing to encode")
+        return [f["dests"] for f in formats]
+    across = f" across {len(formats)} formats" if len(formats) > 1 else ""
+    print(f"encoding {todo} of {len(tracks) * len(formats)} file(s){across}")
+    options = dict(jobs=jobs or p.jobs, mode=p.split_mode, timeout=p.job_timeout)
+
+    # stream copies first: cheap, and never filtered (normalize only applies to the encoded formats)
+    for f in formats:
+        if f["codec"] != "copy" or not f["only"]:
+            continue
+        cut_tracks, errors = snap_to_packets(str(src), tracks)
+        _report_boundaries([(i, f["dests"][i - 1], errors[i - 1]) for i in sorted(f["only"])], manifest)
+        cut_formats(
+            src=str(src),
+            tracks=cut_tracks,
+            formats=[f],
+            on_done=lambda _, i, dest, keys=f["keys"]: manifest.record(dest, "encode", keys[i - 1]),
+            **options,
+        )
+    encoded = [f for f in formats if f["codec"] != "copy" and f["only"]]
+    if encoded:
+        stale_tracks = set().union(*(f["only"] for f in encoded))
+        cut_formats(
+            src=str(src),
+            tracks=tracks,
+            formats=encoded,
+            filters=_loudness_filters(p, tracks, stale_tracks, jobs=jobs or p.jobs),
+            on_done=lambda fi, i, dest: manifest.record(dest, "encode", encoded[fi]["keys"][i - 1]),
+            **options,
+        )
+    return [f["dests"] for f in formats]
+
+
+def _report_boundaries(rows, manifest: Manifest) -> None:
+    """Print how far each stream-copy cut lands from the requested time and keep it in the manifest."""
+    print("stream copy boundaries (snapped − requested):")
+    for i, dest, (start_err, end_err) in rows:
+        end = f"{end_err * 1000:+7.1f} ms" if end_err is not None else "    (eof)"
+        print(f"  {i:02d}  start {start_err * 1000:+7.1f} ms  end {end}  {Path(dest).name}")
+        manifest.record(dest, "boundary_error", [start_err, end_err])
+
+
+def _tag_options(p: Project, jobs: Optional[int] = None) -> Dict:
+    return {
+        "jobs": jobs or max(4, p.jobs),
+        "max_cover_size": p.cover_max_size,
+        "cache_dir": p.cache.root / "artwork",
+    }
+
+
+def _tag_tracks(p: Project, per_format: List[List[str]], *, manifest: Manifest) -> None:
+    """
+    Tag the files (of every format, in one pass) whose album metadata, cover
+    or track number changed; fresh encodes always qualify.
+    """
+    from smart_splitter.audio.tags import apply_tags
+    album = digest({"metadata": p.metadata, "cover": file_key(p.cover) if p.cover else None, "size": p.cover_max_size})
+    todo = [(i, f) for files in per_format for i, f in enumerate(files, start=1)
+            if not manifest.is_current(f, "tags", digest([album, i]))]
+    if not todo:
+        return
+    apply_tags([f for _, f in todo], p.metadata, cover=p.cover, track_numbers=[i for i, _ in todo], **_tag_options(p))
+    for i, f in todo:
+        manifest.record(f, "tags", digest([album, i]))
+
+
+@traced()
+def download_audio_and_info(p: Project, *, force: bool = False, progress_hooks: Optional[List] = None):
     if shutil.which("ffmpeg") is None:
         raise RuntimeError("ffmpeg not found in PATH")
-    if YoutubeDL is None:
+    if _youtube_dl() is None:
         raise RuntimeError("yt-dlp not installed. Add it to requirements and pip install.")
 
     if p.source_audio_path().exists() and not force:
         print("✔ audio exists — skipping download (use --force to redownload)")
         return
 
+    target = p.source_audio_path()
+    video_id = _ytdlp_info(p.url, cache=p.cache, ttl=p.info_ttl).get("id") if p.store else None
+    if video_id:
+        # shared store: one download per video id across projects, linked in here
+        def _download(tmp: Path) -> Path:
+            downloaded = _ytdlp_download(p, tmp, progress_hooks)
+            for info_json in tmp.glob("*.info.json"):
+                shutil.move(str(info_json), str(p.dir / info_json.name))
+            return downloaded
+
+        entry = p.store.fetch(video_id, target, _download, force=force)
+        print(f"✔ source {video_id} from store ({entry['sha256'][:12]}):", target)
+        return
+
+    downloaded = _ytdlp_download(p, p.dir, progress_hooks)
+    # normalize filename to source.m4a if necessary
+    if downloaded != target and downloaded.exists():
+        downloaded.rename(target)
+
+    print("✔ downloaded:", target)
+
+# cover frames only: no audio, and nothing larger than embedded art needs
+VIDEO_FORMAT = "bestvideo[height<=1080]/best[height<=1080]/bestvideo/best"
+
+def _ytdlp_download(p: Project, outdir: Path, progress_hooks: Optional[List] = None, *,
+                    video: bool = False) -> Path:
+    """Download the best audio (or, with `video`, video-only stream) of `p.url` to `outdir/<source|video>.<ext>`."""
+    name = "video" if video else "source"
     ydl_opts = {
         "quiet": True,
-        "format": "bestaudio[ext=m4a]/bestaudio/best",
-        "outtmpl": str(p.dir / "source.%(ext)s"),
+        "format": VIDEO_FORMAT if video else "bestaudio[ext=m4a]/bestaudio/best",
+        "outtmpl": str(outdir / f"{name}.%(ext)s"),
         "writesubtitles": False,
-        "writeinfojson": True,
+        "writeinfojson": not video,
         "skip_download": False,
     }
-    with YoutubeDL(ydl_opts) as ydl:
+    if progress_hooks:
+        ydl_opts["progress_hooks"] = progress_hooks
+    with _youtube_dl()(ydl_opts) as ydl:
         info = ydl.extract_info(p.url, download=True)
-        # normalize filename to source.m4a if necessary
-        downloaded = p.dir / f"source.{info.get('ext','m4a')}"
-        target = p.source_audio_path()
-        if downloaded != target and downloaded.exists():
-            downloaded.rename(target)
+        if info and not video:
+            p.cache.set("ytdlp", p.url, ydl.sanitize_info(info))
+    return outdir / f"{name}.{info.get('ext','m4a')}"
 
-    print("✔ downloaded:", target)
+def _video_source(p: Project, *, force: bool = False) -> Path:
+    """The project's `video.<ext>`, downloaded on first use and reused by every later cover/snapshot."""
+    existing = [f for f in sorted(p.dir.glob("video.*")) if f.suffix not in (".part", ".ytdl", ".json")]
+    if existing and not force:
+        return existing[0]
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found in PATH")
+    if _youtube_dl() is None:
+        raise RuntimeError("yt-dlp not installed. Add it to requirements and pip install.")
+    if not p.url:
+        raise ValueError("source.url is not set: no video to take a cover from")
+    for f in existing:
+        f.unlink()
+    path = _ytdlp_download(p, p.dir, video=True)
+    print("✔ downloaded video:", path)
+    return path
 
-def _ytdlp_info(url: str) -> Dict:
+@traced("yt-dlp info")
+def _ytdlp_info(url: str, *, cache: Optional[Cache] = None, ttl: Optional[float] = None) -> Dict:
+    if cache:
+        hit = cache.get("ytdlp", url, ttl=ttl)
+        if hit is not None:
+            return hit
+    YoutubeDL = _youtube_dl()
     if YoutubeDL is None:
         return {}
     with YoutubeDL({"quiet": True}) as ydl:
         try:
-            return ydl.extract_info(url, download=False) or {}
+            info = ydl.extract_info(url, download=False) or {}
         except Exception:
             return {}
+        if info and cache:
+            info = ydl.sanitize_info(info)
+            cache.set("ytdlp", url, info)
+        return info
+
 
+@traced()
+def resolve_tracklist(p: Project, *, duration_hint: Optional[float] = None) -> Tracklist:
+    """
+    Tracklist from project.yml or the preferred sources. The sources run
+    concurrently under `source.deadline`; each result is scored (see
+    parsers.score) and the best wins, returning as soon as one is good.
+    Sources still running then are told to stop (comment paging and audio
+    decodes check between pages/chunks) and run in daemon threads, so they
+    never keep the command alive past the deadline. Without local audio, `duration_hint` (e.g. yt-dlp's duration) closes
+    the last track.
+    """
+    total = probe_duration(str(p.source_audio_path()), cache=p.cache) if p.source_audio_path().exists() else duration_hint
 
-def resolve_tracklist(p: Project) -> List[Dict[str, str]]:
     # 1) project.yml beats everything
     cfg_tracks = p.cfg.get("tracklist")
     if cfg_tracks:
-        return normalize_track_ends(
-            cfg_tracks,
-            total_duration=probe_duration(str(p.source_audio_path())) if p.source_audio_path().exists() else None
-        )
+        return _refine(p, normalize_track_ends(Tracklist.from_dicts(cfg_tracks), total_duration=total))
+
+    # 2) a recording another project already split: reuse its tracklist
+    fp_opts = p.fingerprint_options
+    if fp_opts is not None and p.source_audio_path().exists():
+        matched = _library_match(p, fp_opts["library"], total=total)
+        if matched:
+            return _refine(p, normalize_track_ends(matched, total_duration=total))
+
+    # 3) every preferred source at once, against one shared yt-dlp info fetch
+    order = list(p.preferred_sources or ["description", "comments", "transcript"])
+    stop = threading.Event()
+    info = _daemon("detect-info", _ytdlp_info, p.url, cache=p.cache, ttl=p.info_ttl)
+
+    def _duration() -> Optional[float]:
+        if total:
+            return total
+        if info.done() and not info.exception():
+            return info.result().get("duration")
+        return None
+
+    futures = {_daemon(f"detect-{src}", _source_tracks, p, src, info, total, stop=stop): src for src in order}
+    candidates: Dict[str, Dict] = {}
+
+    def _take(fut) -> Optional[Dict]:
+        src = futures[fut]
+        try:
+            tracks = fut.result()
+        except Exception as e:
+            print(f"! {src}: {e}")
+            return None
+        if not tracks:
+            return None
+        scored = score_tracklist(tracks, duration=_duration())
+        candidates[src] = {"tracks": tracks, **scored}
+        print(f" · {src}: {len(tracks)} tracks, score {scored['score']:.2f}")
+        return candidates[src]
+
+    try:
+        for fut in as_completed(futures, timeout=p.detect_deadline):
+            got = _take(fut)
+            if got and got["score"] >= GOOD_SCORE:
+                # good enough: don't wait for slower sources, but weigh any that already finished
+                for other in futures:
+                    if other is not fut and other.done() and futures[other] not in candidates:
+                        _take(other)
+                break
+    except FutureTimeout:
+        print(f"! source deadline ({p.detect_deadline:g}s) reached; using the best tracklist so far")
+    finally:
+        stop.set()
+
+    # 4) nothing plausible: fall back to the audio itself (novelty cuts when fingerprinting is on, silence if allowed)
+    best = _best_candidate(candidates, order)
+    if (best is None or best["score"] < GOOD_SCORE / 2) and p.source_audio_path().exists():
+        fallbacks = [src for src, on in (("fingerprint", fp_opts is not None), ("silence", p.fallback_silence))
+                     if on and src not in order]
+        for src in fallbacks:
+            tracks = _source_tracks(p, src, info, total)
+            if tracks:
+                candidates[src] = {"tracks": tracks, **score_tracklist(tracks, duration=total)}
+                print(f" · {src}: {len(tracks)} tracks, score {candidates[src]['score']:.2f}")
+        best = _best_candidate(candidates, order + fallbacks)
+
+    tracks = best["tracks"] if best else Tracklist()
+    tracks = normalize_track_ends(tracks, total_duration=total)
+    return _refine(p, tracks)
+
+
+def _source_tracks(p: Project, src: str, info, total: Optional[float] = None, *,
+                   stop: Optional[threading.Event] = None) -> Tracklist:
+    """
+    Tracklist from one source; `info` is the shared future of the yt-dlp
+    info fetch. Setting `stop` ends comment paging and audio decodes early.
+    """
+    if src == "description":
+        meta = info.result()
+        desc = meta.get("description") or ("" if meta else extract_description_via_ytdlp(p.url))
+        return extract_from_description(desc)
 
-    tracks: List[Dict[str, str]] = []
-    info = _ytdlp_info(p.url)
+    if src == "comments":
+        meta = info.result()
+        opts = p.comment_options
+        comments = _pinned_first(meta["comments"]) if meta.get("comments") else _ytdlp_comments(p, opts, stop=stop)
+        return extract_from_comments(comments, duration=total or meta.get("duration"),
+                                     max_comments=opts["max_comments"], max_bytes=opts["max_kb"] * 1024)
 
-    # 2) try sources in preferred order
-    for src in (p.preferred_sources or ["description", "comments", "transcript"]):
-        if src == "description":
-            desc = info.get("description") or extract_description_via_ytdlp(p.url)
-            if desc:
-                tracks = extract_from_description(desc)
+    if src == "transcript":
+        vtt_path = p.cfg.get("source", {}).get("vtt_path")
+        if not vtt_path:
+            return Tracklist()
+        stamps, gaps = scan_transcript(vtt_path=vtt_path)
+        if gaps:
+            # pauses in the captions split the whole video, so the first track starts at 0
+            gaps = Tracklist([Track(0, title="Candidate")] + list(gaps)) if gaps[0].start_ms else gaps
+            duration = total or (info.result().get("duration") if info.done() else None)
+            if score_tracklist(gaps, duration=duration)["score"] > score_tracklist(stamps, duration=duration)["score"]:
+                return gaps
+        return stamps
 
-        elif src == "comments":
-            comments = []
-            for c in info.get("comments", []) or []:
-                txt = c.get("text") or c.get("body") or ""
-                if txt:
-                    comments.append(txt)
-            if comments:
-                tracks = extract_from_comments(comments)
+    if src == "silence" and p.source_audio_path().exists():
+        return _silence_tracks(p, stop=stop)
+    if src == "fingerprint" and p.source_audio_path().exists():
+        return _fingerprint_tracks(p, stop=stop)
+    return Tracklist()
 
-        elif src == "transcript":
-            vtt_path = p.cfg.get("source", {}).get("vtt_path")
-            tr = extract_from_transcript(vtt_path=vtt_path) if vtt_path else []
-            if tr:
-                tracks = tr
 
-        elif src == "silence":
-            if p.source_audio_path().exists():
-                tracks = suggest_cuts_from_silence(str(p.source_audio_path()))
+def _best_candidate(candidates: Dict[str, Dict], order: List[str]) -> Optional[Dict]:
+    """Highest score; ties go to a track count other sources agree on, then to the preferred source."""
+    if not candidates:
+        return None
 
-        if tracks:
-            break
+    def rank(src: str):
+        c = candidates[src]
+        agree = sum(len(o["tracks"]) == len(c["tracks"]) for s, o in candidates.items() if s != src)
+        return (round(c["score"], 2), agree, -order.index(src) if src in order else -len(order))
 
-    # 3) fallback to silence if nothing yet and allowed
-    if not tracks and p.fallback_silence and p.source_audio_path().exists():
-        tracks = suggest_cuts_from_silence(str(p.source_audio_path()))
+    return candidates[max(candidates, key=rank)]
 
-    total = probe_duration(str(p.source_audio_path())) if p.source_audio_path().exists() else None
-    return normalize_track_ends(tracks, total_duration=total)
 
+def _daemon(name: str, fn, *args, **kwargs) -> Future:
+    """Run `fn` in a daemon thread and return its Future; unlike a pool worker it never delays interpreter exit."""
+    fut: Future = Future()
 
-def __load_tracklist(p: Project) -> List[Dict[str, str]]:
+    def _run() -> None:
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=_run, name=name, daemon=True).start()
+    return fut
+
+
+def _silence_tracks(p: Project, *, stop: Optional[threading.Event] = None) -> Tracklist:
+    from smart_splitter.parsers.silence import suggest_cuts_from_silence
+    return suggest_cuts_from_silence(str(p.source_audio_path()), **p.silence_options, stop=stop)
+
+
+def _fingerprint_tracks(p: Project, *, stop: Optional[threading.Event] = None) -> Tracklist:
+    from smart_splitter.audio.fingerprint import load_fingerprint, suggest_cuts_from_novelty
+    opts = p.fingerprint_options or {}
+    cut = {key: float(opts[key]) for key in ("min_gap", "threshold") if key in opts}
+    return suggest_cuts_from_novelty(load_fingerprint(str(p.source_audio_path()), stop=stop), **cut)
+
+
+def _library_match(p: Project, library: Path, *, total: Optional[float] = None) -> Optional[Tracklist]:
+    """
+    The tracklist of the project under `library` whose audio best matches
+    this source, shifted onto this source's timeline; None without a match.
+    Builds this source's fingerprint index if needed (which also adds it to
+    the library); other projects count once they have a tracklist.json and
+    an index that is current for their source audio.
+    """
+    from smart_splitter.audio.fingerprint import fingerprint_path, load_fingerprint, match_fingerprint
+    src = p.source_audio_path()
+    query = load_fingerprint(str(src))
+    best = None
+    for tracklist in sorted(Path(library).glob("*/tracklist.json")):
+        other = tracklist.parent
+        index = fingerprint_path(str(other / src.name))
+        if other.resolve() == p.dir.resolve() or not index.exists():
+            continue
+        try:
+            ref = load_fingerprint(str(other / src.name), build=False)
+        except OSError:
+            continue
+        found = ref and match_fingerprint(query, ref)
+        if found and (best is None or found["ratio"] > best[1]["ratio"]):
+            best = (tracklist, found)
+    if best is None:
+        return None
+
+    tracklist, found = best
+    offset = found["offset_ms"]
+    total_ms = int((total or query.duration) * 1000)
+    shifted = Tracklist()
+    for t in Tracklist.from_dicts(json.loads(tracklist.read_text(encoding="utf-8"))):
+        start = t.start_ms - offset
+        end = None if t.end_ms is None else min(t.end_ms - offset, total_ms)
+        if start < total_ms and (end is None or end > 0):
+            shifted.append(t.replace(start_ms=max(0, start), end_ms=end))
+    print(f"✔ fingerprint matches {tracklist.parent.name} ({found['ratio']:.0%} of frames, "
+          f"offset {offset / 1000:+.2f}s); reusing its {len(shifted)} tracks")
+    return shifted or None
+
+
+def _refine(p: Project, tracks: Tracklist) -> Tracklist:
+    """
+    Snap boundaries to the quietest nearby audio when `source.refine` is on,
+    the audio is here and a streamed run has not already cut these tracks.
+    """
+    window = p.refine_window
+    if not window or not tracks or not p.source_audio_path().exists():
+        return tracks
+    if _was_streamed(p, tracks):
+        print(" · keeping the boundaries the streamed run cut (refine applies once the tracklist changes)")
+        return tracks
+    from smart_splitter.audio.refine import refine_boundaries
+    return refine_boundaries(str(p.source_audio_path()), tracks, window=window, jobs=max(4, p.jobs), cache=p.cache)
+
+
+def __load_tracklist(p: Project) -> Tracklist:
     path = p.tracklist_json_path()
     if path.exists():
-        return json.loads(path.read_text(encoding="utf-8"))
+        return Tracklist.from_dicts(json.loads(path.read_text(encoding="utf-8")))
     raise FileNotFoundError("tracklist.json not found. Run detect or run first.")
 
 
-def normalize_track_ends(tracks: List[Dict[str, str]], *, total_duration: Optional[float]) -> List[Dict[str, str]]:
-    """Ensure each item has start and optional end. Fill the last end with total_duration if available."""
-    def to_seconds(ts: str) -> int:
-        hh, mm, ss = [int(x) for x in ts.split(":")]
-        return hh * 3600 + mm * 60 + ss
-
-    # sort by start
-    tracks2 = sorted(tracks, key=lambda t: to_seconds(t["start"]))
-    for i, t in enumerate(tracks2):
-        if "end" not in t or not t["end"]:
-            if i < len(tracks2) - 1:
-                t["end"] = tracks2[i + 1]["start"]
-            elif total_duration is not None:
-                # format total as HH:MM:SS
-                td = int(total_duration)
-                hh = td // 3600
-                mm = (td % 3600) // 60
-                ss = td % 60
-                t["end"] = f"{hh:02d}:{mm:02d}:{ss:02d}"
-    # add titles if missing
-    for idx, t in enumerate(tracks2, start=1):
-        t.setdefault("title", f"Track {idx}")
-    return tracks2
+def normalize_track_ends(tracks: Tracklist, *, total_duration: Optional[float]) -> Tracklist:
+    """Sort by start and close every open end (the last one at total_duration, if known); untitled tracks get "Track N"."""
+    total_ms = int(total_duration * 1000) if total_duration is not None else None
+    return Tracklist.from_dicts(tracks).closed(total_ms)
+
+
+# the first page is small: the tracklist is nearly always pinned or a top comment
+COMMENT_PAGES = (50, 200)
+
+def _ytdlp_comments(p: Project, opts: Dict, *, stop: Optional[threading.Event] = None):
+    """
+    Yield top-level comments of `p.url` page by page (pinned and uploader's
+    first), fetching a larger page only when the caller asks for more.
+    yt-dlp cannot resume a comment thread, so each page re-reads the ones
+    before it; the pages stay small and capped at `max_comments`. No further
+    page is fetched once `stop` is set.
+    """
+    YoutubeDL = _youtube_dl()
+    if YoutubeDL is None:
+        return
+    sent = 0
+    limits = sorted({min(n, opts["max_comments"]) for n in COMMENT_PAGES + (opts["max_comments"],)})
+    for limit in limits:
+        if stop is not None and stop.is_set():
+            return
+        comments = p.cache.get("ytdlp-comments", f"{limit}:{opts['sort']}:{p.url}", ttl=p.info_ttl)
+        if comments is None:
+            ydl_opts = {
+                "quiet": True,
+                "skip_download": True,
+                "getcomments": True,
+                # top-level comments only, newest or top first
+                "extractor_args": {"youtube": {"comment_sort": [opts["sort"]], "max_comments": [str(limit), "all", "0"]}},
+            }
+            with YoutubeDL(ydl_opts) as ydl:
+                try:
+                    info = ydl.extract_info(p.url, download=False) or {}
+                except Exception:
+                    return
+            comments = [{k: c.get(k) for k in ("text", "is_pinned", "author_is_uploader", "like_count")}
+                        for c in info.get("comments") or []]
+            p.cache.set("ytdlp-comments", f"{limit}:{opts['sort']}:{p.url}", comments)
+        page = _pinned_first(comments) if not sent else comments
+        yield from page[sent:]
+        if len(comments) < limit:
+            return
+        sent = len(comments)
 
+def _pinned_first(comments: List[Dict]) -> List[Dict]:
+    return sorted(comments, key=lambda c: (not c.get("is_pinned"), not c.get("author_is_uploader")))
 
 def extract_description_via_ytdlp(url: str) -> str:
+    YoutubeDL = _youtube_dl()
     if YoutubeDL is None:
         return ""
     with YoutubeDL({"quiet": True}) as ydl:
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# writes between full scans of the cache directory, which also catch what
+# other processes sharing the directory wrote
+EVICT_EVERY = 64
+
+
+class Cache:
+    """
+    Small JSON cache on disk: one file per entry under `root/<namespace>/`.
+
+    Entries can expire (the `ttl` seconds passed to `get`) and the whole
+    directory is kept under `max_bytes` by evicting the least recently used
+    entries (reads refresh an entry's mtime). The size is tracked from this
+    process's writes and rescanned every EVICT_EVERY writes, or as soon as
+    the estimate goes over.
+    """
+
+    def __init__(self, root: Path | str, *, max_bytes: int = 64 * 1024 * 1024, enabled: bool = True):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None  # bytes on disk as of the last scan, plus writes since
+        self._writes = 0
+
+    def _path(self, namespace: str, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.root / namespace / f"{digest}.json"
+
+    def get(self, namespace: str, key: str, *, ttl: Optional[float] = None) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        path = self._path(namespace, key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key:
+            return None
+        if ttl is not None and time.time() - entry.get("created", 0) > ttl:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # a unique temp file per writer: threads of one process may store the same key at once
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "created": time.time(), "value": value}, f, default=str)
+                written = f.tell()
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += written
+            scan = self._size is None or self._size > self.max_bytes or self._writes >= EVICT_EVERY
+            if scan:
+                self._writes = 0
+        if scan:
+            self._evict()
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        base = self.root / namespace if namespace else self.root
+        for f in base.rglob("*.json") if base.exists() else []:
+            f.unlink(missing_ok=True)
+        with self._lock:
+            self._size = None
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for f in self.root.rglob("*.json"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+            total += st.st_size
+        if total > self.max_bytes:
+            for _, size, f in sorted(entries):
+                f.unlink(missing_ok=True)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        with self._lock:
+            self._size = total
+
+
+def file_key(path: Path | str) -> Optional[str]:
+    """Cache key for a local file: resolved path, size and mtime."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return f"{Path(path).resolve()}|{st.st_size}|{st.st_mtime_ns}"
@@ -2,9 +2,11 @@ from __future__ import annotations
 import csv
 import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict
 import yaml
 
+from smart_splitter.tracks import Tracklist, format_ts
+
 
 def ensure_dir(path: Path | str) -> None:
     Path(path).mkdir(parents=True, exist_ok=True)
@@ -18,17 +20,17 @@ def write_json(path: Path, data: Any) -> None:
     Path(path).write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 
-def write_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
-    if not rows:
+def write_csv(path: Path, tracks: Tracklist) -> None:
+    if not tracks:
         Path(path).write_text("", encoding="utf-8")
         return
     with open(path, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=["index", "title", "start", "end"])
         w.writeheader()
-        for i, r in enumerate(rows, start=1):
+        for i, t in enumerate(tracks, start=1):
             w.writerow({
                 "index": i,
-                "title": r.get("title", f"Track {i}"),
-                "start": r.get("start", ""),
-                "end": r.get("end", ""),
+                "title": t.title or f"Track {i}",
+                "start": format_ts(t.start_ms),
+                "end": format_ts(t.end_ms) if t.end_ms is not None else "",
             })
\ No newline at end of file
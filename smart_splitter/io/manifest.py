@@ -0,0 +1,82 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from smart_splitter.io.cache import Cache, file_key
+
+
+def digest(obj: Any) -> str:
+    """Stable short hash of any JSON-serialisable value."""
+    blob = json.dumps(obj, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()
+
+
+def file_digest(path: Path | str, *, cache: Optional[Cache] = None) -> str:
+    """sha256 of a file's content, remembered per path/size/mtime so big sources are hashed once."""
+    key = file_key(path)
+    if cache and key:
+        hit = cache.get("sha256", key)
+        if hit:
+            return hit
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    value = h.hexdigest()
+    if cache and key:
+        cache.set("sha256", key, value)
+    return value
+
+
+class Manifest:
+    """
+    Per-project record of what produced each output file.
+
+    Every output maps to the hashes of its inputs per stage, e.g.
+    {"encode": {...}, "tags": "..."}. A stage is current when the file still
+    exists and the recorded hashes equal the new ones. Each record is
+    written to disk immediately, so an interrupted run resumes after the
+    last finished file.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        self.outputs: Dict[str, Dict[str, Any]] = data.get("outputs", {})
+
+    def is_current(self, dest: str, stage: str, value: Any) -> bool:
+        entry = self.outputs.get(dest)
+        return bool(entry) and entry.get(stage) == value and Path(dest).exists()
+
+    def record(self, dest: str, stage: str, value: Any) -> None:
+        with self._lock:
+            entry = self.outputs.setdefault(dest, {})
+            entry[stage] = value
+            if stage == "encode":
+                # a fresh encode has no tags yet
+                entry.pop("tags", None)
+            self._save()
+
+    def forget(self, dest: str) -> None:
+        with self._lock:
+            if self.outputs.pop(dest, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "outputs": self.outputs}, f, indent=2)
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,213 @@
+"""
+Content-addressed store for downloaded sources, shared by every project.
+
+    <root>/objects/<sha256[:2]>/<sha256>   the audio, written once
+    <root>/ids/<video id>.json             {"sha256", "ext", "size"}
+    <root>/refs/<sha256>/<key>.json        one per project file linked to it
+    <root>/locks/<video id>.lock           held while an id is being fetched
+
+Projects get their `source.m4a` as a reflink (copy-on-write clone) where
+the filesystem supports it, else a hardlink, else a plain copy. `gc`
+removes objects no project file refers to any more.
+"""
+from __future__ import annotations
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except Exception:
+    fcntl = None
+
+from smart_splitter.io.manifest import file_digest
+
+STORE_ENV = "SMART_SPLITTER_STORE"
+# linux/fs.h FICLONE: clone src_fd's extents into dst_fd (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+
+class Store:
+    def __init__(self, root: Path | str):
+        self.root = Path(root).expanduser().resolve()
+        for sub in ("objects", "ids", "refs", "locks", "tmp"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+
+    def object_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / sha
+
+    def _id_path(self, video_id: str) -> Path:
+        return self.root / "ids" / f"{_safe(video_id)}.json"
+
+    def lookup(self, video_id: str) -> Optional[Dict]:
+        """The stored entry for `video_id`, or None if absent or its object is gone."""
+        try:
+            entry = json.loads(self._id_path(video_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return entry if self.object_path(entry["sha256"]).exists() else None
+
+    @contextlib.contextmanager
+    def lock(self, video_id: str) -> Iterator[None]:
+        """Exclusive per-id lock across processes, so one id is fetched once at a time."""
+        with open(self.root / "locks" / f"{_safe(video_id)}.lock", "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def add(self, video_id: str, path: Path | str) -> Dict:
+        """Move a finished download into the store (deduplicated by content) and index it under `video_id`."""
+        path = Path(path)
+        sha = file_digest(path)
+        dest = self.object_path(sha)
+        if dest.exists():
+            path.unlink()
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, dest)
+            os.utime(dest)  # yt-dlp backdates files; gc's grace period counts from arrival
+            os.chmod(dest, 0o444)  # shared by hardlinks: never edit in place
+        entry = {"sha256": sha, "ext": path.suffix.lstrip("."), "size": dest.stat().st_size}
+        _write_json(self._id_path(video_id), entry)
+        return entry
+
+    def fetch(self, video_id: str, dest: Path | str, download: Callable[[Path], Path], *,
+              force: bool = False) -> Dict:
+        """
+        Make `dest` the stored source for `video_id`. On a miss (or with
+        `force`) `download(tmpdir)` is called under the id's lock and must
+        return the downloaded file; concurrent callers for the same id wait
+        for it and then link the same object.
+        """
+        with self.lock(video_id):
+            entry = None if force else self.lookup(video_id)
+            if entry is None:
+                tmp = self.root / "tmp" / uuid.uuid4().hex
+                tmp.mkdir()
+                try:
+                    entry = self.add(video_id, download(tmp))
+                finally:
+                    shutil.rmtree(tmp, ignore_errors=True)
+            self.link(entry["sha256"], dest)
+        return entry
+
+    def link(self, sha: str, dest: Path | str) -> str:
+        """Place object `sha` at `dest` (reflink, else hardlink, else copy) and record the ref. Returns the method."""
+        src, dest = self.object_path(sha), Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + _unique(".link"))
+        try:
+            method = _reflink(src, tmp) or _hardlink(src, tmp)
+            if not method:
+                shutil.copyfile(src, tmp)
+                method = "copy"
+            if method != "hardlink":
+                os.chmod(tmp, 0o644)
+            os.replace(tmp, dest)
+        finally:
+            # also after success: renaming a hardlink onto another link of the same object is a no-op
+            tmp.unlink(missing_ok=True)
+        st = dest.stat()
+        ref = self.root / "refs" / sha / (hashlib.sha1(str(dest.resolve()).encode()).hexdigest() + ".json")
+        _write_json(ref, {"path": str(dest.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+        return method
+
+    def gc(self, *, grace_hours: float = 24.0, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete objects with no live ref. A ref is live while its file still
+        exists with the size and mtime recorded when it was linked. Objects
+        younger than `grace_hours` are kept, so a fetch that has not linked
+        its object yet is never raced.
+        """
+        cutoff = time.time() - grace_hours * 3600
+        freed = removed = kept = 0
+        for obj in (self.root / "objects").glob("*/*"):
+            sha = obj.name
+            refs_dir = self.root / "refs" / sha
+            live = False
+            for ref in refs_dir.glob("*.json") if refs_dir.exists() else []:
+                if _ref_live(ref):
+                    live = True
+                elif not dry_run:
+                    ref.unlink(missing_ok=True)
+            if live or obj.stat().st_mtime > cutoff:
+                kept += 1
+                continue
+            removed += 1
+            freed += obj.stat().st_size
+            if not dry_run:
+                obj.unlink()
+                shutil.rmtree(refs_dir, ignore_errors=True)
+        if not dry_run:
+            for id_file in (self.root / "ids").glob("*.json"):
+                with contextlib.suppress(OSError, ValueError, KeyError):
+                    sha = json.loads(id_file.read_text(encoding="utf-8"))["sha256"]
+                    if not self.object_path(sha).exists():
+                        id_file.unlink()
+        return {"removed": removed, "kept": kept, "freed_bytes": freed}
+
+
+def default_store(configured: Optional[str] = None) -> Optional[Store]:
+    """Store from `configured` (project.yml) or $SMART_SPLITTER_STORE; None when neither is set."""
+    root = configured or os.environ.get(STORE_ENV)
+    return Store(root) if root else None
+
+
+def _safe(video_id: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in video_id)
+
+
+def _unique(suffix: str) -> str:
+    """Temp-name suffix no other process or thread can pick (projects sharing an object link it at once)."""
+    return f".{os.getpid()}.{threading.get_ident()}.{uuid.uuid4().hex[:8]}{suffix}"
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + _unique(".tmp"))
+    try:
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _reflink(src: Path, dest: Path) -> Optional[str]:
+    if fcntl is None:
+        return None
+    try:
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return "reflink"
+    except OSError:
+        dest.unlink(missing_ok=True)
+        return None
+
+
+def _hardlink(src: Path, dest: Path) -> Optional[str]:
+    try:
+        os.link(src, dest)
+        return "hardlink"
+    except OSError:
+        return None
+
+
+def _ref_live(ref: Path) -> bool:
+    try:
+        data = json.loads(ref.read_text(encoding="utf-8"))
+        st = Path(data["path"]).stat()
+    except (OSError, ValueError, KeyError):
+        return False
+    return (st.st_size, st.st_mtime_ns) == (data["size"], data["mtime_ns"])
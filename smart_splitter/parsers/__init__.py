@@ -1,5 +1,13 @@
 from .timestamps import parse_timestamps, normalize_hms
 from .description import extract_from_description
 from .comments import extract_from_comments
-from .transcript import extract_from_transcript
-from .silence import suggest_cuts_from_silence
\ No newline at end of file
+from .transcript import extract_from_transcript, iter_cues, scan_transcript
+from .score import score_tracklist
+
+
+def __getattr__(name):
+    # the silence parser pulls in numpy; load it only when it is asked for
+    if name == "suggest_cuts_from_silence":
+        from .silence import suggest_cuts_from_silence
+        return suggest_cuts_from_silence
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,54 @@
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, Optional, Union
 
+from smart_splitter.tracks import Tracklist
 from .timestamps import parse_timestamps
+from .score import GOOD_SCORE, score_tracklist
 
-def extract_from_comments(comments: List[str]) -> List[Dict[str, str]]:
+Comment = Union[str, Dict]
+
+
+def _text(comment: Comment) -> str:
+    if isinstance(comment, str):
+        return comment
+    return comment.get("text") or comment.get("body") or ""
+
+
+def iter_comment_tracklists(comments: Iterable[Comment], *, max_comments: Optional[int] = None,
+                            max_bytes: Optional[int] = None) -> Iterator[Tracklist]:
+    """
+    Yield the timestamps of each comment on its own, in order, skipping
+    comments with fewer than two. `comments` (texts or yt-dlp comment
+    dicts) is consumed lazily and no further than `max_comments` comments
+    or `max_bytes` of text.
+    """
+    seen = size = 0
+    for comment in comments:
+        text = _text(comment)
+        seen += 1
+        size += len(text.encode("utf-8"))
+        if (max_comments and seen > max_comments) or (max_bytes and size > max_bytes):
+            return
+        if text.count(":") < 2:
+            continue
+        tracks = parse_timestamps(text)
+        if len(tracks) >= 2:
+            yield tracks
+
+
+def extract_from_comments(comments: Iterable[Comment], *, duration: Optional[float] = None,
+                          max_comments: Optional[int] = None, max_bytes: Optional[int] = None,
+                          good: float = GOOD_SCORE) -> Tracklist:
     """
-    Parse a list of comment texts (e.g., top/pinned) for timestamps.
-    Caller is responsible for fetching comments (yt-dlp, API, etc.).
-    We simply aggregate and parse.
+    Best tracklist written in a single comment (timestamps from different
+    comments are never mixed). Stops reading at the first comment scoring
+    `good` or better, so put pinned/top comments first.
     """
-    if not comments:
-        return []
-    blob = "\n".join(comments)
-    return parse_timestamps(blob)
\ No newline at end of file
+    best = Tracklist()
+    best_score = 0.0
+    for tracks in iter_comment_tracklists(comments, max_comments=max_comments, max_bytes=max_bytes):
+        score = score_tracklist(tracks, duration=duration)["score"]
+        if score > best_score:
+            best, best_score = tracks, score
+        if score >= good:
+            break
+    return best
@@ -1,9 +1,9 @@
-from typing import List, Dict
 from smart_splitter.parsers.timestamps import parse_timestamps
+from smart_splitter.tracks import Tracklist
 
 
-def extract_from_description(description: str) -> List[Dict[str, str]]:
+def extract_from_description(description: str) -> Tracklist:
     """Extract tracklist from a YouTube description string."""
     if not description:
-        return []
+        return Tracklist()
     return parse_timestamps(description)
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Plausibility of a candidate tracklist, so sources can compete instead of
+the first non-empty one winning. Three checks, each 0..1:
+
+- monotonic: timestamps in the order they were written keep increasing
+- count: track lengths (including the last one, up to the duration) look
+  like songs: not "0:01 0:02" in prose, not one timestamp per hour
+- coverage: the tracklist starts near 0:00 and runs to near the end
+"""
+from typing import Dict, Optional
+
+from smart_splitter.tracks import Tracklist
+
+# at or above this a source is taken without waiting for slower ones
+GOOD_SCORE = 0.8
+MIN_TRACK_SEC = 60.0
+MAX_TRACK_SEC = 20 * 60.0
+LEAD_IN_SEC = 30.0
+
+
+def _within(value: float, low: float, high: float) -> float:
+    if value < low:
+        return max(0.0, value / low)
+    if value > high:
+        return high / value
+    return 1.0
+
+
+def score_tracklist(tracks: Tracklist, *, duration: Optional[float] = None) -> Dict[str, float]:
+    """{"monotonic", "count", "coverage", "score"} for `tracks` in source order; fewer than 2 tracks score 0."""
+    starts = [t.start for t in tracks]
+    if len(starts) < 2:
+        return {"monotonic": 0.0, "count": 0.0, "coverage": 0.0, "score": 0.0}
+
+    monotonic = sum(b > a for a, b in zip(starts, starts[1:])) / (len(starts) - 1)
+    ordered = sorted(starts)
+    gaps = [b - a for a, b in zip(ordered, ordered[1:])]
+    lengths = list(gaps)
+    if duration:
+        in_range = sum(s < duration for s in ordered) / len(ordered)
+        if ordered[-1] < duration:
+            lengths.append(duration - ordered[-1])
+        median_gap = sorted(gaps)[len(gaps) // 2]
+        # the last track may run long, but not for several typical track lengths
+        tail = max(0.0, duration - ordered[-1])
+        overrun = max(0.0, tail - max(MAX_TRACK_SEC, 2 * median_gap))
+        lead = max(0.0, ordered[0] - LEAD_IN_SEC)
+        coverage = in_range * max(0.0, 1.0 - (lead + overrun) / duration)
+    else:
+        coverage = 1.0 if ordered[0] <= LEAD_IN_SEC else 0.7
+    count = sum(_within(n, MIN_TRACK_SEC, MAX_TRACK_SEC) for n in lengths) / len(lengths)
+    score = monotonic * (0.5 * coverage + 0.5 * count)
+    return {"monotonic": monotonic, "count": count, "coverage": coverage, "score": score}
@@ -1,24 +1,53 @@
 from __future__ import annotations
 import re
 import shutil
-import subprocess
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from smart_splitter.audio import proc
+from smart_splitter.audio.pcm import iter_pcm
+from smart_splitter.audio.peaks import PEAKS_RATE, load_peaks
+from smart_splitter.profiler import traced
+from smart_splitter.tracks import Track, Tracklist
 
 SILENCE_OUT = re.compile(r"silence_start:\s*(?P<start>[0-9.]+)|silence_end:\s*(?P<end>[0-9.]+)")
 
+# Energy analysis: 16 kHz mono, 20 ms frames (level 1 of the peak pyramid).
+# One float32 per frame keeps a 2-hour source at ~1.4 MB regardless of how
+# it is thresholded later.
+ENERGY_RATE = PEAKS_RATE
+FRAME_SEC = 0.02
+_FLOOR_DB = -120.0
+
+# in-process cache: (path, size, mtime_ns, frame_sec) -> per-frame dBFS, least
+# recently used first; bounded so long-running worker/batch processes that see
+# many sources do not keep every one of them
+ENERGY_ENTRIES = 4
+_ENERGY: "OrderedDict[Tuple[str, int, int, float], np.ndarray]" = OrderedDict()
+_ENERGY_LOCK = threading.Lock()
+
+
+@traced()
 def _run_silencedetect(src: str, noise_db: str = "-30dB", min_silence: float = 0.8) -> List[Dict[str, float]]:
     if shutil.which("ffmpeg") is None:
         raise RuntimeError("ffmpeg is not installed")
     cmd = [
-        "ffmpeg","-i", src, "-af", f"silencedetect=noise[{noise_db}:d={min_silence}]",
+        "ffmpeg","-i", src, "-af", f"silencedetect=noise={noise_db}:d={min_silence}",
         "-f","null", "-"
     ]
 
-    p = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    p = proc.run(cmd, check=True, capture_output=True, text=True)
     spans = []
     cur = {}
     for line in (p.stderr or "").splitlines():
-        m = SILENCE_OUT.match(line)
+        m = SILENCE_OUT.search(line)
         if not m:
             continue
         if m.group("start"):
@@ -29,30 +58,118 @@ def _run_silencedetect(src: str, noise_db: str = "-30dB", min_silence: float = 0
             cur = {}
     return spans
 
-def _sec_to_hms(s: float) -> str:
-    s = int(s)
-    hh = s // 3600
-    mm = (s % 3600) // 60
-    ss = s % 60
-    return f"{hh:02d}:{mm:02d}:{ss:02d}"
 
-def suggest_cuts_from_silence(src: str, *, min_gap: float = 1.5) -> List[Dict[str, float]]:
+@traced()
+def compute_energy(src: str, *, frame_sec: float = FRAME_SEC, stop: Optional[threading.Event] = None) -> "np.ndarray":
+    """
+    Stream `src` once and return its per-frame RMS level in dBFS (float32).
+    Works chunk by chunk, carrying the partial frame between chunks, so
+    memory is bounded by the chunk size plus the (small) result array.
+    """
+    frame_len = max(1, int(round(ENERGY_RATE * frame_sec)))
+    chunk = frame_len * 1024
+    levels = []
+    carry = np.zeros(0, dtype=np.float32)
+    for pcm in iter_pcm(src, sample_rate=ENERGY_RATE, chunk_samples=chunk, stop=stop):
+        if carry.size:
+            pcm = np.concatenate((carry, pcm))
+        whole = pcm.size - pcm.size % frame_len
+        if whole:
+            frames = pcm[:whole].reshape(-1, frame_len)
+            levels.append(np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)))
+        carry = pcm[whole:]
+    if carry.size:
+        levels.append(np.sqrt(np.mean(np.square(carry)))[None])
+    if not levels:
+        return np.zeros(0, dtype=np.float32)
+    rms = np.concatenate(levels)
+    with np.errstate(divide="ignore"):
+        db = 20.0 * np.log10(rms)
+    return np.maximum(db, _FLOOR_DB).astype(np.float32)
+
+
+def load_energy(src: str, *, frame_sec: float = FRAME_SEC, stop: Optional[threading.Event] = None) -> "np.ndarray":
+    """
+    Per-frame energy for `src`, decoded at most once per file version. When
+    `frame_sec` is one of the peak pyramid's block sizes (20 ms is), the
+    levels come from the `.peaks` file beside the source, built on first
+    use; other frame sizes are computed directly. Either way the result is
+    kept in memory for this process (the ENERGY_ENTRIES most recent). Setting `stop` cancels a decode in
+    progress (CancelledError) and nothing is kept.
+    """
+    if np is None:
+        raise RuntimeError("numpy not installed. Add it to requirements and pip install.")
+    st = Path(src).stat()
+    key = (str(Path(src).resolve()), st.st_size, st.st_mtime_ns, frame_sec)
+    with _ENERGY_LOCK:
+        if key in _ENERGY:
+            _ENERGY.move_to_end(key)
+            return _ENERGY[key]
+
+    db = None
+    try:
+        peaks = load_peaks(src, stop=stop)
+    except OSError:
+        peaks = None  # read-only location: decode without keeping the pyramid
+    if peaks is not None:
+        level = peaks.level_for(frame_sec)
+        if abs(peaks.block_sec(level) - frame_sec) < 1e-9:
+            with np.errstate(divide="ignore"):
+                db = np.maximum(20.0 * np.log10(peaks.rms(level)), _FLOOR_DB).astype(np.float32)
+    if db is None:
+        db = compute_energy(src, frame_sec=frame_sec, stop=stop)
+    with _ENERGY_LOCK:
+        _ENERGY[key] = db
+        while len(_ENERGY) > ENERGY_ENTRIES:
+            _ENERGY.popitem(last=False)
+    return db
+
+
+def _parse_db(noise_db) -> float:
+    return float(str(noise_db).strip().lower().removesuffix("db"))
+
+
+def silence_spans(db: "np.ndarray", *, frame_sec: float = FRAME_SEC, noise_db="-30dB",
+                  min_silence: float = 0.8) -> List[Dict[str, float]]:
+    """
+    Silence spans (seconds) where the frame level stays below `noise_db` for
+    at least `min_silence`. Pure array work, so any threshold can be tried
+    against the same energy array. Silence running into the end of the file
+    has no end and is not reported, matching the silencedetect scraper.
+    """
+    quiet = (db < _parse_db(noise_db)).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], quiet, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ((ends - starts) * frame_sec >= min_silence) & (ends < db.size)
+    return [{"start": float(s * frame_sec), "end": float(e * frame_sec)} for s, e in zip(starts[keep], ends[keep])]
+
+
+def suggest_cuts_from_silence(src: str, *, min_gap: float = 1.5, noise_db: str = "-30dB", min_silence: float = 0.8,
+                              engine: Optional[str] = None, stop: Optional[threading.Event] = None) -> Tracklist:
     """
     Suggest candidate 'start' timestamps at the ends of silences (silence_end)
     longer than min_gap. These are just hints to be merged with textual sources.
+
+    engine="numpy" (default when numpy is installed) analyses a cached energy
+    array, so re-running with other thresholds does not decode again;
+    engine="ffmpeg" scrapes ffmpeg's silencedetect output. `stop` cancels
+    the numpy engine's decode (CancelledError).
     """
-    spans = _run_silencedetect(src)
-    candidates = []
+    engine = engine or ("numpy" if np is not None else "ffmpeg")
+    if engine == "numpy":
+        spans = silence_spans(load_energy(src, stop=stop), noise_db=noise_db, min_silence=min_silence)
+    elif engine == "ffmpeg":
+        spans = _run_silencedetect(src, noise_db=noise_db, min_silence=min_silence)
+    else:
+        raise ValueError(f"unknown silence engine: {engine}")
+    candidates = Tracklist()
+    seen = set()
     for sp in spans:
         dur = sp.get("end", 0) - sp.get("start", 0)
         if dur >= min_gap and "end" in sp:
-            candidates.append({"start": _sec_to_hms(sp["end"]), "title": "Candidate"})
-    # de-dup consecutive similar candidates
-    seen = set()
-    deduped = []
-    for c in candidates:
-        if c["start"] in seen:
-            continue
-        seen.add(c["start"])
-        deduped.append(c)
-    return deduped
\ No newline at end of file
+            start_ms = int(round(sp["end"] * 1000))
+            if start_ms not in seen:
+                seen.add(start_ms)
+                candidates.append(Track(start_ms, title="Candidate"))
+    return candidates
@@ -1,21 +1,18 @@
 import re
-from typing import List, Dict
+
+from smart_splitter.tracks import Track, Tracklist, format_ts
 
 # Matches 00:00, 0:30, 1:02:45
 TIMESTAMP_PATTERN = re.compile(r"(?P<hours>\d{1,2}:)?(?P<minutes>[0-5]?\d):(?P<seconds>[0-5]?\d)")
 
 
 def normalize_hms(h: int, m: int, s: int) -> str:
-    total = h * 3600 + m * 60 + s
-    hh = total // 3600
-    mm = (total % 3600) // 60
-    ss = total % 60
-    return f"{hh:02d}:{mm:02d}:{ss:02d}"
+    return format_ts((h * 3600 + m * 60 + s) * 1000)
 
 
-def parse_timestamps(text: str) -> List[Dict[str, str]]:
-    """Parse lines with timestamps → normalized HH:MM:SS + title."""
-    tracks: List[Dict[str, str]] = []
+def parse_timestamps(text: str) -> Tracklist:
+    """Parse lines with timestamps → a Track (start in ms + title) per line."""
+    tracks = Tracklist()
     for line in text.splitlines():
         m = TIMESTAMP_PATTERN.search(line)
         if not m:
@@ -23,7 +20,7 @@ def parse_timestamps(text: str) -> List[Dict[str, str]]:
         hours = int(m.group("hours")[:-1]) if m.group("hours") else 0
         minutes = int(m.group("minutes"))
         seconds = int(m.group("seconds"))
-        ts = normalize_hms(hours, minutes, seconds)
+        start_ms = (hours * 3600 + minutes * 60 + seconds) * 1000
         title = line.replace(m.group(0), "").strip(" -–—:|\t[](){}") or f"Track {len(tracks)+1}"
-        tracks.append({"start": ts, "title": title})
+        tracks.append(Track(start_ms, title=title))
     return tracks
\ No newline at end of file
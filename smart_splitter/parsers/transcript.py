@@ -1,22 +1,99 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
+import mmap
 import re
 from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from smart_splitter.tracks import Track, Tracklist
 from .timestamps import parse_timestamps
 
-VTT_TS = re.compile(r"^\d{2}:\d{2}:\d{2}\.\d{3}\s+-->\s+\d{2}:\d{2}:\d{2}\.\d{3}")
+# one cue block: "00:01:02.345 --> 00:01:04.000 align:start" (VTT, hours optional) or
+# "00:01:02,345 --> ..." (SRT), then its text lines up to the next blank or timing line
+CUE_BLOCK = re.compile(
+    rb"^[ \t]*(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})[ \t]+-->[ \t]+(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})"
+    rb"[^\r\n]*(?:\r?\n|\Z)((?:(?![^\r\n]*-->)[ \t]*\S[^\r\n]*(?:\r?\n|\Z))*)",
+    re.M,
+)
+_TAG = re.compile(r"<[^>]*>")
+# a pause in the captions at least this long suggests a track boundary
+GAP_SEC = 8.0
+
+
+class Cue:
+    __slots__ = ("start_ms", "end_ms", "text")
+
+    def __init__(self, start_ms: int, end_ms: int, text: str):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"Cue({self.start_ms}, {self.end_ms}, {self.text!r})"
+
+
+def _ms(h: Optional[bytes], m: bytes, s: bytes, frac: bytes) -> int:
+    if h is None:
+        return (int(m) * 60 + int(s)) * 1000 + int(frac)
+    return ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + int(frac)
+
 
-def _read_vtt(vtt_path: Path) -> str:
-    return vtt_path.read_text(encoding="utf-8", errors="ignore")
+def _text(raw: bytes) -> str:
+    raw = raw.strip()
+    if b"<" not in raw and b"\n" not in raw:
+        return raw.decode("utf-8", "ignore")  # the common single plain line
+    text = _TAG.sub("", raw.decode("utf-8", "ignore"))
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
 
-def extract_from_transcript(*, vtt_text:Optional[str] = None, vtt_path: Optional[str] = None) -> List[Dict[str, str]]:
-    """Extract tracklist from a YouTube transcript file. If transcript has explicit timestamped titles"""
-    text = vtt_text or (_read_vtt(Path(vtt_path)) if vtt_path else "")
-    if not text:
-        return []
-    lines = []
-    for line in text.splitlines():
-        if VTT_TS.match(line) or line.strip().startswith(("WEBVTT","Kind:","Language")):
+
+def _cues(buf) -> Iterator[Cue]:
+    for m in CUE_BLOCK.finditer(buf):
+        h1, m1, s1, f1, h2, m2, s2, f2, text = m.groups()
+        yield Cue(_ms(h1, m1, s1, f1), _ms(h2, m2, s2, f2), _text(text))
+
+
+def iter_cues(*, vtt_path: Optional[str] = None, vtt_text: Optional[str] = None) -> Iterator[Cue]:
+    """
+    Cues of a WebVTT or SRT file, one at a time. The file is memory-mapped
+    and scanned by a single regex in one forward pass, so memory stays at
+    one cue whatever its size. Styling tags are stripped; header, NOTE and
+    SRT index lines are skipped.
+    """
+    if vtt_text is not None:
+        yield from _cues(vtt_text.encode("utf-8"))
+        return
+    with open(vtt_path, "rb") as f:
+        if Path(vtt_path).stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _cues(mm)
+
+
+def scan_transcript(*, vtt_path: Optional[str] = None, vtt_text: Optional[str] = None,
+                    min_gap: float = GAP_SEC) -> Tuple[Tracklist, Tracklist]:
+    """
+    One pass over the cues. Returns (timestamps written or spoken in the
+    captions, e.g. "next up at 1:02:30 ...", de-duplicated; boundary hints
+    at the end of every pause of `min_gap` seconds or more between cues).
+    """
+    stamps, gaps = Tracklist(), Tracklist()
+    seen = set()
+    gap_ms = int(min_gap * 1000)
+    last_end = None
+    for cue in iter_cues(vtt_path=vtt_path, vtt_text=vtt_text):
+        if last_end is not None and cue.start_ms - last_end >= gap_ms:
+            gaps.append(Track(cue.start_ms, title="Candidate"))
+        last_end = cue.end_ms if last_end is None else max(last_end, cue.end_ms)
+        if ":" not in cue.text:
             continue
-        lines.append(line)
-        return parse_timestamps("\n".join(lines))
\ No newline at end of file
+        for t in parse_timestamps(cue.text):
+            if t.start_ms not in seen:
+                seen.add(t.start_ms)
+                stamps.append(t)
+    return stamps, gaps
+
+
+def extract_from_transcript(*, vtt_text: Optional[str] = None, vtt_path: Optional[str] = None) -> Tracklist:
+    """Timestamps mentioned in a transcript (VTT/SRT), e.g. an on-screen or spoken tracklist."""
+    if not vtt_text and not vtt_path:
+        return Tracklist()
+    return scan_transcript(vtt_text=vtt_text or None, vtt_path=vtt_path)[0]
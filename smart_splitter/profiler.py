@@ -0,0 +1,134 @@
+from __future__ import annotations
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class Profiler:
+    """
+    Collects timed spans for pipeline stages and child processes and writes
+    them as Chrome trace events (open in chrome://tracing or ui.perfetto.dev).
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._tids: Dict[int, int] = {}
+        self._children: Dict[int, str] = {}
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            return self._tids.setdefault(ident, len(self._tids) + 1)
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def add(self, name: str, cat: str, start: float, end: float, args: Optional[Dict[str, Any]] = None, *,
+            pid: Optional[int] = None) -> None:
+        """
+        Record a complete span. Child process spans pass their `pid` and get
+        a track of their own: children run side by side, and spans that
+        overlap on one track do not nest.
+        """
+        if pid is not None:
+            with self._lock:
+                self._children[pid] = f"{name} [{pid}]"
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((start - self.t0) * 1e6),
+            "dur": round((end - start) * 1e6),
+            "pid": os.getpid() if pid is None else pid,
+            "tid": self._tid() if pid is None else pid,
+            "args": args or {},
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def write_trace(self, path: Path | str) -> None:
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": f"thread {tid}"}}
+                 for tid in self._tids.values()]
+        names += [{"name": "process_name", "ph": "M", "pid": pid, "tid": pid, "args": {"name": label}}
+                  for pid, label in self._children.items()]
+        Path(path).write_text(json.dumps({"traceEvents": names + self.events, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+    def summary(self) -> str:
+        rows: Dict[tuple, Dict[str, float]] = {}
+        for e in self.events:
+            row = rows.setdefault((e["cat"], e["name"]), {"n": 0, "wall": 0.0, "cpu": 0.0, "rss": 0, "io": 0})
+            row["n"] += 1
+            row["wall"] += e["dur"] / 1e6
+            row["cpu"] += e["args"].get("cpu_s", 0.0)
+            row["rss"] = max(row["rss"], e["args"].get("max_rss_kb", 0))
+            row["io"] += e["args"].get("read_bytes", 0) + e["args"].get("write_bytes", 0)
+        lines = [f"{'kind':<10} {'name':<28} {'count':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>8} {'I/O MB':>9}"]
+        for (cat, name), r in sorted(rows.items(), key=lambda kv: -kv[1]["wall"]):
+            lines.append(
+                f"{cat:<10} {name[:28]:<28} {r['n']:>5} {r['wall']:>9.2f} {r['cpu']:>9.2f} "
+                f"{r['rss'] / 1024:>8.1f} {r['io'] / 1e6:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+_active: Optional[Profiler] = None
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+@contextmanager
+def session(trace_path: Optional[Path | str]):
+    """Profile everything inside the block; on exit write the trace and print the summary table."""
+    global _active
+    if not trace_path:
+        yield None
+        return
+    _active = Profiler()
+    try:
+        with stage("total"):
+            yield _active
+    finally:
+        prof, _active = _active, None
+        prof.write_trace(trace_path)
+        print(prof.summary())
+        print(f"trace written to {trace_path}")
+
+
+@contextmanager
+def stage(name: str, **args):
+    """
+    Record the wall time and the calling thread's CPU time of the enclosed
+    block as a stage span (thread time, so stages running side by side do not
+    count each other's work; child processes are recorded by proc).
+    """
+    prof = _active
+    if prof is None:
+        yield
+        return
+    start, cpu0 = prof.now(), time.thread_time()
+    try:
+        yield
+    finally:
+        prof.add(name, "stage", start, prof.now(), {**args, "cpu_s": time.thread_time() - cpu0})
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of `stage`."""
+    def wrap(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def inner(*a, **kw):
+            with stage(label):
+                return fn(*a, **kw)
+        return inner
+    return wrap
@@ -0,0 +1,131 @@
+"""
+Track / Tracklist: times are integer milliseconds from the parsers through
+refine, ffmpeg and export. Strings exist only at the edges, where a
+tracklist is read or written (project.yml, tracklist.json/csv, album.cue,
+ffmpeg arguments): `parse_ts` on the way in, `format_ts` / `ffmpeg_ts` /
+`cue_ts` on the way out.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+CUE_FPS = 75
+
+
+def parse_ts(value: Union[str, int, float]) -> int:
+    """Milliseconds from "HH:MM:SS[.fff]", "MM:SS" or a number of seconds."""
+    if isinstance(value, (int, float)):
+        return int(round(value * 1000))
+    *head, secs = str(value).strip().split(":")
+    minutes = 0
+    for part in head:
+        minutes = minutes * 60 + int(part)
+    return minutes * 60_000 + int(round(float(secs) * 1000))
+
+
+def format_ts(ms: int) -> str:
+    """"HH:MM:SS", plus ".mmm" only when there is a fraction of a second."""
+    hms = f"{ms // 3_600_000:02d}:{ms // 60_000 % 60:02d}:{ms // 1000 % 60:02d}"
+    return f"{hms}.{ms % 1000:03d}" if ms % 1000 else hms
+
+
+def ffmpeg_ts(ms: int) -> str:
+    """Seconds with millisecond precision, for -ss/-to/-t."""
+    return f"{ms // 1000}.{ms % 1000:03d}"
+
+
+def cue_ts(ms: int) -> str:
+    """CUE sheet "MM:SS:FF" (75 frames per second, minutes not wrapped into hours)."""
+    frames = (ms * CUE_FPS + 500) // 1000
+    return f"{frames // (60 * CUE_FPS):02d}:{frames // CUE_FPS % 60:02d}:{frames % CUE_FPS:02d}"
+
+
+class Track:
+    __slots__ = ("start_ms", "end_ms", "title")
+
+    def __init__(self, start_ms: int, end_ms: Optional[int] = None, title: str = ""):
+        self.start_ms = int(start_ms)
+        self.end_ms = None if end_ms is None else int(end_ms)
+        self.title = title
+
+    @classmethod
+    def from_dict(cls, row: Dict) -> "Track":
+        end = row.get("end")
+        return cls(parse_ts(row["start"]), None if end in (None, "") else parse_ts(end), str(row.get("title") or ""))
+
+    def to_dict(self) -> Dict[str, str]:
+        row = {"start": format_ts(self.start_ms), "title": self.title}
+        if self.end_ms is not None:
+            row["end"] = format_ts(self.end_ms)
+        return row
+
+    @property
+    def start(self) -> float:
+        return self.start_ms / 1000
+
+    @property
+    def end(self) -> Optional[float]:
+        return None if self.end_ms is None else self.end_ms / 1000
+
+    def replace(self, **changes) -> "Track":
+        fields = {"start_ms": self.start_ms, "end_ms": self.end_ms, "title": self.title, **changes}
+        return Track(**fields)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Track):
+            return NotImplemented
+        return (self.start_ms, self.end_ms, self.title) == (other.start_ms, other.end_ms, other.title)
+
+    def __repr__(self) -> str:
+        end = format_ts(self.end_ms) if self.end_ms is not None else None
+        return f"Track({format_ts(self.start_ms)!r}, {end!r}, {self.title!r})"
+
+
+class Tracklist:
+    """An ordered list of Tracks; indexable and iterable like a list."""
+    __slots__ = ("tracks",)
+
+    def __init__(self, tracks: Iterable[Track] = ()):
+        self.tracks: List[Track] = list(tracks)
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[Union[Dict, Track]]) -> "Tracklist":
+        return cls(r if isinstance(r, Track) else Track.from_dict(r) for r in rows)
+
+    def to_dicts(self) -> List[Dict[str, str]]:
+        return [t.to_dict() for t in self.tracks]
+
+    def closed(self, total_ms: Optional[int] = None) -> "Tracklist":
+        """
+        Sorted by start, every open end set to the next start (the last one
+        to `total_ms` when known) and untitled tracks named "Track N".
+        """
+        ordered = sorted(self.tracks, key=lambda t: t.start_ms)
+        out = []
+        for i, t in enumerate(ordered):
+            end = t.end_ms
+            if end is None:
+                end = ordered[i + 1].start_ms if i + 1 < len(ordered) else total_ms
+            out.append(Track(t.start_ms, end, t.title or f"Track {i + 1}"))
+        return Tracklist(out)
+
+    def append(self, track: Track) -> None:
+        self.tracks.append(track)
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def __iter__(self) -> Iterator[Track]:
+        return iter(self.tracks)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return Tracklist(self.tracks[i])
+        return self.tracks[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Tracklist):
+            return self.tracks == other.tracks
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Tracklist({self.tracks!r})"
@@ -0,0 +1,384 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import yaml
+
+from smart_splitter.audio import proc
+from smart_splitter.batch import expand_projects
+from smart_splitter.core import Project, download_stage, process_stage
+
+QUEUE_ENV = "SMART_SPLITTER_QUEUE"
+DEFAULT_QUEUE = "queue.sqlite3"
+# a running job's lease is renewed every LEASE_SEC / 3; a worker that dies stops renewing
+LEASE_SEC = 120.0
+RETRY_BASE_SEC = 30.0
+# recorded on a job whose worker died on its last allowed attempt
+WORKER_DIED = "worker died while running the job (out of memory, crash or host restart?)"
+
+STAGES = ("download", "process")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    overrides TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',   -- queued | running | done | failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, not_before, id);
+CREATE TABLE IF NOT EXISTS stages (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,                    -- running | done | failed
+    attempt INTEGER NOT NULL,
+    started REAL,
+    finished REAL,
+    seconds REAL,
+    error TEXT,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+
+def queue_path(path: Optional[str] = None) -> Path:
+    return Path(path or os.environ.get(QUEUE_ENV) or DEFAULT_QUEUE)
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """A connection for this thread (sqlite3 connections must not be shared), schema ensured."""
+    db = sqlite3.connect(str(queue_path(path)), timeout=30, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return db
+
+
+# -------------------- producing --------------------
+
+def enqueue(targets: List[str], *, config: Optional[Dict] = None, force: bool = False, skip_download: bool = False,
+            jobs: Optional[int] = None, max_attempts: int = 3, projects_dir: str = "projects",
+            queue: Optional[str] = None) -> List[int]:
+    """
+    Queue one job per target: a project file, a project directory, a glob,
+    or a video URL (a project is created for it under `projects_dir`).
+    `config` is merged over each project.yml when the job runs.
+    """
+    options = {"config": config or {}, "force": force, "skip_download": skip_download, "jobs": jobs}
+    files = []
+    for target in targets:
+        if target.startswith(("http://", "https://")):
+            files.append(str(project_for_url(target, projects_dir=projects_dir)))
+        else:
+            files.extend(expand_projects([target]))
+    db = connect(queue)
+    now = time.time()
+    ids = []
+    for f in files:
+        cur = db.execute(
+            "INSERT INTO jobs (project, overrides, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (f, json.dumps(options), max_attempts, now, now))
+        ids.append(cur.lastrowid)
+    db.close()
+    return ids
+
+
+def project_for_url(url: str, *, projects_dir: str = "projects") -> Path:
+    """project.yml for `url`, created with the default sources unless one for the video already exists."""
+    slug = _slug_for_url(url)
+    path = Path(projects_dir) / slug / "project.yml"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cfg = {
+            "slug": slug,
+            "source": {"url": url, "prefer": ["description", "comments", "transcript"], "fallback_silence": True},
+            "output": {"codec": "flac", "filename_template": "{index:02d} - {title}.{ext}"},
+            "metadata": {},
+        }
+        path.write_text(yaml.safe_dump(cfg, sort_keys=False, allow_unicode=True), encoding="utf-8")
+    return path.resolve()
+
+
+def _slug_for_url(url: str) -> str:
+    parsed = urlparse(url)
+    video_id = parse_qs(parsed.query).get("v", [""])[0]
+    if not video_id and parsed.netloc.endswith("youtu.be"):
+        video_id = parsed.path.strip("/")
+    if video_id and all(c.isalnum() or c in "-_" for c in video_id):
+        return f"yt-{video_id}"
+    return "url-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+# -------------------- consuming --------------------
+
+class Worker:
+    """
+    Long-running consumer. Each claimed job holds a lease that a heartbeat
+    renews; a job whose worker died (lease expired, or its pid is gone on
+    this host) is claimed again and resumes after its last finished stage.
+    A failed stage is retried with backoff up to the job's max_attempts, and
+    a job whose worker died counts the attempt too, so a job that takes its
+    worker down is not retried forever.
+    """
+
+    def __init__(self, queue: Optional[str] = None, *, io_jobs: int = 2, cpu_jobs: int = 2,
+                 jobs: Optional[int] = None, poll: float = 5.0):
+        self.queue = queue
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.io_slots = threading.BoundedSemaphore(max(1, io_jobs))
+        self.cpu_slots = threading.BoundedSemaphore(max(1, cpu_jobs))
+        self.threads = max(1, io_jobs) + max(1, cpu_jobs)
+        self.jobs = jobs
+        self.poll = poll
+        self.stopping = threading.Event()
+        self._running: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def run(self, *, once: bool = False) -> None:
+        """Process jobs until stopped (Ctrl-C/SIGTERM), or until the queue is drained with `once`."""
+        self.recover()
+        previous = self._install_stop_handlers()
+        threads = [threading.Thread(target=self._loop, args=(once,), name=f"worker-{i}", daemon=True)
+                   for i in range(self.threads)]
+        beat = threading.Thread(target=self._heartbeat, name="heartbeat", daemon=True)
+        for t in threads + [beat]:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.5)
+        except KeyboardInterrupt:
+            print("stopping: releasing running jobs back to the queue")
+            self.stopping.set()
+            proc.cancel_all()
+            for t in threads:
+                t.join()
+            raise
+        finally:
+            self.stopping.set()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def _install_stop_handlers(self) -> Dict[int, object]:
+        """
+        Ctrl-C and SIGTERM mark the worker as stopping before the interrupt
+        handler signals any child, so a job whose ffmpeg is killed under it
+        is released rather than failed. Returns the handlers replaced.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        interrupt = signal.getsignal(signal.SIGINT)
+
+        def _handler(signum, frame):
+            self.stopping.set()
+            if callable(interrupt):
+                interrupt(signum, frame)
+            else:
+                signal.default_int_handler(signum, frame)
+
+        previous = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+        for sig in previous:
+            signal.signal(sig, _handler)
+        return previous
+
+    def recover(self) -> int:
+        """
+        Re-queue jobs left running by a dead process on this host (no need to
+        wait for the lease); jobs that had used their last attempt fail.
+        """
+        db = connect(self.queue)
+        host = socket.gethostname()
+        requeued = failed = 0
+        for row in db.execute("SELECT id, lease_owner, attempts, max_attempts FROM jobs "
+                              "WHERE status = 'running'").fetchall():
+            owner_host, _, pid = (row["lease_owner"] or "").rpartition(":")
+            if owner_host != host or not pid.isdigit() or _pid_alive(int(pid)):
+                continue
+            if row["attempts"] < row["max_attempts"]:
+                db.execute("UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_until = NULL, updated = ? "
+                           "WHERE id = ? AND status = 'running'", (time.time(), row["id"]))
+                requeued += 1
+            else:
+                db.execute("UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, lease_until = NULL, "
+                           "updated = ? WHERE id = ? AND status = 'running'", (WORKER_DIED, time.time(), row["id"]))
+                failed += 1
+        db.close()
+        if requeued:
+            print(f"re-queued {requeued} job(s) interrupted by a previous worker")
+        if failed:
+            print(f"✘ {failed} job(s) interrupted by a previous worker on their last attempt: failed")
+        return requeued
+
+    def _loop(self, once: bool) -> None:
+        db = connect(self.queue)
+        try:
+            while not self.stopping.is_set():
+                job = self._claim(db)
+                if job is None:
+                    if once and not self._pending(db):
+                        return
+                    self.stopping.wait(self.poll)
+                    continue
+                self._run_job(db, job)
+        finally:
+            db.close()
+
+    def _claim(self, db: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # an expired lease means the worker died; on the job's last attempt that is its failure
+            db.execute("UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, lease_until = NULL, "
+                       "updated = ? WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                       (WORKER_DIED, now, now))
+            job = db.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND not_before <= ?) "
+                "OR (status = 'running' AND lease_until < ? AND attempts < max_attempts) ORDER BY id LIMIT 1",
+                (now, now)).fetchone()
+            if job is not None:
+                db.execute("UPDATE jobs SET status = 'running', lease_owner = ?, lease_until = ?, "
+                           "attempts = attempts + 1, updated = ? WHERE id = ?",
+                           (self.owner, now + LEASE_SEC, now, job["id"]))
+                job = db.execute("SELECT * FROM jobs WHERE id = ?", (job["id"],)).fetchone()
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return job
+
+    def _pending(self, db: sqlite3.Connection) -> bool:
+        return db.execute("SELECT 1 FROM jobs WHERE status IN ('queued', 'running') LIMIT 1").fetchone() is not None
+
+    def _run_job(self, db: sqlite3.Connection, job: sqlite3.Row) -> None:
+        job_id = job["id"]
+        with self._lock:
+            self._running[job_id] = job["project"]
+        options = json.loads(job["overrides"] or "{}")
+        done = {r["stage"] for r in db.execute("SELECT stage FROM stages WHERE job_id = ? AND status = 'done'", (job_id,))}
+        slug = Path(job["project"]).parent.name
+        print(f"▶ job {job_id} {slug} (attempt {job['attempts']}/{job['max_attempts']})")
+        try:
+            p = Project(job["project"], overrides=options.get("config"))
+            runners: Dict[str, Callable[[], object]] = {
+                "download": lambda: download_stage(p, force=bool(options.get("force")),
+                                                   skip_download=bool(options.get("skip_download"))),
+                "process": lambda: process_stage(p, jobs=options.get("jobs") or self.jobs),
+            }
+            for stage in STAGES:
+                if stage in done:
+                    continue
+                slots = self.io_slots if stage == "download" else self.cpu_slots
+                with slots:
+                    self._stage(db, job, stage, runners[stage])
+        except Exception as e:
+            if self.stopping.is_set():
+                self._release(db, job_id)
+            else:
+                self._failed(db, job, e)
+        except BaseException:
+            self._release(db, job_id)
+            raise
+        else:
+            db.execute("UPDATE jobs SET status = 'done', error = NULL, lease_owner = NULL, lease_until = NULL, "
+                       "updated = ? WHERE id = ?", (time.time(), job_id))
+            print(f"✔ job {job_id} {slug} done")
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def _stage(self, db: sqlite3.Connection, job: sqlite3.Row, stage: str, fn: Callable[[], object]) -> None:
+        started = time.time()
+        db.execute("INSERT OR REPLACE INTO stages (job_id, stage, status, attempt, started) VALUES (?, ?, 'running', ?, ?)",
+                   (job["id"], stage, job["attempts"], started))
+        try:
+            fn()
+        except BaseException as e:
+            finished = time.time()
+            db.execute("UPDATE stages SET status = 'failed', finished = ?, seconds = ?, error = ? "
+                       "WHERE job_id = ? AND stage = ?",
+                       (finished, finished - started, _error(e), job["id"], stage))
+            raise
+        finished = time.time()
+        db.execute("UPDATE stages SET status = 'done', finished = ?, seconds = ?, error = NULL "
+                   "WHERE job_id = ? AND stage = ?", (finished, finished - started, job["id"], stage))
+
+    def _failed(self, db: sqlite3.Connection, job: sqlite3.Row, e: BaseException) -> None:
+        retry = job["attempts"] < job["max_attempts"]
+        delay = RETRY_BASE_SEC * 2 ** (job["attempts"] - 1)
+        db.execute("UPDATE jobs SET status = ?, error = ?, not_before = ?, lease_owner = NULL, lease_until = NULL, "
+                   "updated = ? WHERE id = ?",
+                   ("queued" if retry else "failed", _error(e), time.time() + delay if retry else 0, time.time(),
+                    job["id"]))
+        when = f"retry in {delay:.0f}s" if retry else "giving up"
+        print(f"✘ job {job['id']} failed: {_error(e)} ({when})")
+
+    def _release(self, db: sqlite3.Connection, job_id: int) -> None:
+        """Put an interrupted job back without counting the attempt."""
+        db.execute("UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), lease_owner = NULL, "
+                   "lease_until = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+                   (time.time(), job_id, self.owner))
+
+    def _heartbeat(self) -> None:
+        db = connect(self.queue)
+        try:
+            while not self.stopping.wait(LEASE_SEC / 3):
+                with self._lock:
+                    ids = list(self._running)
+                for job_id in ids:
+                    db.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND lease_owner = ?",
+                               (time.time() + LEASE_SEC, job_id, self.owner))
+        finally:
+            db.close()
+
+
+def run_worker(queue: Optional[str] = None, *, io_jobs: int = 2, cpu_jobs: int = 2, jobs: Optional[int] = None,
+               poll: float = 5.0, once: bool = False) -> None:
+    Worker(queue, io_jobs=io_jobs, cpu_jobs=cpu_jobs, jobs=jobs, poll=poll).run(once=once)
+
+
+def print_status(queue: Optional[str] = None, *, limit: int = 50) -> None:
+    """Most recent jobs with their status and per-stage timings."""
+    db = connect(queue)
+    rows = db.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    print(f"{'id':>5}  {'status':<7} {'tries':>5}  {'project':<28}  stages")
+    for r in rows:
+        stages = db.execute("SELECT stage, status, seconds FROM stages WHERE job_id = ?", (r["id"],)).fetchall()
+        detail = "  ".join(f"{s['stage']}:{s['status']}" + (f" {s['seconds']:.1f}s" if s["seconds"] is not None else "")
+                           for s in sorted(stages, key=lambda s: STAGES.index(s["stage"])))
+        if r["status"] in ("failed", "queued") and r["error"]:
+            detail += f"  ({r['error']})"
+        print(f"{r['id']:>5}  {r['status']:<7} {r['attempts']:>2}/{r['max_attempts']:<2}  "
+              f"{Path(r['project']).parent.name[:28]:<28}  {detail}")
+    db.close()
+    print("\n" + ", ".join(f"{n} {s}" for s, n in sorted(counts.items())) if counts else "queue is empty")
+
+
+def _error(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}".splitlines()[0][:500]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the package and benchmarks/ are imported from the checkout, not an install
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
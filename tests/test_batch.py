@@ -0,0 +1,63 @@
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from smart_splitter import batch
+
+
+@pytest.fixture
+def projects(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "project.yml").write_text("{}", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    monkeypatch.setattr(batch, "Project", lambda f: SimpleNamespace(slug=Path(f).parent.name, formats=[{}]))
+    monkeypatch.setattr(batch, "download_stage", lambda p, **kw: None)
+    monkeypatch.setattr(batch, "process_stage", lambda p, jobs=None: ["01.flac", "02.flac"])
+    return monkeypatch
+
+
+def test_expand_projects_takes_dirs_globs_and_drops_duplicates(projects):
+    found = batch.expand_projects([str(projects / "b"), str(projects / "*" / "project.yml"),
+                                   str(projects / "missing.yml")])
+    assert found == [str((projects / n / "project.yml").resolve()) for n in ("b", "a", "c")] + \
+        [str((projects / "missing.yml").resolve())]
+
+
+def test_failed_project_does_not_stop_the_batch(projects, stages, capsys):
+    def download(p, **kw):
+        if p.slug == "b":
+            raise OSError("network down")
+
+    stages.setattr(batch, "download_stage", download)
+    results = batch.run_batch([str(projects / "*")])
+    assert [(r.slug, r.status, r.stage, r.tracks) for r in results] == [
+        ("a", "ok", "process", 2), ("b", "failed", "download", 0), ("c", "ok", "process", 2)]
+    assert results[1].error == "OSError: network down"
+    assert "2 ok, 1 failed" in capsys.readouterr().out
+
+
+def test_downloads_overlap_earlier_encodes(projects, stages):
+    second_download = threading.Event()
+    overlapped = []
+
+    def download(p, **kw):
+        if p.slug == "b":
+            second_download.set()
+
+    def process(p, jobs=None):
+        if p.slug == "a":
+            # with one worker per pool, b can only download while a is still encoding
+            overlapped.append(second_download.wait(timeout=5))
+        return []
+
+    stages.setattr(batch, "download_stage", download)
+    stages.setattr(batch, "process_stage", process)
+    batch.run_batch([str(projects / "a"), str(projects / "b")], io_jobs=1, cpu_jobs=1)
+    assert overlapped == [True]
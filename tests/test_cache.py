@@ -0,0 +1,55 @@
+import threading
+import time
+
+from smart_splitter.io.cache import Cache
+
+
+def test_threads_storing_one_key(tmp_path):
+    cache = Cache(tmp_path)
+    errors = []
+
+    def store(n):
+        try:
+            for i in range(50):
+                cache.set("ns", "same", {"writer": n, "i": i})
+        except Exception as e:  # pragma: no cover - the failure being tested
+            errors.append(e)
+
+    threads = [threading.Thread(target=store, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert cache.get("ns", "same")["i"] == 49
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_size_is_kept_under_max_bytes(tmp_path):
+    cache = Cache(tmp_path, max_bytes=4096)
+    for i in range(200):
+        cache.set("ns", f"key {i}", "x" * 100)
+    total = sum(f.stat().st_size for f in tmp_path.rglob("*.json"))
+    assert total <= 4096
+    assert cache.get("ns", "key 199") == "x" * 100
+    assert cache.get("ns", "key 0") is None
+
+
+def test_directory_is_not_rescanned_on_every_write(tmp_path, monkeypatch):
+    cache = Cache(tmp_path)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: scans.append(1) or evict())
+    for i in range(200):
+        cache.set("ns", f"key {i}", i)
+    assert 1 <= len(scans) <= 200 // 64 + 1
+
+
+def test_ttl_expires_on_lookup(tmp_path, monkeypatch):
+    cache = Cache(tmp_path)
+    cache.set("ns", "k", 1)
+    assert cache.get("ns", "k", ttl=60) == 1
+    real = time.time
+    monkeypatch.setattr(time, "time", lambda: real() + 120)
+    assert cache.get("ns", "k", ttl=60) is None
+    assert cache.get("ns", "k") is None
@@ -0,0 +1,55 @@
+from smart_splitter.parsers.comments import extract_from_comments, iter_comment_tracklists
+
+TRACKLIST = "0:00 Intro\n4:00 Second\n8:00 Third\n12:00 Last"
+DURATION = 960
+
+
+def _counting(comments, pulled):
+    for c in comments:
+        pulled.append(c)
+        yield c
+
+
+def test_comments_with_fewer_than_two_timestamps_are_skipped():
+    found = list(iter_comment_tracklists(["great set", "the drop at 4:00!", TRACKLIST]))
+    assert len(found) == 1
+    assert [t.title for t in found[0]] == ["Intro", "Second", "Third", "Last"]
+
+
+def test_yt_dlp_comment_dicts():
+    found = list(iter_comment_tracklists([{"text": TRACKLIST}, {"body": "1:00 a\n2:00 b"}, {"text": None}]))
+    assert [len(t) for t in found] == [4, 2]
+
+
+def test_max_comments_bounds_how_many_are_read():
+    pulled = []
+    found = list(iter_comment_tracklists(_counting(["nice"] * 10 + [TRACKLIST], pulled), max_comments=5))
+    assert found == []
+    assert len(pulled) == 6  # the sixth is read, seen to be over the limit, and dropped
+
+
+def test_max_bytes_bounds_how_much_text_is_read():
+    pulled = []
+    comments = _counting(["x" * 100] * 10 + [TRACKLIST], pulled)
+    assert list(iter_comment_tracklists(comments, max_bytes=350)) == []
+    assert len(pulled) == 4
+
+
+def test_stops_at_the_first_good_tracklist():
+    pulled = []
+    comments = ["first!", "1:00 and 1:05 lol", TRACKLIST, "0:00 a\n5:00 b\n10:00 c"] + ["never read"] * 100
+    tracks = extract_from_comments(_counting(comments, pulled), duration=DURATION)
+    assert [t.title for t in tracks] == ["Intro", "Second", "Third", "Last"]
+    assert len(pulled) == 3
+
+
+def test_keeps_the_best_when_none_is_good():
+    weak = "0:00 a\n0:10 b"
+    better = "0:00 a\n4:00 b\n5:00 c"
+    tracks = extract_from_comments([weak, better, "no timestamps"], duration=DURATION)
+    assert len(tracks) == 3
+
+
+def test_timestamps_from_different_comments_are_not_mixed():
+    tracks = extract_from_comments(["0:00 a\n4:00 b", "8:00 c\n12:00 d"], duration=DURATION)
+    assert len(tracks) == 2
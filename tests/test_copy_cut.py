@@ -0,0 +1,55 @@
+import bisect
+import shutil
+import subprocess
+
+import pytest
+
+from smart_splitter.audio import ffmpeg
+from smart_splitter.tracks import Track, Tracklist
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+# a snapped time sits up to 1 ms after its packet's start (plus float noise)
+SLACK = 0.0015
+TRACKS = Tracklist([Track(0, 3_300, "a"), Track(3_300, 7_100, "b"), Track(7_100, None, "c")])
+
+
+@pytest.fixture(params=[("mp3", "libmp3lame"), ("m4a", "aac"), ("flac", "flac")], ids=lambda p: p[0])
+def source(tmp_path, request):
+    ext, encoder = request.param
+    src = tmp_path / f"source.{ext}"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "anoisesrc=d=10:r=48000:a=0.3",
+                    "-c:a", encoder, str(src)], check=True)
+    return str(src)
+
+
+def test_snapped_edges_land_on_the_nearest_packet(source):
+    packets = ffmpeg.probe_packet_times(source)
+    snapped, errors = ffmpeg.snap_to_packets(source, TRACKS)
+    longest = max(b - a for a, b in zip(packets, packets[1:]))
+    for t, s, (start_err, end_err) in zip(TRACKS, snapped, errors):
+        assert abs(start_err) <= longest / 2 + SLACK
+        assert end_err is None if t.end_ms is None else abs(end_err) <= longest / 2 + SLACK
+        # at most 1 ms past a packet start, never before it
+        assert s.start_ms == 0 or any(0 < s.start_ms / 1000 - p <= SLACK for p in packets)
+
+
+def test_copy_keeps_every_packet_of_the_span_exactly_once(source, tmp_path):
+    packets = ffmpeg.probe_packet_times(source)
+    snapped, _ = ffmpeg.snap_to_packets(source, TRACKS)
+    outs = ffmpeg.cut_segments(src=source, tracks=snapped, outdir=str(tmp_path / "out"),
+                               filename_template="{index:02d}.{ext}", codec="copy",
+                               ext=ffmpeg.copy_extension(source), jobs=2)
+    expected = []
+    for t in snapped:
+        lo = bisect.bisect_left(packets, t.start_ms / 1000 - SLACK)
+        hi = len(packets) if t.end_ms is None else bisect.bisect_left(packets, t.end_ms / 1000 - SLACK)
+        expected.append(hi - lo)
+    assert [len(ffmpeg.probe_packet_times(o)) for o in outs] == expected
+    assert all(ffmpeg.probe_codec(o) == ffmpeg.probe_codec(source) for o in outs)
+
+
+def test_copy_refuses_filters(source, tmp_path):
+    with pytest.raises(ValueError, match="re-encoding"):
+        ffmpeg.cut_segments(src=source, tracks=TRACKS, outdir=str(tmp_path / "out"),
+                            filename_template="{index:02d}.{ext}", codec="copy", filters={1: "volume=2"})
@@ -0,0 +1,19 @@
+import subprocess
+
+import pytest
+
+from smart_splitter.audio.cover import extract_frames
+
+
+def test_frames_are_spread_over_the_duration(tmp_path):
+    video = tmp_path / "video.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=320x180:rate=10:duration=12",
+                    "-g", "10", str(video)], check=True)
+    frames = extract_frames(str(video), str(tmp_path / "out"), duration=12.0, count=4)
+    assert len(frames["paths"]) == 4
+    assert frames["times"][0] >= 1.0 and frames["times"][-1] >= 9.0
+
+
+def test_unknown_duration_is_an_error(tmp_path):
+    with pytest.raises(ValueError, match="duration"):
+        extract_frames(str(tmp_path / "video.webm"), str(tmp_path / "out"), duration=0.0)
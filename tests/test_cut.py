@@ -0,0 +1,93 @@
+import shutil
+import subprocess
+import wave
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from smart_splitter.audio import ffmpeg, proc
+from smart_splitter.tracks import Track, Tracklist
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+RATE = 16000
+TRACKS = Tracklist([Track(0, 2_500, "a"), Track(2_500, 4_250, "b"), Track(4_250, 6_000, "c")])
+
+
+@pytest.fixture(params=["wav", "flac", "m4a"])
+def source(tmp_path, request):
+    pcm = (0.3 * np.random.default_rng(0).standard_normal(6 * RATE) * 32767).astype("<i2")
+    wav = tmp_path / "source.wav"
+    with wave.open(str(wav), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(pcm.tobytes())
+    if request.param == "wav":
+        return str(wav), pcm
+    encoded = tmp_path / f"source.{request.param}"
+    subprocess.run(["ffmpeg", "-v", "error", "-i", str(wav), str(encoded)], check=True)
+    if request.param == "m4a":
+        # lossy: compare against a full decode rather than the original samples
+        decoded = tmp_path / "decoded.wav"
+        subprocess.run(["ffmpeg", "-v", "error", "-i", str(encoded), str(decoded)], check=True)
+        pcm = _samples(str(decoded))
+    return str(encoded), pcm
+
+
+def _samples(path):
+    with wave.open(path) as w:
+        return np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+
+
+def _cut(src, outdir, mode):
+    return ffmpeg.cut_segments(src=src, tracks=TRACKS, outdir=str(outdir), filename_template="{index:02d}.{ext}",
+                               codec="wav", mode=mode, jobs=2)
+
+
+def test_per_track_cuts_the_same_samples_as_single_pass(tmp_path, source):
+    src, pcm = source
+    per_track = [_samples(f) for f in _cut(src, tmp_path / "per-track", "per-track")]
+    single = [_samples(f) for f in _cut(src, tmp_path / "single", "single-pass")]
+    for t, a, b in zip(TRACKS, per_track, single):
+        lo, hi = t.start_ms * RATE // 1000, t.end_ms * RATE // 1000
+        assert np.array_equal(a, pcm[lo:hi])
+        assert np.array_equal(a, b)
+
+
+def test_per_track_seeks_on_the_input(tmp_path, source, monkeypatch):
+    commands = []
+    monkeypatch.setattr(proc, "run_many", lambda cmds, **kw: commands.extend(cmds))
+    monkeypatch.setattr(ffmpeg, "SEEK_PREROLL_MS", 1_000)
+    _cut(source[0], tmp_path / "out", "per-track")
+    assert len(commands) == len(TRACKS)
+    decoded = []
+    for t, cmd in zip(TRACKS, commands):
+        i = cmd.index("-i")
+        seek = float(cmd[cmd.index("-ss") + 1]) if "-ss" in cmd[:i] else 0.0
+        skip = float(cmd[cmd.index("-ss", i) + 1]) if "-ss" in cmd[i:] else 0.0
+        assert seek + skip == pytest.approx(t.start_ms / 1000)
+        decoded.append(skip)
+    # only the pre-roll before each track is decoded and dropped, not the source up to it
+    assert decoded == [0.0, 1.0, 1.0]
+
+
+def test_parallel_cuts_match_serial_and_report_each_track(tmp_path, source):
+    serial = [_samples(f) for f in ffmpeg.cut_segments(src=source[0], tracks=TRACKS, outdir=str(tmp_path / "serial"),
+                                                      filename_template="{index:02d}.{ext}", codec="wav", jobs=1)]
+    done = []
+    dests = ffmpeg.cut_segments(src=source[0], tracks=TRACKS, outdir=str(tmp_path / "parallel"),
+                                filename_template="{index:02d}.{ext}", codec="wav", jobs=3,
+                                on_done=lambda i, dest: done.append((i, dest)))
+    assert sorted(done) == list(enumerate(dests, start=1))
+    for a, b in zip(serial, [_samples(f) for f in dests]):
+        assert np.array_equal(a, b)
+
+
+def test_only_encodes_the_given_tracks(tmp_path, source):
+    dests = ffmpeg.cut_segments(src=source[0], tracks=TRACKS, outdir=str(tmp_path / "out"),
+                                filename_template="{index:02d}.{ext}", codec="wav", jobs=2, only={2})
+    assert [Path(d).name for d in dests] == ["01.wav", "02.wav", "03.wav"]
+    assert sorted(f.name for f in (tmp_path / "out").iterdir()) == ["02.wav"]
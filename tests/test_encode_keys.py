@@ -0,0 +1,11 @@
+from types import SimpleNamespace
+
+from smart_splitter.core import _encode_keys
+from smart_splitter.tracks import Track, Tracklist
+
+
+def test_normalize_does_not_stale_stream_copies():
+    tracks = Tracklist([Track(0, title="a"), Track(5_000, title="b")])
+    plain, loud = SimpleNamespace(normalize=None), SimpleNamespace(normalize="track")
+    assert _encode_keys(plain, tracks, "src", "copy") == _encode_keys(loud, tracks, "src", "copy")
+    assert _encode_keys(plain, tracks, "src", "flac") != _encode_keys(loud, tracks, "src", "flac")
@@ -0,0 +1,34 @@
+import os
+
+from benchmarks import synth
+from smart_splitter.audio.fingerprint import build_fingerprint, fingerprint_path, load_fingerprint, match_fingerprint
+
+
+def test_key_rich_audio_matches_itself(tmp_path):
+    wav = tmp_path / "mix.wav"
+    synth.write_mix(wav, 30)
+    fp = load_fingerprint(str(wav))
+    found = match_fingerprint(fp, fp)
+    assert found and found["offset_ms"] == 0 and found["ratio"] > 0.9
+
+
+def test_index_of_a_changed_source_is_not_used(tmp_path):
+    wav = tmp_path / "mix.wav"
+    synth.write_mix(wav, 10)
+    build_fingerprint(str(wav))
+    assert load_fingerprint(str(wav), build=False) is not None
+    st = wav.stat()
+    os.utime(wav, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert fingerprint_path(str(wav)).exists()
+    assert load_fingerprint(str(wav), build=False) is None
+
+
+def test_truncated_index_is_rebuilt(tmp_path):
+    wav = tmp_path / "mix.wav"
+    synth.write_mix(wav, 10)
+    path = build_fingerprint(str(wav))
+    whole = path.read_bytes()
+    path.write_bytes(whole[:-4])
+    assert load_fingerprint(str(wav)).frames > 0
+    assert path.read_bytes() == whole
+    assert not list(tmp_path.glob("*.tmp"))
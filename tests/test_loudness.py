@@ -0,0 +1,59 @@
+import shutil
+import subprocess
+
+import pytest
+
+from smart_splitter.audio import proc
+from smart_splitter.audio.loudness import album_gain_filter, measure_loudness, measure_tracks, loudnorm_filter
+from smart_splitter.io.cache import Cache
+from smart_splitter.tracks import Track, Tracklist
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+TARGET = {"I": -16.0, "TP": -1.5, "LRA": 11.0}
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Pink noise, quiet for 4 s then 12 dB louder for 4 s."""
+    src = tmp_path / "source.flac"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "anoisesrc=d=8:r=48000:a=0.5:c=pink",
+                    "-af", "volume='if(lt(t,4),0.05,0.2)':eval=frame", str(src)], check=True)
+    return str(src)
+
+
+def test_album_gain_stops_at_the_true_peak():
+    assert album_gain_filter({"input_i": -20.0, "input_tp": -10.0}, target=TARGET) == "volume=4.00dB"
+    assert album_gain_filter({"input_i": -20.0, "input_tp": -3.0}, target=TARGET) == "volume=1.50dB"
+
+
+def test_second_pass_uses_the_first_pass_numbers():
+    measured = {"input_i": -20.0, "input_tp": -3.0, "input_lra": 5.0, "input_thresh": -30.0, "target_offset": 0.5}
+    f = loudnorm_filter(measured, sample_rate=44100, target=TARGET)
+    assert "measured_I=-20.0" in f and "offset=0.5" in f and "linear=true" in f
+    assert f.endswith(",aresample=44100")
+
+
+@needs_ffmpeg
+def test_measurements_are_cached_per_span(source, tmp_path, monkeypatch):
+    cache = Cache(tmp_path / "cache")
+    whole = measure_loudness(source, cache=cache)
+    tracks = Tracklist([Track(0, 4_000), Track(4_000, 8_000)])
+    spans = measure_tracks(source, tracks, indices=[1, 2], jobs=2, cache=cache)
+    assert spans[2]["input_i"] - spans[1]["input_i"] == pytest.approx(12, abs=1)
+    assert spans[1]["input_i"] < whole["input_i"] < spans[2]["input_i"]
+
+    def no_ffmpeg(*args, **kw):
+        raise AssertionError("measured again instead of using the cache")
+
+    monkeypatch.setattr(proc, "run", no_ffmpeg)
+    assert measure_loudness(source, cache=cache) == whole
+    assert measure_tracks(source, tracks, indices=[1, 2], jobs=2, cache=cache) == spans
+
+
+@needs_ffmpeg
+def test_second_pass_reaches_the_target(source, tmp_path):
+    out = tmp_path / "normalized.flac"
+    f = loudnorm_filter(measure_loudness(source, target=TARGET), sample_rate=48000, target=TARGET)
+    subprocess.run(["ffmpeg", "-v", "error", "-i", source, "-af", f, str(out)], check=True)
+    assert measure_loudness(str(out), target=TARGET)["input_i"] == pytest.approx(TARGET["I"], abs=1)
@@ -0,0 +1,109 @@
+import random
+import shutil
+import wave
+
+import pytest
+import yaml
+
+from smart_splitter.core import Project, _split_tracks
+from smart_splitter.io.manifest import Manifest
+from smart_splitter.tracks import Track, Tracklist
+
+
+def test_current_only_while_the_file_exists_and_the_inputs_match(tmp_path):
+    out = tmp_path / "01.flac"
+    m = Manifest(tmp_path / "manifest.json")
+    m.record(str(out), "encode", {"track": "a"})
+    assert not m.is_current(str(out), "encode", {"track": "a"})
+    out.write_bytes(b"x")
+    assert m.is_current(str(out), "encode", {"track": "a"})
+    assert not m.is_current(str(out), "encode", {"track": "b"})
+    assert not m.is_current(str(out), "tags", "t")
+
+
+def test_records_persist_and_a_new_encode_drops_the_tags(tmp_path):
+    out = tmp_path / "01.flac"
+    out.write_bytes(b"x")
+    m = Manifest(tmp_path / "manifest.json")
+    m.record(str(out), "encode", 1)
+    m.record(str(out), "tags", "t")
+    assert Manifest(m.path).is_current(str(out), "tags", "t")
+    m.record(str(out), "encode", 2)
+    assert Manifest(m.path).outputs == {str(out): {"encode": 2}}
+    m.forget(str(out))
+    assert Manifest(m.path).outputs == {}
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["01.flac", "manifest.json"]
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    (tmp_path / "manifest.json").write_text("{not json", encoding="utf-8")
+    assert Manifest(tmp_path / "manifest.json").outputs == {}
+
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+RATE = 16000
+
+
+def _project(tmp_path, titles):
+    with wave.open(str(tmp_path / "source.m4a"), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(random.Random(0).randbytes(6 * RATE * 2))
+    cfg = {"output": {"codec": "flac", "outdir": str(tmp_path / "out")}}
+    (tmp_path / "project.yml").write_text(yaml.safe_dump(cfg), encoding="utf-8")
+    p = Project(tmp_path / "project.yml")
+    return p, Tracklist([Track(2_000 * i, 2_000 * (i + 1), t) for i, t in enumerate(titles)])
+
+
+def _split(p, tracks):
+    _split_tracks(p, tracks, manifest=Manifest(p.manifest_path()), jobs=1)
+    return {f.name: f.stat().st_mtime_ns for f in p.outdir.iterdir()}
+
+
+@needs_ffmpeg
+def test_second_run_encodes_nothing(tmp_path, capsys):
+    p, tracks = _project(tmp_path, ["One", "Two", "Three"])
+    first = _split(p, tracks)
+    assert len(first) == 3
+    assert _split(p, tracks) == first
+    assert "nothing to encode" in capsys.readouterr().out
+
+
+@needs_ffmpeg
+def test_renamed_track_is_the_only_one_encoded(tmp_path):
+    p, tracks = _project(tmp_path, ["One", "Two", "Three"])
+    first = _split(p, tracks)
+    _, renamed = _project(tmp_path, ["One", "2", "Three"])
+    second = _split(p, renamed)
+    assert sorted(second) == ["01 - One.flac", "02 - 2.flac", "03 - Three.flac"]
+    assert {k: second[k] for k in ("01 - One.flac", "03 - Three.flac")} == \
+        {k: first[k] for k in ("01 - One.flac", "03 - Three.flac")}
+    assert str(p.outdir / "02 - Two.flac") not in Manifest(p.manifest_path()).outputs
+
+
+@needs_ffmpeg
+def test_moved_boundary_encodes_only_the_tracks_either_side(tmp_path):
+    p, tracks = _project(tmp_path, ["One", "Two", "Three"])
+    first = _split(p, tracks)
+    moved = Tracklist([Track(0, 2_000, "One"), Track(2_000, 3_500, "Two"), Track(3_500, 6_000, "Three")])
+    second = _split(p, moved)
+    assert second["01 - One.flac"] == first["01 - One.flac"]
+    assert second["02 - Two.flac"] != first["02 - Two.flac"]
+    assert second["03 - Three.flac"] != first["03 - Three.flac"]
+
+
+@needs_ffmpeg
+def test_deleted_or_changed_source_is_encoded_again(tmp_path):
+    p, tracks = _project(tmp_path, ["One", "Two", "Three"])
+    first = _split(p, tracks)
+    (p.outdir / "02 - Two.flac").unlink()
+    second = _split(p, tracks)
+    assert second["01 - One.flac"] == first["01 - One.flac"]
+    assert sorted(second) == sorted(first)
+    with open(p.source_audio_path(), "r+b") as f:
+        f.seek(-2, 2)
+        f.write(b"\x01\x02")
+    third = _split(p, tracks)
+    assert all(third[k] != second[k] for k in third)
@@ -0,0 +1,53 @@
+import shutil
+import threading
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from smart_splitter.audio.peaks import Peaks, build_peaks, load_peaks, peaks_path
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+
+def _noise(path, seconds=5.0, rate=16000):
+    pcm = 0.3 * np.random.default_rng(0).standard_normal(int(seconds * rate))
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((pcm * 32767).astype("<i2").tobytes())
+    return str(path)
+
+
+def test_truncated_file_is_rebuilt(tmp_path):
+    src = _noise(tmp_path / "a.wav")
+    path = build_peaks(src)
+    whole = path.read_bytes()
+    for cut in (10, len(whole) - 6):
+        path.write_bytes(whole[:cut])
+        with pytest.raises(ValueError, match="truncated"):
+            Peaks(str(path))
+        assert load_peaks(src).duration == pytest.approx(5.0)
+        assert path.read_bytes() == whole
+
+
+def test_concurrent_builds_of_one_source(tmp_path):
+    src = _noise(tmp_path / "a.wav")
+    errors = []
+
+    def build():
+        try:
+            build_peaks(src)
+        except Exception as e:  # pragma: no cover - the failure being tested
+            errors.append(e)
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert Peaks(str(peaks_path(src))).duration == pytest.approx(5.0)
+    assert not list(tmp_path.glob("*.tmp"))
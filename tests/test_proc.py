@@ -0,0 +1,49 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+from smart_splitter import profiler
+from smart_splitter.audio import proc
+
+SLEEP = [sys.executable, "-c", "import time; time.sleep(10)"]
+FAIL = [sys.executable, "-c", "raise SystemExit(3)"]
+OK = [sys.executable, "-c", "pass"]
+
+
+def test_first_failure_cancels_the_rest():
+    t0 = time.monotonic()
+    done = []
+    with pytest.raises(subprocess.CalledProcessError) as failed:
+        proc.run_many([SLEEP, FAIL, SLEEP], jobs=3, on_done=done.append)
+    assert failed.value.returncode == 3
+    assert time.monotonic() - t0 < proc.TERMINATE_GRACE + 5
+    assert done == []
+    assert not proc._children
+
+
+def test_on_done_may_make_synchronous_calls():
+    seen = []
+
+    def on_done(i):
+        seen.append((i, proc.check_output(OK + ["x"], text=True)))
+
+    proc.run_many([OK, OK], jobs=2, on_done=on_done)
+    assert sorted(seen) == [(0, ""), (1, "")]
+
+
+def test_timeout_stops_the_child():
+    with pytest.raises(subprocess.TimeoutExpired):
+        proc.run(SLEEP, timeout=0.5)
+    assert not proc._children
+
+
+def test_overlapping_children_get_their_own_trace_tracks(tmp_path):
+    nap = [sys.executable, "-c", "import time; time.sleep(0.3)"]
+    with profiler.session(tmp_path / "trace.json") as prof:
+        proc.run_many([nap, nap], jobs=2)
+    spans = [e for e in prof.events if e["cat"] == "process"]
+    assert len(spans) == 2
+    assert len({e["tid"] for e in spans}) == 2
+    assert all(e["tid"] == e["pid"] for e in spans)
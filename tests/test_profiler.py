@@ -0,0 +1,28 @@
+import threading
+import time
+
+from smart_splitter import profiler
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_concurrent_stages_count_only_their_own_cpu(tmp_path):
+    with profiler.session(tmp_path / "trace.json") as prof:
+        def work():
+            with profiler.stage("spin"):
+                _spin(0.3)
+        threads = [threading.Thread(target=work) for _ in range(2)]
+        for t in threads:
+            t.start()
+        with profiler.stage("idle"):
+            time.sleep(0.3)
+        for t in threads:
+            t.join()
+    cpu = {e["name"]: e["args"]["cpu_s"] for e in prof.events if e["name"] != "spin"}
+    spins = [e["args"]["cpu_s"] for e in prof.events if e["name"] == "spin"]
+    assert cpu["idle"] < 0.05
+    assert all(s < 0.45 for s in spins)
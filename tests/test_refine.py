@@ -0,0 +1,57 @@
+import shutil
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from smart_splitter.audio.refine import refine_boundaries
+from smart_splitter.tracks import Track, Tracklist
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+RATE = 16000
+
+
+def _noise_with_dip(path, *, seconds=14.0, dip=8.0):
+    """Loud noise with a single 20 ms silence at `dip` seconds."""
+    rng = np.random.default_rng(0)
+    pcm = 0.3 * rng.standard_normal(int(seconds * RATE))
+    pcm[int(dip * RATE):int((dip + 0.02) * RATE)] = 0.0
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((np.clip(pcm, -1, 1) * 32767).astype("<i2").tobytes())
+    return str(path)
+
+
+def test_single_boundary_snaps_to_the_quiet_point(tmp_path):
+    src = _noise_with_dip(tmp_path / "a.wav")
+    tracks = Tracklist([Track(0, 7000, "a"), Track(7000, 14000, "b")])
+    out = refine_boundaries(src, tracks, window=3.0, jobs=1)
+    assert 8000 <= out[1].start_ms <= 8020
+    assert out[0].end_ms == out[1].start_ms
+
+
+def test_nearby_boundaries_never_collapse(tmp_path):
+    # both starts are within ±3 s of the only quiet point
+    src = _noise_with_dip(tmp_path / "a.wav")
+    tracks = Tracklist([Track(0, 6000, "a"), Track(6000, 10500, "b"), Track(10500, 14000, "c")])
+    out = refine_boundaries(src, tracks, window=3.0, jobs=2)
+    starts = [t.start_ms for t in out]
+    assert starts == sorted(set(starts))
+    assert all(t.end_ms > t.start_ms for t in out)
+    assert 8000 <= out[1].start_ms <= 8020
+    # the later start may only search down to half-way (8.25 s)
+    assert out[2].start_ms >= 8250
+
+
+def test_peaks_pick_is_refined_to_the_millisecond(tmp_path):
+    from smart_splitter.audio.peaks import build_peaks
+    # the dip starts 2 ms into a 5 ms peaks block: the pyramid alone can't see that
+    src = _noise_with_dip(tmp_path / "a.wav", dip=8.002)
+    tracks = Tracklist([Track(0, 7000, "a"), Track(7000, 14000, "b")])
+    plain = refine_boundaries(src, tracks, window=3.0, jobs=1)
+    build_peaks(src)
+    assert refine_boundaries(src, tracks, window=3.0, jobs=1) == plain
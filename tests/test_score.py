@@ -0,0 +1,52 @@
+import pytest
+
+from smart_splitter.parsers.score import GOOD_SCORE, LEAD_IN_SEC, score_tracklist
+from smart_splitter.tracks import Track, Tracklist
+
+
+def _starts(*seconds):
+    return Tracklist(Track(int(s * 1000)) for s in seconds)
+
+
+def test_real_tracklist_scores_full_marks():
+    scored = score_tracklist(_starts(0, 240, 480, 720), duration=960)
+    assert scored == {"monotonic": 1.0, "count": 1.0, "coverage": 1.0, "score": 1.0}
+
+
+@pytest.mark.parametrize("tracks", [Tracklist(), _starts(0)])
+def test_fewer_than_two_tracks_score_zero(tracks):
+    assert score_tracklist(tracks, duration=600)["score"] == 0.0
+
+
+def test_out_of_order_timestamps_lose_monotonic():
+    scored = score_tracklist(_starts(0, 240, 120, 720), duration=960)
+    assert scored["monotonic"] == pytest.approx(2 / 3)
+    assert scored["score"] < GOOD_SCORE
+
+
+def test_timestamps_in_prose_are_not_a_tracklist():
+    # "at 0:01 ... 0:02 ... 0:03": track lengths nothing like songs
+    scored = score_tracklist(_starts(1, 2, 3), duration=960)
+    assert scored["count"] < 0.5
+    assert scored["score"] < GOOD_SCORE
+
+
+def test_a_late_first_track_costs_coverage():
+    scored = score_tracklist(_starts(300, 540, 780), duration=1020)
+    assert scored["coverage"] == pytest.approx(1 - (300 - LEAD_IN_SEC) / 1020)
+    assert scored["count"] == 1.0
+
+
+def test_sparse_timestamps_on_a_long_video_score_low():
+    assert score_tracklist(_starts(0, 240), duration=3 * 3600)["score"] < GOOD_SCORE / 2
+
+
+def test_without_duration_coverage_only_checks_the_start():
+    assert score_tracklist(_starts(0, 240, 480))["coverage"] == 1.0
+    assert score_tracklist(_starts(100, 240, 480))["coverage"] == 0.7
+
+
+def test_timestamps_past_the_end_count_against_coverage():
+    inside = score_tracklist(_starts(0, 240, 480), duration=700)
+    past = score_tracklist(_starts(0, 240, 480, 900), duration=700)
+    assert past["coverage"] < inside["coverage"]
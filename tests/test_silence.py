@@ -0,0 +1,42 @@
+import shutil
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from smart_splitter.parsers import silence
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+
+def _album(path, rate=16000):
+    """3 s of noise, 1.5 s of silence, 3 s of noise."""
+    rng = np.random.default_rng(0)
+    pcm = np.concatenate((0.3 * rng.standard_normal(3 * rate), np.zeros(int(1.5 * rate)),
+                          0.3 * rng.standard_normal(3 * rate)))
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((np.clip(pcm, -1, 1) * 32767).astype("<i2").tobytes())
+    return str(path)
+
+
+def test_cut_at_the_end_of_the_silence(tmp_path):
+    cuts = silence.suggest_cuts_from_silence(_album(tmp_path / "a.wav"))
+    assert len(cuts) == 1
+    assert cuts[0].start_ms == pytest.approx(4_500, abs=40)
+
+
+def test_energy_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(silence, "_ENERGY", type(silence._ENERGY)())
+    paths = [_album(tmp_path / f"{i}.wav") for i in range(silence.ENERGY_ENTRIES + 2)]
+    for path in paths:
+        silence.load_energy(path)
+    silence.load_energy(paths[2])  # most recently used: survives the next insert
+    silence.load_energy(_album(tmp_path / "new.wav"))
+    cached = [key[0] for key in silence._ENERGY]
+    assert len(cached) == silence.ENERGY_ENTRIES
+    assert str((tmp_path / "2.wav").resolve()) in cached
+    assert str((tmp_path / "0.wav").resolve()) not in cached
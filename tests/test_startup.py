@@ -0,0 +1,12 @@
+from benchmarks.run import LAZY_MODULES, STARTUP_BUDGET_SEC, _import_seconds, eager_modules
+
+
+def test_cli_import_within_budget():
+    # best of a few cold interpreters, like the benchmark, to ride out a busy machine
+    best = min(_import_seconds("smart_splitter.cli") for _ in range(3))
+    assert best <= STARTUP_BUDGET_SEC, f"import smart_splitter.cli took {best:.3f}s"
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    eager = eager_modules()
+    assert not eager, f"imported at startup: {eager} (only commands that need {LAZY_MODULES} may import them)"
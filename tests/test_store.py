@@ -0,0 +1,80 @@
+import os
+import threading
+
+from smart_splitter.io.store import Store
+
+
+def _download(content):
+    def download(tmp):
+        path = tmp / "source.m4a"
+        path.write_bytes(content)
+        return path
+    return download
+
+
+def test_same_content_is_stored_once(tmp_path):
+    store = Store(tmp_path / "store")
+    a = store.fetch("id-a", tmp_path / "a" / "source.m4a", _download(b"audio"))
+    b = store.fetch("id-b", tmp_path / "b" / "source.m4a", _download(b"audio"))
+    assert a["sha256"] == b["sha256"]
+    assert len(list((tmp_path / "store" / "objects").glob("*/*"))) == 1
+    assert len(list((tmp_path / "store" / "refs" / a["sha256"]).glob("*.json"))) == 2
+
+
+def test_known_id_is_not_downloaded_again(tmp_path):
+    store = Store(tmp_path / "store")
+    store.fetch("id", tmp_path / "a" / "source.m4a", _download(b"audio"))
+    calls = []
+
+    def download(tmp):
+        calls.append(tmp)
+        return _download(b"audio")(tmp)
+
+    store.fetch("id", tmp_path / "b" / "source.m4a", download)
+    assert not calls
+    assert (tmp_path / "b" / "source.m4a").read_bytes() == b"audio"
+
+
+def test_link_shares_the_object(tmp_path):
+    store = Store(tmp_path / "store")
+    entry = store.fetch("id", tmp_path / "a" / "source.m4a", _download(b"audio"))
+    method = store.link(entry["sha256"], tmp_path / "c" / "source.m4a")
+    obj = store.object_path(entry["sha256"])
+    if method == "hardlink":
+        assert os.path.samefile(obj, tmp_path / "c" / "source.m4a")
+    assert (tmp_path / "c" / "source.m4a").read_bytes() == b"audio"
+    assert not list((tmp_path / "c").glob("*.link"))
+
+
+def test_concurrent_links_of_one_object(tmp_path):
+    store = Store(tmp_path / "store")
+    sha = store.fetch("id", tmp_path / "a" / "source.m4a", _download(b"audio"))["sha256"]
+    dest = tmp_path / "b" / "source.m4a"
+    errors = []
+
+    def link():
+        try:
+            for _ in range(20):
+                store.link(sha, dest)
+        except Exception as e:  # pragma: no cover - the failure being tested
+            errors.append(e)
+
+    threads = [threading.Thread(target=link) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert dest.read_bytes() == b"audio"
+    assert sorted(p.name for p in dest.parent.iterdir()) == ["source.m4a"]
+
+
+def test_gc_keeps_linked_objects(tmp_path):
+    store = Store(tmp_path / "store")
+    kept = store.fetch("kept", tmp_path / "a" / "source.m4a", _download(b"one"))
+    gone = store.fetch("gone", tmp_path / "b" / "source.m4a", _download(b"two"))
+    (tmp_path / "b" / "source.m4a").unlink()
+    assert store.gc(grace_hours=0)["removed"] == 1
+    assert store.object_path(kept["sha256"]).exists()
+    assert not store.object_path(gone["sha256"]).exists()
+    assert store.lookup("gone") is None
@@ -0,0 +1,61 @@
+import shutil
+import wave
+
+import pytest
+import yaml
+
+np = pytest.importorskip("numpy")
+
+from smart_splitter.core import (Project, _record_streamed, _split_tracks, normalize_track_ends,
+                                 resolve_tracklist)
+from smart_splitter.io.manifest import Manifest, file_digest
+from smart_splitter.tracks import Tracklist
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+RATE = 16000
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Noise with a 20 ms silence at 5.5 s; the text tracklist says the second track starts at 5 s."""
+    rng = np.random.default_rng(0)
+    pcm = 0.3 * rng.standard_normal(10 * RATE)
+    pcm[int(5.5 * RATE):int(5.52 * RATE)] = 0.0
+    with wave.open(str(tmp_path / "source.m4a"), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((np.clip(pcm, -1, 1) * 32767).astype("<i2").tobytes())
+    cfg = {
+        "source": {"refine": {"window": 1.0}},
+        "output": {"codec": "flac", "outdir": str(tmp_path / "out")},
+        "tracklist": [{"title": "One", "start": "00:00:00"}, {"title": "Two", "start": "00:00:05"}],
+    }
+    (tmp_path / "project.yml").write_text(yaml.safe_dump(cfg), encoding="utf-8")
+    return Project(tmp_path / "project.yml")
+
+
+def _mtimes(p):
+    return {f.name: f.stat().st_mtime_ns for f in sorted((p.outdir).glob("*.flac"))}
+
+
+def test_run_after_stream_keeps_the_streamed_cuts(project):
+    p = project
+    # what stream_pipeline cut: the text tracklist, closed at yt-dlp's (whole-second) duration, unrefined
+    streamed = normalize_track_ends(Tracklist.from_dicts(p.cfg["tracklist"]), total_duration=10)
+    manifest = Manifest(p.manifest_path())
+    _split_tracks(p, streamed, manifest=manifest)
+    _record_streamed(p, manifest, streamed, file_digest(p.source_audio_path(), cache=p.cache))
+    before = _mtimes(p)
+    assert len(before) == 2
+
+    tracks = resolve_tracklist(p)
+    assert [t.start_ms for t in tracks] == [0, 5_000]
+    _split_tracks(p, tracks, manifest=Manifest(p.manifest_path()))
+    assert _mtimes(p) == before
+
+
+def test_run_without_stream_refines(project):
+    tracks = resolve_tracklist(project)
+    assert abs(tracks[1].start_ms - 5_510) <= 15
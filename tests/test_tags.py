@@ -0,0 +1,73 @@
+import shutil
+import subprocess
+
+import pytest
+
+pytest.importorskip("mutagen")
+
+from mutagen.flac import FLAC
+from mutagen.id3 import ID3
+from mutagen.mp4 import MP4
+
+from smart_splitter.audio.tags import apply_tags, load_artwork
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+META = {"album": "Live", "artist": "Band", "year": 2024, "genre": "Rock", "comment": "from the stream"}
+ENCODERS = {"01.flac": ["-c:a", "flac"], "02.mp3": ["-c:a", "libmp3lame"], "03.m4a": ["-c:a", "aac"],
+            "04.m4a": ["-c:a", "alac"]}
+
+
+@pytest.fixture
+def files(tmp_path):
+    out = []
+    for name, codec in ENCODERS.items():
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=d=1", *codec, str(tmp_path / name)],
+                       check=True)
+        out.append(str(tmp_path / name))
+    return out
+
+
+@pytest.fixture
+def cover(tmp_path):
+    path = tmp_path / "cover.png"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "color=c=red:s=64x48", "-frames:v", "1", str(path)],
+                   check=True)
+    return str(path)
+
+
+def test_every_format_gets_tags_and_cover(files, cover, tmp_path):
+    assert apply_tags(files, META, cover=cover, track_numbers=[1, 2, 3, 4], jobs=4) == 4
+    art = (tmp_path / "cover.png").read_bytes()
+
+    flac = FLAC(files[0])
+    assert (flac["album"], flac["albumartist"], flac["date"], flac["tracknumber"]) == (["Live"], ["Band"],
+                                                                                       ["2024"], ["1"])
+    assert [p.data for p in flac.pictures] == [art]
+
+    id3 = ID3(files[1])
+    assert (str(id3["TALB"]), str(id3["TPE2"]), str(id3["TRCK"])) == ("Live", "Band", "2")
+    assert [(a.mime, a.data) for a in id3.getall("APIC")] == [("image/png", art)]
+
+    for i, f in enumerate(files[2:], start=3):
+        tags = MP4(f).tags
+        assert (tags["\xa9alb"], tags["aART"], tags["trkn"][0][0]) == (["Live"], ["Band"], i)
+        assert [bytes(c) for c in tags["covr"]] == [art]
+
+
+def test_unchanged_files_are_not_rewritten(files, cover):
+    apply_tags(files, META, cover=cover)
+    assert apply_tags(files, META, cover=cover) == 0
+    assert apply_tags(files, dict(META, album="Live II"), cover=cover) == 4
+
+
+def test_large_cover_is_scaled_once(tmp_path):
+    big = tmp_path / "big.png"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "color=c=blue:s=800x600", "-frames:v", "1",
+                    str(big)], check=True)
+    art = load_artwork(str(big), max_size=100, cache_dir=tmp_path / "artwork")
+    assert art.mime == "image/jpeg" and art.data[:2] == b"\xff\xd8"
+    cached = list((tmp_path / "artwork").iterdir())
+    assert len(cached) == 1
+    assert load_artwork(str(big), max_size=100, cache_dir=tmp_path / "artwork").data == art.data
+    assert list((tmp_path / "artwork").iterdir()) == cached
@@ -0,0 +1,86 @@
+import pytest
+import yaml
+
+from smart_splitter.tracks import Track, Tracklist, cue_ts, ffmpeg_ts, format_ts, parse_ts
+
+
+@pytest.mark.parametrize("value, ms", [
+    ("01:02:03.456", 3_723_456),
+    (" 1:02:03.456 ", 3_723_456),
+    ("00:00:00", 0),
+    ("03:25", 205_000),
+    ("1:02:30", 3_750_000),
+    ("59.9995", 60_000),
+    (1.5, 1_500),
+    (0, 0),
+])
+def test_parse_ts(value, ms):
+    assert parse_ts(value) == ms
+
+
+def test_parse_ts_yaml_sexagesimal():
+    # PyYAML (YAML 1.1) reads an unquoted 3:25 as the integer 205, 1:02:30 as 3750
+    cfg = yaml.safe_load("a: 3:25\nb: 1:02:30\nc: 3:25.5\nd: '03:25'")
+    assert cfg["a"] == 205
+    assert [parse_ts(cfg[k]) for k in "abcd"] == [205_000, 3_750_000, 205_500, 205_000]
+    assert Track.from_dict({"start": cfg["a"], "title": "x"}).start_ms == 205_000
+
+
+@pytest.mark.parametrize("ms, text", [
+    (0, "00:00:00"),
+    (205_000, "00:03:25"),
+    (1_500, "00:00:01.500"),
+    (3_723_004, "01:02:03.004"),
+    (36_000_000, "10:00:00"),
+])
+def test_format_ts(ms, text):
+    assert format_ts(ms) == text
+    assert parse_ts(text) == ms
+
+
+def test_ffmpeg_ts_keeps_milliseconds():
+    assert ffmpeg_ts(61_005) == "61.005"
+    assert ffmpeg_ts(5) == "0.005"
+    assert ffmpeg_ts(0) == "0.000"
+
+
+@pytest.mark.parametrize("ms, text", [
+    (0, "00:00:00"),
+    (59_990, "00:59:74"),    # 4499.25 frames rounds down
+    (59_995, "01:00:00"),    # 4499.625 frames rounds up into the next minute
+    (3_723_004, "62:03:00"),  # minutes are not wrapped into hours
+])
+def test_cue_ts_rounds_to_frames(ms, text):
+    assert cue_ts(ms) == text
+
+
+def test_track_dict_round_trip():
+    row = {"start": "00:01:02.500", "title": "A", "end": "00:03:00"}
+    assert Track.from_dict(row).to_dict() == row
+    assert Track.from_dict({"start": "00:01:00", "end": ""}).end_ms is None
+    assert "end" not in Track(1000, title="B").to_dict()
+
+
+def test_closed_with_unknown_total():
+    tracks = Tracklist([Track(5_000, title="b"), Track(0), Track(9_000, 12_000, "c")])
+    closed = tracks.closed()
+    assert [(t.start_ms, t.end_ms, t.title) for t in closed] == [
+        (0, 5_000, "Track 1"),
+        (5_000, 9_000, "b"),
+        (9_000, 12_000, "c"),
+    ]
+    last_open = Tracklist([Track(0), Track(5_000)]).closed()
+    assert last_open[-1].end_ms is None
+
+
+def test_closed_with_total():
+    closed = Tracklist([Track(0), Track(5_000)]).closed(20_000)
+    assert [t.end_ms for t in closed] == [5_000, 20_000]
+
+
+def test_tracklist_behaves_like_a_list():
+    tracks = Tracklist.from_dicts([{"start": "0:00", "title": "a"}, {"start": "1:00", "title": "b"}])
+    assert len(tracks) == 2
+    assert tracks[1].title == "b"
+    assert isinstance(tracks[:1], Tracklist) and len(tracks[:1]) == 1
+    assert Tracklist.from_dicts(tracks.to_dicts()) == tracks
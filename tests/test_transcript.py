@@ -0,0 +1,77 @@
+from smart_splitter.parsers.transcript import extract_from_transcript, iter_cues, scan_transcript
+
+VTT = """WEBVTT
+Kind: captions
+
+NOTE this block is
+a comment
+
+00:00:01.000 --> 00:00:04.500 align:start position:0%
+<c.colorE5E5E5>first</c> <00:00:02.000><c>line</c>
+second line
+
+01:02.250 --> 01:05.000
+minutes only
+"""
+
+SRT = """1
+00:00:01,000 --> 00:00:02,000
+Hello
+
+2
+01:00:00,500 --> 01:00:03,250
+<i>World</i>
+"""
+
+
+def _cues(**source):
+    return [(c.start_ms, c.end_ms, c.text) for c in iter_cues(**source)]
+
+
+def test_vtt_cues():
+    assert _cues(vtt_text=VTT) == [
+        (1_000, 4_500, "first line\nsecond line"),
+        (62_250, 65_000, "minutes only"),
+    ]
+
+
+def test_srt_cues():
+    assert _cues(vtt_text=SRT) == [(1_000, 2_000, "Hello"), (3_600_500, 3_603_250, "World")]
+
+
+def test_crlf_and_cue_without_text():
+    text = "WEBVTT\r\n\r\n00:00:01.000 --> 00:00:02.000\r\n00:00:03.000 --> 00:00:04.000\r\nafter\r\n"
+    assert _cues(vtt_text=text) == [(1_000, 2_000, ""), (3_000, 4_000, "after")]
+
+
+def test_reads_a_file_and_an_empty_file(tmp_path):
+    path = tmp_path / "captions.vtt"
+    path.write_text(VTT, encoding="utf-8")
+    assert _cues(vtt_path=str(path)) == _cues(vtt_text=VTT)
+    empty = tmp_path / "empty.vtt"
+    empty.write_bytes(b"")
+    assert _cues(vtt_path=str(empty)) == []
+
+
+def test_timestamps_in_captions_are_deduplicated():
+    # rolling auto-captions repeat a line in the next cue
+    text = ("WEBVTT\n\n00:00:01.000 --> 00:00:03.000\nnext up at 4:30 Second Song\n\n"
+            "00:00:03.000 --> 00:00:05.000\nnext up at 4:30 Second Song\n\n"
+            "00:04:30.000 --> 00:04:33.000\nand at 9:10 Third\n")
+    stamps = extract_from_transcript(vtt_text=text)
+    assert [t.start_ms for t in stamps] == [270_000, 550_000]
+
+
+def test_long_pauses_between_cues_become_candidates():
+    text = ("WEBVTT\n\n00:00:00.000 --> 00:00:05.000\na\n\n"
+            "00:00:09.000 --> 00:00:20.000\nb\n\n"        # 4 s pause: too short
+            "00:00:10.000 --> 00:00:12.000\noverlap\n\n"  # ends before the cue above
+            "00:00:30.000 --> 00:00:35.000\nc\n")         # 10 s after the latest end (20 s)
+    stamps, gaps = scan_transcript(vtt_text=text)
+    assert len(stamps) == 0
+    assert [t.start_ms for t in gaps] == [30_000]
+    assert [t.start_ms for t in scan_transcript(vtt_text=text, min_gap=3.0)[1]] == [9_000, 30_000]
+
+
+def test_no_source_gives_an_empty_tracklist():
+    assert len(extract_from_transcript()) == 0
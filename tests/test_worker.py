@@ -0,0 +1,122 @@
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from smart_splitter import worker
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    path = str(tmp_path / "queue.sqlite3")
+    monkeypatch.setattr(worker, "Project", lambda project, overrides=None: project)
+    monkeypatch.setattr(worker, "download_stage", lambda p, **kw: None)
+    return path
+
+
+def _add(queue, *, max_attempts=3, **columns):
+    db = worker.connect(queue)
+    now = time.time()
+    cur = db.execute("INSERT INTO jobs (project, overrides, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)",
+                     ("projects/a/project.yml", json.dumps({}), max_attempts, now, now))
+    if columns:
+        db.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in columns)} WHERE id = ?",
+                   (*columns.values(), cur.lastrowid))
+    db.close()
+    return cur.lastrowid
+
+
+def _job(queue, job_id):
+    db = worker.connect(queue)
+    row = dict(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+    db.close()
+    return row
+
+
+def _dead_pid():
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def test_success_runs_both_stages(queue, monkeypatch):
+    monkeypatch.setattr(worker, "process_stage", lambda p, jobs=None: [])
+    job_id = _add(queue)
+    worker.Worker(queue, poll=0.01).run(once=True)
+    job = _job(queue, job_id)
+    assert (job["status"], job["attempts"]) == ("done", 1)
+
+
+def test_failure_retries_with_backoff_then_gives_up(queue, monkeypatch):
+    def boom(p, jobs=None):
+        raise RuntimeError("ffmpeg exploded")
+    monkeypatch.setattr(worker, "process_stage", boom)
+    job_id = _add(queue, max_attempts=2)
+    w = worker.Worker(queue)
+    db = worker.connect(queue)
+    w._run_job(db, w._claim(db))
+    job = _job(queue, job_id)
+    assert job["status"] == "queued" and job["not_before"] > time.time() + 20
+    assert w._claim(db) is None  # backing off
+    db.execute("UPDATE jobs SET not_before = 0")
+    w._run_job(db, w._claim(db))
+    job = _job(queue, job_id)
+    assert (job["status"], job["attempts"]) == ("failed", 2)
+    assert "ffmpeg exploded" in job["error"]
+    # the download stage finished on the first attempt and was not run again
+    stages = dict(db.execute("SELECT stage, attempt FROM stages WHERE job_id = ?", (job_id,)).fetchall())
+    assert stages == {"download": 1, "process": 2}
+
+
+def test_interrupted_job_is_released_without_counting(queue, monkeypatch):
+    w = worker.Worker(queue)
+
+    def interrupted(p, jobs=None):
+        w.stopping.set()
+        raise subprocess.CalledProcessError(-15, ["ffmpeg"])
+    monkeypatch.setattr(worker, "process_stage", interrupted)
+    job_id = _add(queue, max_attempts=1)
+    db = worker.connect(queue)
+    w._run_job(db, w._claim(db))
+    job = _job(queue, job_id)
+    assert (job["status"], job["attempts"], job["lease_owner"]) == ("queued", 0, None)
+
+
+def test_expired_lease_is_reclaimed_until_attempts_run_out(queue):
+    past = time.time() - 1
+    retry = _add(queue, status="running", attempts=1, lease_owner="elsewhere:1", lease_until=past)
+    last = _add(queue, status="running", attempts=3, lease_owner="elsewhere:2", lease_until=past)
+    w = worker.Worker(queue)
+    db = worker.connect(queue)
+    job = w._claim(db)
+    assert (job["id"], job["attempts"], job["lease_owner"]) == (retry, 2, w.owner)
+    assert w._claim(db) is None
+    dead = _job(queue, last)
+    assert (dead["status"], dead["attempts"], dead["error"]) == ("failed", 3, worker.WORKER_DIED)
+
+
+def test_recover_requeues_dead_local_workers(queue):
+    owner = f"{worker.socket.gethostname()}:{_dead_pid()}"
+    future = time.time() + 3600
+    retry = _add(queue, status="running", attempts=1, lease_owner=owner, lease_until=future)
+    last = _add(queue, status="running", attempts=3, lease_owner=owner, lease_until=future)
+    alive = _add(queue, status="running", attempts=1, lease_owner=f"{worker.socket.gethostname()}:{worker.os.getpid()}",
+                 lease_until=future)
+    assert worker.Worker(queue).recover() == 1
+    assert _job(queue, retry)["status"] == "queued"
+    assert (_job(queue, last)["status"], _job(queue, last)["error"]) == ("failed", worker.WORKER_DIED)
+    assert _job(queue, alive)["status"] == "running"
+
+
+def test_interrupt_marks_the_worker_stopping_before_children_are_signalled(queue, monkeypatch):
+    seen = []
+    w = worker.Worker(queue)
+    monkeypatch.setattr(worker.signal, "getsignal", lambda sig: lambda signum, frame: seen.append(w.stopping.is_set()))
+    installed = {}
+    monkeypatch.setattr(worker.signal, "signal", lambda sig, handler: installed.setdefault(sig, handler))
+    w._install_stop_handlers()
+    installed[worker.signal.SIGINT](worker.signal.SIGINT, None)
+    assert seen == [True]
+    assert installed[worker.signal.SIGTERM] is installed[worker.signal.SIGINT]